@@ -1,32 +1,44 @@
-from fastapi import FastAPI, Request, HTTPException
+import threading
+
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from knox_source_data_io.io_handler import IOHandler
 from file_io.FileWriter import FileWriter
 import os
 import spacy
 from spacy import displacy
 
+from rdflib import URIRef
+from rdflib.util import from_n3
+
+from data_access import LocalTripleStore
 from model import Document, Article
 from rdf import NJTripleExtractor, GFTripleExtractor
+from rdf.RdfCreator import generate_relation
 from environment import EnvironmentVariables as Ev
 Ev()
 
 
-from utils import load_model, logging
+from utils import load_model, pipe_entities, logging
 from environment import EnvironmentVariables as Ev
 Ev()
 
 app = FastAPI()
 file_writer = FileWriter()
 
-publisher_to_model = {
-    'NJ': spacy.load('da_core_news_lg'),
-    'GF': spacy.load(Ev.instance.get_value(Ev.instance.GF_SPACY_MODEL))
-}
-
+# The API has triple extractors of its own, so it never waits for the pipeline. Requests are handled in a thread pool,
+# so they hold the lock of an extractor while using it
 publisher_to_triple_extractor = {
     'NJ': NJTripleExtractor(Ev.instance.get_value(Ev.instance.NJ_SPACY_MODEL)),
     'GF': GFTripleExtractor(Ev.instance.get_value(Ev.instance.GF_SPACY_MODEL))
 }
+
+# The models used to visualise entities, each paired with the lock held while using it. They are not the instances
+# the pre-processors use on the pipeline thread. Their word vectors are memory-mapped and shared, see load_model
+publisher_to_model = {
+    'NJ': (load_model('da_core_news_lg', shared=False), threading.Lock()),
+    'GF': (load_model(Ev.instance.get_value(Ev.instance.GF_SPACY_MODEL), shared=False), threading.Lock())
+}
 #
 # origin = { "http://localhost:3000" }
 #
@@ -45,26 +57,51 @@ async def read_doc(request: Request):
     except Exception as e:
         raise HTTPException(status_code=403, detail="Json file not following schema with error: " + str(e))
     try:
-        await file_writer.add_to_queue(request)
+        queued = await file_writer.add_to_queue(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail="File not added to queue with error: " + str(e))
 
+    if queued is False:
+        return "Json file is a duplicate of an earlier upload and was not queued again"
     return "Json file successfully created"
 
 
+@app.get("/uploadCounters/", status_code=200)
+async def upload_counters():
+    """
+    :return: The number of uploads queued and rejected as duplicates since startup
+    """
+    return file_writer.counters()
+
+
 @app.post("/visualiseNer/", status_code=200)
 async def visualise(request: Request):
     try:
         json = await request.json()
         publisher, text = json['publisher'], json['text']
-        nlp = publisher_to_model[publisher]
-        doc = nlp(text)
-        html = displacy.render(doc, style="ent", minify=True)
+        nlp, lock = publisher_to_model[publisher]
+        # The model is run off the event loop
+        entities = await run_in_threadpool(_find_entities, nlp, lock, text)
+        parsed = {"text": text, "ents": [{"start": entity.start_char, "end": entity.end_char, "label": entity.label}
+                                         for entity in entities]}
+        html = displacy.render(parsed, style="ent", manual=True, minify=True)
         return html
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to visualise: " + str(e))
 
 
+def _find_entities(nlp, lock: threading.Lock, text: str):
+    """
+    :param nlp: The model to find the entities with
+    :param lock: The lock held while using the model
+    :param text: The text to find the entities of
+    :return: The entities found in the text
+    """
+    with lock:
+        # Long texts are parsed in chunks, and rendered from the entities in manual mode
+        return next(pipe_entities(nlp, [text], profile="ner-only"))
+
+
 @app.post("/generateKG/", status_code=200)
 async def genKG(request: Request):
     """
@@ -77,13 +114,59 @@ async def genKG(request: Request):
         json = await request.json()
         publisher, text = json['publisher'], json['text']
         triple_extractor = publisher_to_triple_extractor[publisher]
-        triple_extractor.clear_stored_triples()
-        # triple_extractor = GFTripleExtractor(Ev.instance.get_value(Ev.instance.GF_SPACY_MODEL))
         document = Document(publisher)
         article = Article("SampleTitle", text, "SamplePath", article_id="SampleID")
         document.articles.append(article)
-        ttl_file = triple_extractor.return_ttl(document)
+        # The extractor is run off the event loop
+        ttl_file = await run_in_threadpool(_return_ttl, triple_extractor, document)
         return str(ttl_file)
     except Exception as e:
         logging.LogF.log(str(e))
         raise HTTPException(status_code=500, detail="Failed generate graph: " + str(e))
+
+
+def _return_ttl(triple_extractor, document: Document) -> str:
+    """
+    :param triple_extractor: The triple extractor of the API
+    :param document: The document to extract triples from
+    :return: A string representation of the triples extracted
+    """
+    with triple_extractor.lock:
+        triple_extractor.clear_stored_triples()
+        return triple_extractor.return_ttl(document)
+
+
+@app.get("/triples/", status_code=200)
+def triples(subject: str = None, predicate: str = None, object: str = None, graph: str = None,
+            limit: int = Query(100, ge=1, le=10000), offset: int = Query(0, ge=0)):
+    """
+    Looks up triples in the local triple store by pattern, e.g. all entities mentioned by an article with
+    ?subject=<article IRI>&predicate=knox:mentions. Terms are given in N3, e.g. <http://...> or "literal", as a prefixed
+    name with a prefix known to generate_relation, or as a plain IRI. The store is queried synchronously, so the
+    endpoint is a plain function, run in the thread pool of the API instead of on its event loop.
+
+    :return: The matching triples, with their terms in N3, or status code 404 if no local triple store is configured
+    """
+    store = LocalTripleStore.get_instance()
+    if store is None:
+        raise HTTPException(status_code=404, detail="No local triple store configured, set LOCAL_TRIPLE_STORE_PATH")
+    try:
+        terms = [_parse_term(term) if term is not None else None for term in [subject, predicate, object]]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="Invalid term: " + str(e))
+
+    matches = store.match(*terms, graph_name=graph, limit=limit, offset=offset)
+    return [{"subject": s.n3(), "predicate": p.n3(), "object": o.n3()} for s, p, o in matches]
+
+
+def _parse_term(term: str):
+    """
+    :param term: A term in N3, as a prefixed name or as a plain IRI
+    :return: The rdflib term
+    """
+    if term.startswith(("<", '"', "_:")):
+        return from_n3(term)
+    prefix = term.split(":", 1)[0]
+    if prefix in ["rdf", "rdfs", "owl", "xsd", "knox"]:
+        return generate_relation(term)
+    return URIRef(term)
@@ -1,19 +1,22 @@
 import json
 import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
 import sched
 import time
 
 import requests
 import uvicorn
-from scheduler import scheduler
+from scheduler import scheduler, QUEUE_STATE
 from os.path import exists
 from doc_classification import DocumentClassifier, Document
 from api import ImportApi
 from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
 from environment import EnvironmentVariables as Ev
 from word_count.WordCounter import WordCounter
-from data_access import WordCountDao
+from data_access import WordCountDao, WordCountMatrixExporter, Outbox
+from exceptions import RequeueException
+from rdf import RdfCreator
 from utils import logging
 
 # Instantiate EnvironmentVariables class for future use. Environment constants cannot be accessed without this
@@ -31,6 +34,16 @@ s = sched.scheduler(time.time, time.sleep)
 # Instantiate DocumentClassifier
 document_classifier = DocumentClassifier()
 
+# Export mode: word counts are accumulated into a sparse matrix on disk instead of being sent to the database layer
+export_path = Ev.instance.get_value(Ev.instance.WORD_COUNT_EXPORT_PATH)
+word_count_exporter = WordCountMatrixExporter(export_path) if export_path is not None else None
+
+# Triples are extracted in a thread of their own, concurrently with the word counting of the same document, unless
+# TRIPLE_EXTRACTION is false. If only the triples fail, the document is kept in the queue for its triples alone, see
+# process_stored_publications
+triple_extraction_enabled = Ev.instance.get_bool(Ev.instance.TRIPLE_EXTRACTION, True)
+triple_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TripleExtraction")
+
 def run_api():
     """
 
@@ -41,8 +54,64 @@ def run_api():
 def process_stored_publications(content):
     """
     This function processes the stored articles and manuals from Grundfos and Nordjyske.
-    This includes the extraction of data from the .json files, the lemmatization, wordcount, and
-    uploading data to the database.
+    This includes the extraction of data from the .json files, the lemmatization, wordcount, triple extraction unless
+    TRIPLE_EXTRACTION is false, and uploading data to the database.
+
+    If the word counts are sent but the triple extraction fails, the document is kept in the queue with only its
+    triples left to do, so the word counts are not sent again. It is given up after TRIPLE_MAX_ATTEMPTS attempts.
+
+    :param content: The input JSON file
+    """
+    state = content.get(QUEUE_STATE)
+    if state is not None:
+        # Only the triples are left to do
+        document = {key: value for key, value in content.items() if key != QUEUE_STATE}
+        try:
+            document_classifier.extract_triples(document)
+        except Exception as error:
+            requeue_triples(document, state["triple_attempts"] + 1, error)
+        return
+
+    triples = triple_executor.submit(document_classifier.extract_triples, content) \
+        if triple_extraction_enabled else None
+    try:
+        count_words(content)
+    except Exception:
+        # The extraction must finish before the document is queued again
+        if triples is not None:
+            wait([triples])
+        raise
+
+    # The document is done once its triples are sent too
+    if triples is not None:
+        try:
+            triples.result()
+        except Exception as error:
+            requeue_triples(content, 1, error)
+
+
+def requeue_triples(document, attempts: int, error: Exception):
+    """
+    Keeps a document whose word counts have been sent in the queue, with only its triples left to do.
+
+    :param document: The input JSON file, without queue state
+    :param attempts: The number of times the triple extraction of the document has failed
+    :param error: The error of the last attempt
+    :raises RequeueException: If the document is to be processed again
+    :raises Exception: The error of the last attempt, if the document is given up
+    """
+    max_attempts = Ev.instance.get_int(Ev.instance.TRIPLE_MAX_ATTEMPTS, 5)
+    if attempts >= max_attempts:
+        logging.LogF.log(f"Triple extraction failed {attempts} times, giving up")
+        raise error
+    content = dict(document)
+    content[QUEUE_STATE] = {"triple_attempts": attempts}
+    raise RequeueException(f"Triple extraction failed ({attempts} of {max_attempts} attempts): {error}", content)
+
+
+def count_words(content):
+    """
+    Pre-processes and word counts the stored articles and manuals, and sends the word counts to the database.
 
     :param content: The input JSON file
     """
@@ -52,36 +121,62 @@ def process_stored_publications(content):
     total_number_of_processed_articles = 0
     # Wordcount the lemmatized data and create Data Transfer Objects
     dtos = []
+    article_ids = []
     for article in document.articles:
         logging.LogF.log(f"{int((total_number_of_processed_articles*100)/total_number_of_articles)}% : Word counting for {document.publisher} - {article.title}")
         word_counts = WordCounter.count_words(article.title + " " + article.body)
         dto = DocumentWordCountDto(article.title, article.path, word_counts[0], word_counts[1], document.publisher)
         dtos.append(dto)
+        article_ids.append(article.id)
         total_number_of_processed_articles += 1
 
     logging.LogF.log(f"100% : Word counting for {document.publisher}")
 
+    if word_count_exporter is not None:
+        logging.LogF.log(f"Exporting {document.publisher}")
+        word_count_exporter.export_word_count(dtos, article_ids)
+        return
+
     logging.LogF.log(f"Sending {document.publisher}")
     # Send word count data to database
     try:
-        WordCountDao.send_word_count(dtos)
+        WordCountDao.send_word_count(dtos, article_ids)
     except ConnectionError as error:
         raise error
     except Exception as error:
         raise error
 
 
+def flush_word_count_export():
+    """
+    Writes the word count matrix to disk, if anything has been exported since it was last written.
+    """
+    if word_count_exporter is not None and word_count_exporter.has_pending_rows:
+        word_count_exporter.write()
+
+
 def pipeline():
     """
     The main function and entry point of the Knowledge Layer.
     """
     print("Beginning of Knowledge Layer!")
 
+    # Start shipping payloads stored in the outbox, if one is configured
+    outbox = Outbox.get_instance()
+    if outbox is not None:
+        outbox.register_handler(Outbox.WORD_COUNT, WordCountDao.send_outbox_payload,
+                                WordCountDao.forget_outbox_payload)
+        # Deltas are delivered after the full word counts they were computed from
+        outbox.register_handler(Outbox.WORD_COUNT_DELTA, WordCountDao.send_outbox_delta_payload,
+                                WordCountDao.forget_outbox_payload, group=Outbox.WORD_COUNT)
+        outbox.register_handler(Outbox.TRIPLES, RdfCreator.send_outbox_triples)
+        outbox.start()
+
     # Start a seperate thread for the API to avoid blocking
     api_thread = threading.Thread(target=run_api)
     api_thread.start()
 
-    s.enter(5, 1, scheduler, (s, process_stored_publications))
+    s.enter(5, 1, scheduler, (s, process_stored_publications, flush_word_count_export))
     s.run()
     print("End of Knowledge Layer!")
 
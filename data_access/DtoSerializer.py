@@ -0,0 +1,100 @@
+import dataclasses
+import json
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class DtoSerializer:
+    """
+    Serializes data transfer objects straight to JSON bytes. Unlike dataclasses.asdict followed by json.dumps, no
+    intermediate copy of the objects is made.
+
+    If orjson is installed it is used, as it encodes dataclasses natively. Otherwise a stdlib based encoder walking
+    the dataclass fields directly is used. For the strings, integers, lists and dataclasses the data transfer objects
+    are made of, both produce the same bytes: compact JSON with the fields in the order they are declared and
+    non-ASCII characters in UTF-8. So an encoding, and a key derived from it, does not depend on whether orjson is
+    installed.
+    """
+
+    # Cached '"name":' prefixes for the fields of each dataclass
+    __field_prefixes: Dict[type, List[Tuple[str, str]]] = {}
+
+    @staticmethod
+    def encode(dto: Any) -> bytes:
+        """
+        Encodes a single data transfer object as JSON.
+
+        :param dto: The dataclass instance to encode
+        :return: The JSON encoding as bytes
+        """
+        if orjson is not None:
+            return orjson.dumps(dto)
+
+        parts = []
+        DtoSerializer.__encode_value(dto, parts)
+        return "".join(parts).encode("utf-8")
+
+    @staticmethod
+    def iter_json_array(encoded_objects: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Yields the pieces of a JSON array of already encoded objects, so the array can be written incrementally
+        without joining it into one bytes object first.
+
+        :param encoded_objects: The JSON encoded objects
+        :return: An iterator over the pieces of the array
+        """
+        yield b"["
+        for index, encoded_object in enumerate(encoded_objects):
+            if index > 0:
+                yield b","
+            yield encoded_object
+        yield b"]"
+
+    @staticmethod
+    def __encode_value(value: Any, parts: List[str]):
+        """
+        Appends the JSON encoding of a value to parts.
+
+        :param value: The value to encode
+        :param parts: The list the encoded pieces are appended to
+        """
+        value_type = type(value)
+        if value_type is str:
+            parts.append(encode_basestring(value))
+        elif value_type is int:
+            parts.append(int.__repr__(value))
+        elif value_type is list or value_type is tuple:
+            parts.append("[")
+            for index, item in enumerate(value):
+                if index > 0:
+                    parts.append(",")
+                DtoSerializer.__encode_value(item, parts)
+            parts.append("]")
+        elif dataclasses.is_dataclass(value):
+            separator = "{"
+            for name, prefix in DtoSerializer.__prefixes(value_type):
+                parts.append(separator)
+                parts.append(prefix)
+                DtoSerializer.__encode_value(getattr(value, name), parts)
+                separator = ","
+            parts.append("}" if separator == "," else "{}")
+        else:
+            parts.append(json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+
+    @staticmethod
+    def __prefixes(dataclass_type: type) -> List[Tuple[str, str]]:
+        """
+        :param dataclass_type: A dataclass
+        :return: The field names of the dataclass paired with their encoded '"name":' prefix
+        """
+        prefixes = DtoSerializer.__field_prefixes.get(dataclass_type)
+        if prefixes is None:
+            prefixes = [(field.name, encode_basestring(field.name) + ":")
+                        for field in dataclasses.fields(dataclass_type)]
+            DtoSerializer.__field_prefixes[dataclass_type] = prefixes
+        return prefixes
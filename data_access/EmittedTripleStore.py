@@ -0,0 +1,139 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Iterable, Iterator, List, Tuple
+
+from rdflib import Literal
+
+from environment import EnvironmentVariables as Ev
+
+Ev()
+
+
+class EmittedTripleStore:
+    """
+    A local index of the triples already sent to the database layer for each graph, used to send only new triples.
+
+    A triple is identified by a 128 bit hash of its terms. A triple is only recorded once its upload has succeeded,
+    also when it is delivered by the outbox, so triples of a failed or rejected upload are sent again with the next one.
+    """
+
+    instance = None
+    __instance_lock = threading.Lock()
+
+    # The size in bytes of the hash of a triple
+    HASH_SIZE = 16
+
+    def __init__(self, path: str):
+        """
+
+        :param path: Path of the SQLite file backing the index
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS emitted (
+                graph TEXT NOT NULL,
+                triple_hash BLOB NOT NULL,
+                PRIMARY KEY (graph, triple_hash)
+            ) WITHOUT ROWID""")
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the index configured by EMITTED_TRIPLES_PATH. The same instance is returned on every call.
+
+        :return: The index, or None if EMITTED_TRIPLES_PATH is not set
+        """
+        path = Ev.instance.get_value(Ev.instance.EMITTED_TRIPLES_PATH)
+        if path is None:
+            return None
+        with cls.__instance_lock:
+            if cls.instance is None:
+                cls.instance = EmittedTripleStore(path)
+        return cls.instance
+
+    @staticmethod
+    def triple_hash(triple: Tuple) -> bytes:
+        """
+        :param triple: A triple on the form (Subject, RelationPredicate, Object)
+        :return: A hash of the terms of the triple
+        """
+        digest = hashlib.blake2b(digest_size=EmittedTripleStore.HASH_SIZE)
+        for term in triple:
+            # Literals and IRIs with the same text are different terms
+            digest.update(b"L" if isinstance(term, Literal) else b"R")
+            digest.update(term.n3().encode("utf-8"))
+            digest.update(b"\0")
+        return digest.digest()
+
+    def filter_new(self, graph_name: str, triples: Iterable[Tuple], pending: List[bytes], resync: bool = False) \
+            -> Iterator[Tuple]:
+        """
+        Filters out the triples already sent for a graph, lazily. The hashes of the triples passed on are added to
+        pending, to be recorded with commit once they have been delivered.
+
+        :param graph_name: The name of the graph the triples belong to
+        :param triples: Triples on the form (Subject, RelationPredicate, Object)
+        :param pending: A list the hashes of the triples passed on are appended to
+        :param resync: Whether to pass on every triple, also those already sent, e.g. after the graph was rebuilt
+        :return: An iterator over the triples not sent before, each only once
+        """
+        graph = graph_name or ""
+        passed = set()
+        for triple in triples:
+            triple_hash = self.triple_hash(triple)
+            if triple_hash in passed:
+                continue
+            if not resync:
+                with self.__lock:
+                    sent = self.__connection.execute("SELECT 1 FROM emitted WHERE graph = ? AND triple_hash = ?",
+                                                     (graph, triple_hash)).fetchone() is not None
+                if sent:
+                    continue
+            passed.add(triple_hash)
+            pending.append(triple_hash)
+            yield triple
+
+    def commit(self, graph_name: str, triple_hashes: List[bytes]):
+        """
+        Records triples as sent for a graph.
+
+        :param graph_name: The name of the graph the triples belong to
+        :param triple_hashes: The hashes of the triples, see filter_new
+        """
+        graph = graph_name or ""
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            try:
+                self.__connection.executemany("INSERT OR IGNORE INTO emitted (graph, triple_hash) VALUES (?, ?)",
+                                              ((graph, triple_hash) for triple_hash in triple_hashes))
+                self.__connection.execute("COMMIT")
+            except Exception:
+                self.__connection.execute("ROLLBACK")
+                raise
+
+    def clear(self, graph_name: str = None):
+        """
+        Forgets the triples sent for a graph, so they are all sent again.
+
+        :param graph_name: The name of the graph, or None to forget the triples of every graph
+        """
+        with self.__lock:
+            if graph_name is None:
+                self.__connection.execute("DELETE FROM emitted")
+            else:
+                self.__connection.execute("DELETE FROM emitted WHERE graph = ?", (graph_name,))
+
+    def count(self, graph_name: str = None) -> int:
+        """
+        :param graph_name: The name of the graph, or None to count the triples of every graph
+        :return: The number of triples recorded as sent
+        """
+        with self.__lock:
+            if graph_name is None:
+                return self.__connection.execute("SELECT COUNT(*) FROM emitted").fetchone()[0]
+            return self.__connection.execute("SELECT COUNT(*) FROM emitted WHERE graph = ?",
+                                             (graph_name,)).fetchone()[0]
@@ -0,0 +1,209 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rdflib.term import Identifier
+from rdflib.util import from_n3
+
+from environment import EnvironmentVariables as Ev
+
+Ev()
+
+
+class LocalTripleStore:
+    """
+    A local persistent copy of the extracted triples, used to inspect the graph and answer pattern lookups without
+    going to the database layer.
+
+    Terms are stored once, in their N3 form, and triples as rows of term ids. The triples are indexed in the orders
+    subject-predicate-object, predicate-object-subject and object-subject-predicate, so a lookup with any combination
+    of known terms is a range scan of one index, whatever the size of the store.
+
+    Example of usage:
+        store = LocalTripleStore("triples.sqlite")
+        store.add_all(triples, "NJ")
+        mentioned = store.match(subject=article, predicate=KNOX.mentions)
+    """
+
+    instance = None
+    __instance_lock = threading.Lock()
+
+    # The number of triples written in one transaction
+    BATCH_SIZE = 5000
+
+    def __init__(self, path: str):
+        """
+
+        :param path: Path of the SQLite file backing the store
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS terms (
+                id INTEGER PRIMARY KEY,
+                n3 TEXT NOT NULL UNIQUE
+            )""")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS triples (
+                s INTEGER NOT NULL,
+                p INTEGER NOT NULL,
+                o INTEGER NOT NULL,
+                g INTEGER NOT NULL,
+                PRIMARY KEY (s, p, o, g)
+            ) WITHOUT ROWID""")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p)")
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the store configured by LOCAL_TRIPLE_STORE_PATH. The same instance is returned on every call.
+
+        :return: The store, or None if LOCAL_TRIPLE_STORE_PATH is not set
+        """
+        path = Ev.instance.get_value(Ev.instance.LOCAL_TRIPLE_STORE_PATH)
+        if path is None:
+            return None
+        with cls.__instance_lock:
+            if cls.instance is None:
+                cls.instance = LocalTripleStore(path)
+        return cls.instance
+
+    def add_all(self, triples: Iterable[Tuple], graph_name: str = None) -> int:
+        """
+        Stores triples, in batches of BATCH_SIZE. Triples already in the store are left as they are.
+
+        :param triples: Triples on the form (Subject, RelationPredicate, Object)
+        :param graph_name: The name of the graph the triples belong to
+        :return: The number of triples given
+        """
+        count = 0
+        batch = []
+        for triple in triples:
+            batch.append(triple)
+            if len(batch) == self.BATCH_SIZE:
+                self.__add_batch(batch, graph_name)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.__add_batch(batch, graph_name)
+            count += len(batch)
+        return count
+
+    def tee(self, triples: Iterable[Tuple], graph_name: str = None) -> Iterator[Tuple]:
+        """
+        Passes triples on while storing them, so a stream of triples can be stored on its way to being sent.
+
+        :param triples: Triples on the form (Subject, RelationPredicate, Object)
+        :param graph_name: The name of the graph the triples belong to
+        :return: An iterator over the triples
+        """
+        batch = []
+        for triple in triples:
+            batch.append(triple)
+            yield triple
+            if len(batch) == self.BATCH_SIZE:
+                self.__add_batch(batch, graph_name)
+                batch = []
+        if batch:
+            self.__add_batch(batch, graph_name)
+
+    def match(self, subject: Identifier = None, predicate: Identifier = None, _object: Identifier = None,
+              graph_name: str = None, limit: int = 100, offset: int = 0) -> List[Tuple]:
+        """
+        Looks up the triples matching a pattern. A term left out matches any term.
+
+        :param subject: The subject of the triples
+        :param predicate: The predicate of the triples
+        :param _object: The object of the triples
+        :param graph_name: The name of the graph the triples belong to
+        :param limit: The maximum number of triples returned
+        :param offset: The number of matching triples skipped, for paging
+        :return: The matching triples, on the form (Subject, RelationPredicate, Object)
+        """
+        # SQLite reads a negative limit as no limit at all
+        if limit < 0 or offset < 0:
+            raise ValueError(f"limit and offset must not be negative, got {limit} and {offset}")
+        conditions, parameters = [], []
+        with self.__lock:
+            for column, term in [("s", subject), ("p", predicate), ("o", _object)]:
+                if term is None:
+                    continue
+                term_id = self.__term_id(term.n3())
+                if term_id is None:
+                    return []
+                conditions.append("t." + column + " = ?")
+                parameters.append(term_id)
+            if graph_name is not None:
+                graph_id = self.__term_id(graph_name)
+                if graph_id is None:
+                    return []
+                conditions.append("t.g = ?")
+                parameters.append(graph_id)
+
+            # The matches are ordered, so consecutive pages neither overlap nor skip triples. They are ordered like the
+            # index the pattern is looked up in, so SQLite reads them in order instead of sorting them
+            if subject is not None or predicate is None and _object is None:
+                order = ["s", "p", "o"]
+            elif predicate is not None:
+                order = ["p", "o", "s"]
+            else:
+                order = ["o", "s", "p"]
+            # DISTINCT, as the same triple can be in several graphs. Only the terms of the page are looked up
+            rows = self.__connection.execute(
+                "SELECT ts.n3, tp.n3, tobj.n3 FROM (SELECT DISTINCT t.s, t.p, t.o FROM triples t"
+                + (" WHERE " + " AND ".join(conditions) if conditions else "")
+                + " ORDER BY " + ", ".join("t." + column for column in order) + " LIMIT ? OFFSET ?) m "
+                "JOIN terms ts ON ts.id = m.s JOIN terms tp ON tp.id = m.p JOIN terms tobj ON tobj.id = m.o "
+                "ORDER BY " + ", ".join("m." + column for column in order), parameters + [limit, offset]).fetchall()
+        return [tuple(from_n3(term) for term in row) for row in rows]
+
+    def count(self) -> int:
+        """
+        :return: The number of triples stored, counting a triple once per graph it is in
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def __add_batch(self, triples: List[Tuple], graph_name: Optional[str]):
+        """
+        Stores a batch of triples in one transaction.
+        """
+        # Graph names are stored in the terms table too
+        graph = graph_name or ""
+        rows = [tuple(term.n3() for term in triple) for triple in triples]
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            try:
+                term_ids = self.__term_ids(set(term for row in rows for term in row) | {graph})
+                self.__connection.executemany(
+                    "INSERT OR IGNORE INTO triples (s, p, o, g) VALUES (?, ?, ?, ?)",
+                    ((term_ids[s], term_ids[p], term_ids[o], term_ids[graph]) for s, p, o in rows))
+                self.__connection.execute("COMMIT")
+            except Exception:
+                self.__connection.execute("ROLLBACK")
+                raise
+
+    def __term_ids(self, terms: Iterable[str]) -> Dict[str, int]:
+        """
+        Returns the ids of terms, storing the terms not stored before. The lock must be held.
+        """
+        terms = list(terms)
+        self.__connection.executemany("INSERT OR IGNORE INTO terms (n3) VALUES (?)", ((term,) for term in terms))
+        term_ids = {}
+        # Bounded by SQLite's limit on the number of parameters of a statement
+        for start in range(0, len(terms), 500):
+            part = terms[start:start + 500]
+            term_ids.update(self.__connection.execute(
+                "SELECT n3, id FROM terms WHERE n3 IN (" + ",".join("?" * len(part)) + ")", part).fetchall())
+        return term_ids
+
+    def __term_id(self, term: str) -> Optional[int]:
+        """
+        :return: The id of a term, or None if it is not stored. The lock must be held.
+        """
+        row = self.__connection.execute("SELECT id FROM terms WHERE n3 = ?", (term,)).fetchone()
+        return row[0] if row is not None else None
@@ -0,0 +1,255 @@
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict
+
+import requests
+
+from environment import EnvironmentVariables as Ev
+from utils import logging
+
+Ev()
+
+
+class Outbox:
+    """
+    A durable local outbox for payloads bound for the database layer. Payloads are appended to an SQLite file as soon
+    as they are computed, and a background shipper delivers them with exponential backoff. This decouples processing
+    from delivery, so a database layer that is temporarily unreachable does not cause already processed documents
+    to be processed again.
+
+    Payloads that are rejected by the database layer with a client error are kept in the file, marked as failed, and
+    not retried. The failure handler of their kind, if any, is called with them.
+
+    Payloads of the same group are delivered in the order they were stored. A group is one kind unless kinds are
+    registered with a shared group, e.g. full word counts and the deltas computed from them.
+    """
+    WORD_COUNT = "word_count"
+    WORD_COUNT_DELTA = "word_count_delta"
+    TRIPLES = "triples"
+
+    instance = None
+    __instance_lock = threading.Lock()
+
+    def __init__(self, path: str, poll_interval: float = 5.0, max_backoff: float = 300.0):
+        """
+
+        :param path: Path of the SQLite file backing the outbox
+        :param poll_interval: Seconds between checks for payloads that are due
+        :param max_backoff: Upper bound in seconds for the delay between two attempts of the same payload
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.__handlers: Dict[str, Callable[[bytes], None]] = {}
+        self.__failure_handlers: Dict[str, Callable[[bytes], None]] = {}
+        self.__groups: Dict[str, str] = {}
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__stopped = threading.Event()
+        self.__thread: threading.Thread = None
+
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                failed INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL
+            )""")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (failed, next_attempt)")
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the outbox configured by OUTBOX_PATH. The same instance is returned on every call.
+
+        :return: The outbox, or None if OUTBOX_PATH is not set
+        """
+        path = Ev.instance.get_value(Ev.instance.OUTBOX_PATH)
+        if path is None:
+            return None
+        with cls.__instance_lock:
+            if cls.instance is None:
+                cls.instance = Outbox(path,
+                                      Ev.instance.get_float(Ev.instance.OUTBOX_POLL_INTERVAL, 5.0),
+                                      Ev.instance.get_float(Ev.instance.OUTBOX_MAX_BACKOFF, 300.0))
+        return cls.instance
+
+    def register_handler(self, kind: str, handler: Callable[[bytes], None],
+                         failure_handler: Callable[[bytes], None] = None, group: str = None):
+        """
+        Registers the function delivering payloads of the given kind. The function must raise if delivery fails.
+
+        :param kind: The kind of payload, e.g. Outbox.WORD_COUNT
+        :param handler: A function taking the payload as bytes
+        :param failure_handler: A function taking the payload as bytes, called when the payload is marked as failed,
+            e.g. to undo what was recorded when it was stored
+        :param group: The group whose payloads are delivered in order, defaults to the kind
+        """
+        self.__handlers[kind] = handler
+        if failure_handler is not None:
+            self.__failure_handlers[kind] = failure_handler
+        self.__groups[kind] = group if group is not None else kind
+
+    def put(self, kind: str, payload: bytes) -> int:
+        """
+        Appends a payload to the outbox. It is durable once this method returns.
+
+        :param kind: The kind of payload, e.g. Outbox.WORD_COUNT
+        :param payload: The payload as bytes
+        :return: The id of the stored payload
+        """
+        now = time.time()
+        with self.__lock:
+            cursor = self.__connection.execute(
+                "INSERT INTO outbox (kind, payload, next_attempt, created) VALUES (?, ?, ?, ?)",
+                (kind, sqlite3.Binary(payload), now, now))
+        self.__wakeup.set()
+        return cursor.lastrowid
+
+    def pending(self) -> int:
+        """
+        :return: The number of payloads that have not been delivered yet, excluding failed ones
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM outbox WHERE failed = 0").fetchone()[0]
+
+    def ship(self) -> int:
+        """
+        Attempts delivery of every payload that is due, oldest first. A payload is only attempted once every older
+        payload of its group has been delivered or marked as failed, so after a payload fails, or while it waits for
+        its next attempt, the remaining payloads of its group are left for a later round.
+
+        :return: The number of delivered payloads
+        """
+        with self.__lock:
+            pending = self.__connection.execute(
+                "SELECT id, kind, attempts, next_attempt FROM outbox WHERE failed = 0 ORDER BY id").fetchall()
+
+        now = time.time()
+        delivered = 0
+        blocked_groups = set()
+        for entry_id, kind, attempts, next_attempt in pending:
+            handler = self.__handlers.get(kind)
+            group = self.__groups.get(kind, kind)
+            if handler is None or group in blocked_groups:
+                continue
+            if next_attempt > now:
+                blocked_groups.add(group)
+                continue
+
+            with self.__lock:
+                # The payload may have been discarded by the failure handler of an older payload in this round
+                row = self.__connection.execute("SELECT payload FROM outbox WHERE id = ? AND failed = 0",
+                                                (entry_id,)).fetchone()
+            if row is None:
+                continue
+            payload = bytes(row[0])
+            try:
+                handler(payload)
+            except requests.exceptions.HTTPError as error:
+                status_code = error.response.status_code if error.response is not None else None
+                if status_code is not None and 400 <= status_code < 500 and status_code not in [408, 429]:
+                    logging.LogF.log(f"Outbox: {kind} payload {entry_id} rejected, marked as failed: {error}")
+                    self.__update(entry_id, "UPDATE outbox SET failed = 1, attempts = attempts + 1 WHERE id = ?")
+                    self.__handle_failure(entry_id, kind, payload)
+                else:
+                    self.__reschedule(entry_id, kind, attempts, error)
+                    blocked_groups.add(group)
+                continue
+            except Exception as error:
+                self.__reschedule(entry_id, kind, attempts, error)
+                blocked_groups.add(group)
+                continue
+
+            self.__update(entry_id, "DELETE FROM outbox WHERE id = ?")
+            delivered += 1
+
+        if delivered > 0:
+            logging.LogF.log(f"Outbox: delivered {delivered} payloads, {self.pending()} pending")
+        return delivered
+
+    def discard(self, kind: str, predicate: Callable[[bytes], bool]) -> int:
+        """
+        Marks the pending payloads of a kind that match a predicate as failed, without attempting them, and calls the
+        failure handler of the kind with each of them. Used to drop payloads that depend on a rejected one.
+
+        :param kind: The kind of payload, e.g. Outbox.WORD_COUNT_DELTA
+        :param predicate: A function taking the payload as bytes, returning True if it is to be discarded
+        :return: The number of discarded payloads
+        """
+        with self.__lock:
+            pending = self.__connection.execute("SELECT id, payload FROM outbox WHERE failed = 0 AND kind = ? "
+                                                "ORDER BY id", (kind,)).fetchall()
+
+        discarded = 0
+        for entry_id, payload in pending:
+            payload = bytes(payload)
+            if not predicate(payload):
+                continue
+            logging.LogF.log(f"Outbox: {kind} payload {entry_id} discarded, marked as failed")
+            self.__update(entry_id, "UPDATE outbox SET failed = 1 WHERE id = ?")
+            self.__handle_failure(entry_id, kind, payload)
+            discarded += 1
+        return discarded
+
+    def start(self):
+        """
+        Starts the background shipper thread.
+        """
+        if self.__thread is not None:
+            return
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__run, name="OutboxShipper", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops the background shipper thread after its current round.
+        """
+        self.__stopped.set()
+        self.__wakeup.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        while not self.__stopped.is_set():
+            self.__wakeup.clear()
+            try:
+                self.ship()
+            except Exception as error:
+                logging.LogF.log(f"Outbox: unexpected error while shipping: {error}")
+            self.__wakeup.wait(self.poll_interval)
+
+    def __reschedule(self, entry_id: int, kind: str, attempts: int, error: Exception):
+        """
+        Schedules the next attempt of a payload that could not be delivered.
+        """
+        delay = min(self.max_backoff, self.poll_interval * (2 ** min(attempts, 16)))
+        logging.LogF.log(f"Outbox: {kind} payload {entry_id} not delivered, retrying in {delay:.0f}s: {error}")
+        with self.__lock:
+            self.__connection.execute("UPDATE outbox SET attempts = attempts + 1, next_attempt = ? WHERE id = ?",
+                                      (time.time() + delay, entry_id))
+
+    def __handle_failure(self, entry_id: int, kind: str, payload: bytes):
+        """
+        Calls the failure handler of a payload marked as failed. Errors are logged, as the payload stays failed anyway.
+        """
+        failure_handler = self.__failure_handlers.get(kind)
+        if failure_handler is None:
+            return
+        try:
+            failure_handler(payload)
+        except Exception as error:
+            logging.LogF.log(f"Outbox: failure handler of {kind} payload {entry_id} failed: {error}")
+
+    def __update(self, entry_id: int, statement: str):
+        with self.__lock:
+            self.__connection.execute(statement, (entry_id,))
@@ -1,12 +1,14 @@
-import dataclasses
 import json
-from typing import List
-
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 
+from data_access.DtoSerializer import DtoSerializer
+from data_access.Outbox import Outbox
+from data_access.WordCountFingerprintStore import WordCountFingerprintStore
 from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
 from environment import EnvironmentVariables as Ev
 from requests.exceptions import ConnectionError
+from utils import http_client
 import logging
 
 # logging.basicConfig(
@@ -22,20 +24,149 @@ class WordCountDao:
     """
 
     @staticmethod
-    def send_word_count(documentWordCounts: List[DocumentWordCountDto]):
+    def send_word_count(documentWordCounts: List[DocumentWordCountDto], article_ids: List[str] = None):
         """
-        Posts word counts to the database layer.
+        Posts word counts to the database layer. If an outbox is configured (OUTBOX_PATH), the word counts are
+        stored in it instead and delivered in the background.
+
+        If a fingerprint store is configured (WORD_COUNT_FINGERPRINT_PATH), articles whose word counts are unchanged
+        since they were last sent are skipped. Changed articles are sent as deltas to WORD_COUNT_DELTA_ENDPOINT if it
+        is set, otherwise they are sent in full. The word counts of the articles are recorded once they are sent, or
+        stored in the outbox, so the next upload is compared with them. They are forgotten again if the outbox
+        payload is rejected, see forget_outbox_payload. Register both kinds with the outbox in the group
+        Outbox.WORD_COUNT, so a delta is never delivered before the full word counts it was computed from.
 
         :param documentWordCounts: A list of data transfer objects containing word count result of documents
+        :param article_ids: The ids of the articles of the data transfer objects, in the same order. They identify
+            the articles in the fingerprint store
+        :return: True if successful
+        """
+        fingerprint_store = WordCountFingerprintStore.get_instance()
+        if fingerprint_store is None:
+            WordCountDao.__send_or_store(Outbox.WORD_COUNT, [DtoSerializer.encode(dto) for dto in documentWordCounts])
+            return True
+
+        keys = fingerprint_store.article_keys(documentWordCounts, article_ids)
+        # The data transfer objects are not changed by diff, so they identify their articles while being sent
+        article_keys = {id(dto): article_key for dto, article_key in zip(documentWordCounts, keys)}
+        new, changed, unchanged = fingerprint_store.diff(documentWordCounts, keys)
+        logger.warning(f"Word counts: {len(new)} new, {len(changed)} changed and {unchanged} unchanged articles")
+        if Ev.instance.get_value(Ev.instance.WORD_COUNT_DELTA_ENDPOINT) is not None:
+            kinds = [(Outbox.WORD_COUNT, [(dto, dto) for dto in new]), (Outbox.WORD_COUNT_DELTA, changed)]
+        else:
+            kinds = [(Outbox.WORD_COUNT, [(dto, dto) for dto in new] + [(dto, dto) for dto, _ in changed])]
+
+        for kind, objects in kinds:
+            keys = [article_keys[id(dto)] for dto, _ in objects]
+            WordCountDao.__send_or_store(kind, [DtoSerializer.encode(sent) for _, sent in objects], keys)
+            # A delta is recorded as the full word counts it was computed from
+            fingerprint_store.commit([dto for dto, _ in objects], keys)
+
+        return True
+
+    @staticmethod
+    def __send_or_store(kind: str, encoded_objects: List[bytes], article_keys: List[str] = None):
+        """
+        Sends encoded word counts, or stores them in the outbox if one is configured.
+
+        :param kind: Outbox.WORD_COUNT for full word counts or Outbox.WORD_COUNT_DELTA for deltas
+        :param encoded_objects: The JSON encoded data transfer objects
+        :param article_keys: The fingerprint store keys of the articles, stored with them in the outbox, so they can
+            be forgotten if the payload is rejected
+        """
+        if len(encoded_objects) == 0:
+            return
+
+        outbox = Outbox.get_instance()
+        if outbox is not None:
+            # JSON encodings never contain a raw newline, so it can separate the objects. The keys come first, as an
+            # array, which tells them apart from the objects
+            header = [json.dumps(article_keys).encode("utf-8")] if article_keys is not None else []
+            outbox.put(kind, b"\n".join(header + encoded_objects))
+            logger.warning(f"Stored {len(encoded_objects)} word counts in the outbox")
+        elif kind == Outbox.WORD_COUNT_DELTA:
+            WordCountDao.send_encoded_word_count(encoded_objects,
+                                                 Ev.instance.get_value(Ev.instance.WORD_COUNT_DELTA_ENDPOINT))
+        else:
+            WordCountDao.send_encoded_word_count(encoded_objects)
+
+    @staticmethod
+    def send_outbox_payload(payload: bytes):
+        """
+        Delivers a word count payload stored in the outbox by send_word_count.
+
+        :param payload: Newline separated JSON encoded data transfer objects, optionally preceded by the keys of their
+            articles
+        :return: True if successful
+        """
+        _, encoded_objects = WordCountDao.__split_outbox_payload(payload)
+        return WordCountDao.send_encoded_word_count(encoded_objects)
+
+    @staticmethod
+    def send_outbox_delta_payload(payload: bytes):
+        """
+        Delivers a word count delta payload stored in the outbox by send_word_count.
+
+        :param payload: Newline separated JSON encoded data transfer objects holding deltas, optionally preceded by
+            the keys of their articles
         :return: True if successful
         """
-        objects_as_dict = list(map(lambda x: dataclasses.asdict(x), documentWordCounts))
-        url = Ev.instance.get_value(Ev.instance.WORD_COUNT_DATA_ENDPOINT)
+        _, encoded_objects = WordCountDao.__split_outbox_payload(payload)
+        return WordCountDao.send_encoded_word_count(encoded_objects,
+                                                    Ev.instance.get_value(Ev.instance.WORD_COUNT_DELTA_ENDPOINT))
+
+    @staticmethod
+    def forget_outbox_payload(payload: bytes):
+        """
+        Forgets the word counts recorded for the articles of an outbox payload that was rejected, so they are sent in
+        full with the next upload. Deltas of the same articles still in the outbox were computed from the rejected
+        word counts, so they are discarded, and their articles forgotten, too.
+
+        :param payload: A payload stored in the outbox by send_word_count
+        """
+        article_keys, _ = WordCountDao.__split_outbox_payload(payload)
+        fingerprint_store = WordCountFingerprintStore.get_instance()
+        if fingerprint_store is not None and article_keys:
+            fingerprint_store.forget(article_keys)
+
+        outbox = Outbox.get_instance()
+        if outbox is not None and article_keys:
+            rejected_keys = set(article_keys)
+            outbox.discard(Outbox.WORD_COUNT_DELTA, lambda delta_payload: not rejected_keys.isdisjoint(
+                WordCountDao.__split_outbox_payload(delta_payload)[0]))
+
+    @staticmethod
+    def __split_outbox_payload(payload: bytes) -> Tuple[List[str], List[bytes]]:
+        """
+        :param payload: A payload stored in the outbox by send_word_count
+        :return: The keys of the articles, empty if the payload has none, and the JSON encoded data transfer objects
+        """
+        lines = payload.split(b"\n") if len(payload) > 0 else []
+        if lines and lines[0].startswith(b"["):
+            return json.loads(lines[0]), lines[1:]
+        return [], lines
+
+    @staticmethod
+    def send_encoded_word_count(encoded_objects: List[bytes], url: str = None):
+        """
+        Posts JSON encoded word counts to the database layer. The objects are split into chunks bounded by
+        WORD_COUNT_MAX_CHUNK_BYTES and WORD_COUNT_MAX_CHUNK_ARTICLES, which are posted in parallel over pooled
+        connections.
+
+        :param encoded_objects: The JSON encoded data transfer objects
+        :param url: The endpoint to post to, defaults to WORD_COUNT_DATA_ENDPOINT
+        :return: True if successful
+        """
+        url = url if url is not None else Ev.instance.get_value(Ev.instance.WORD_COUNT_DATA_ENDPOINT)
+        chunks = WordCountDao.chunk(encoded_objects,
+                                    Ev.instance.get_int(Ev.instance.WORD_COUNT_MAX_CHUNK_BYTES, 8 * 1024 * 1024),
+                                    Ev.instance.get_int(Ev.instance.WORD_COUNT_MAX_CHUNK_ARTICLES, 500))
+        workers = max(1, min(len(chunks), Ev.instance.get_int(Ev.instance.WORD_COUNT_UPLOAD_WORKERS, 4)))
 
         try:
-            res = requests.post(url, json=objects_as_dict)
-            res.raise_for_status()
-            logger.warning(str(res) + ": " + str(res.text))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for res in executor.map(lambda chunk: WordCountDao.send_chunk(chunk, url), chunks):
+                    logger.warning(str(res) + ": " + str(res.text))
         except ConnectionError as error:
             logger.warning("Connection error: " + str(error))
             raise error
@@ -45,4 +176,58 @@ class WordCountDao:
             raise error
 
         return True
-    
+
+    @staticmethod
+    def send_chunk(encoded_objects: List[bytes], url: str):
+        """
+        Posts a single chunk of encoded data transfer objects as a JSON array. The chunk carries an Idempotency-Key
+        derived from its content, so a chunk that is retried, or sent again when a queue file is reprocessed, can be
+        recognised by the database layer. The key is the same with or without orjson, see DtoSerializer. The body is
+        gzip compressed if WORD_COUNT_GZIP is set, which needs a database layer that decompresses request bodies.
+
+        :param encoded_objects: The JSON encoded data transfer objects of the chunk
+        :param url: The endpoint to post to
+        :return: The response of the database layer
+        """
+        # The body is joined, so it is sent with a Content-Length instead of in chunked transfer encoding, which not
+        # every server accepts. A chunk is bounded by WORD_COUNT_MAX_CHUNK_BYTES, and the body is reused on retries
+        body = b"".join(DtoSerializer.iter_json_array(encoded_objects))
+        headers = {"Content-Type": "application/json", "Idempotency-Key": http_client.idempotency_key(body)}
+
+        if Ev.instance.get_bool(Ev.instance.WORD_COUNT_GZIP):
+            headers["Content-Encoding"] = "gzip"
+            body = b"".join(http_client.iter_gzip([body]))
+
+        return http_client.post_with_retry(url, lambda: body, headers)
+
+    @staticmethod
+    def chunk(encoded_objects: List[bytes], max_bytes: int, max_articles: int) -> List[List[bytes]]:
+        """
+        Splits encoded data transfer objects into chunks. A chunk holds at most max_articles objects, and its JSON
+        array does not exceed max_bytes unless a single object is larger than that on its own.
+
+        :param encoded_objects: The JSON encoded data transfer objects
+        :param max_bytes: The maximum size of the JSON array of a chunk in bytes
+        :param max_articles: The maximum number of objects in a chunk
+        :return: A list of chunks, each being a list of encoded objects
+        """
+        chunks = []
+        current_chunk = []
+        # Size of the enclosing brackets
+        current_size = 2
+
+        for encoded_object in encoded_objects:
+            # Each object beyond the first needs a separating comma
+            object_size = len(encoded_object) + (1 if len(current_chunk) > 0 else 0)
+            if len(current_chunk) > 0 and (current_size + object_size > max_bytes or len(current_chunk) >= max_articles):
+                chunks.append(current_chunk)
+                current_chunk = []
+                current_size = 2
+                object_size = len(encoded_object)
+            current_chunk.append(encoded_object)
+            current_size += object_size
+
+        if len(current_chunk) > 0:
+            chunks.append(current_chunk)
+
+        return chunks
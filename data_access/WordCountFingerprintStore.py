@@ -0,0 +1,176 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
+from environment import EnvironmentVariables as Ev
+from model.Word import Word
+
+Ev()
+
+
+class WordCountFingerprintStore:
+    """
+    A local store of the word counts last sent for each article, used to avoid sending unchanged articles again when
+    a publication is re-uploaded.
+
+    An article is identified by its publication and its id, see model.Article.id, or its file path and title if the id
+    is not given. Articles with the same title in the same file have the same derived id, so those after the first
+    are told apart by how many came before them in the document. Its fingerprint is a hash of its word counts, which does not depend on the order of the words.
+    """
+
+    instance = None
+    __instance_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        """
+
+        :param path: Path of the SQLite file backing the store
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                article_key TEXT PRIMARY KEY,
+                content_hash BLOB NOT NULL,
+                counts TEXT NOT NULL
+            ) WITHOUT ROWID""")
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the store configured by WORD_COUNT_FINGERPRINT_PATH. The same instance is returned on every call.
+
+        :return: The store, or None if WORD_COUNT_FINGERPRINT_PATH is not set
+        """
+        path = Ev.instance.get_value(Ev.instance.WORD_COUNT_FINGERPRINT_PATH)
+        if path is None:
+            return None
+        with cls.__instance_lock:
+            if cls.instance is None:
+                cls.instance = WordCountFingerprintStore(path)
+        return cls.instance
+
+    def diff(self, documentWordCounts: List[DocumentWordCountDto], article_keys: List[str] = None) \
+            -> Tuple[List[DocumentWordCountDto], List[Tuple[DocumentWordCountDto, DocumentWordCountDto]], int]:
+        """
+        Compares word counts against the counts last sent for the same articles.
+
+        A delta has the same shape as the data transfer object it was computed from, but its words hold the change in
+        amount of each word (negative for words that occur less often or not at all anymore), and its
+        totalwordsinarticle holds the change in the total number of words.
+
+        :param documentWordCounts: A list of data transfer objects containing word count result of documents
+        :param article_keys: The keys of the articles of the data transfer objects, in the same order, see
+            article_keys. Defaults to the keys of the data transfer objects as all articles of one document
+        :return: A tuple of the articles that have not been sent before, the changed articles paired with their
+            delta, and the number of unchanged articles
+        """
+        new, changed, unchanged = [], [], 0
+
+        if article_keys is None:
+            article_keys = self.article_keys(documentWordCounts)
+        for dto, article_key in zip(documentWordCounts, article_keys):
+            with self.__lock:
+                row = self.__connection.execute("SELECT content_hash, counts FROM fingerprints WHERE article_key = ?",
+                                                (article_key,)).fetchone()
+            if row is None:
+                new.append(dto)
+            elif bytes(row[0]) == self.content_hash(dto):
+                unchanged += 1
+            else:
+                changed.append((dto, self.__delta(dto, json.loads(row[1]))))
+
+        return new, changed, unchanged
+
+    def commit(self, documentWordCounts: List[DocumentWordCountDto], article_keys: List[str] = None):
+        """
+        Records word counts as sent.
+
+        :param documentWordCounts: The data transfer objects that have been sent
+        :param article_keys: The keys of the articles of the data transfer objects, in the same order, see
+            article_keys. Defaults to the keys of the data transfer objects as all articles of one document
+        """
+        if article_keys is None:
+            article_keys = self.article_keys(documentWordCounts)
+        rows = [(article_key, self.content_hash(dto), json.dumps(self.__counts(dto)))
+                for dto, article_key in zip(documentWordCounts, article_keys)]
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            self.__connection.executemany("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?)", rows)
+            self.__connection.execute("COMMIT")
+
+    def forget(self, article_keys: List[str]):
+        """
+        Forgets the word counts sent for articles, so they are sent in full again, e.g. when the database layer
+        rejected them.
+
+        :param article_keys: The keys of the articles, see article_keys
+        """
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            self.__connection.executemany("DELETE FROM fingerprints WHERE article_key = ?",
+                                          ((article_key,) for article_key in article_keys))
+            self.__connection.execute("COMMIT")
+
+    @staticmethod
+    def article_keys(documentWordCounts: List[DocumentWordCountDto], article_ids: List[str] = None) -> List[str]:
+        """
+        :param documentWordCounts: The data transfer objects of all articles of one document, in document order
+        :param article_ids: The ids of the articles of the data transfer objects, in the same order
+        :return: The keys identifying the articles of the data transfer objects
+        """
+        keys = []
+        occurrences = {}
+        for index, dto in enumerate(documentWordCounts):
+            article = str(article_ids[index]) if article_ids is not None \
+                else "\0".join([str(dto.filepath), str(dto.articletitle)])
+            key = "\0".join([str(dto.publication), article])
+            # Only repeated ids are numbered, so adding or removing another article does not change the key
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            keys.append(key if occurrence == 0 else key + "\0" + str(occurrence))
+        return keys
+
+    @staticmethod
+    def content_hash(dto: DocumentWordCountDto) -> bytes:
+        """
+        :param dto: A data transfer object
+        :return: A hash of the word counts of the data transfer object, independent of the order of the words
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for word, amount in sorted(WordCountFingerprintStore.__counts(dto).items()):
+            digest.update(b"\0" + word.encode("utf-8") + b"\0" + str(amount).encode("utf-8"))
+        return digest.digest()
+
+    @staticmethod
+    def __counts(dto: DocumentWordCountDto) -> Dict[str, int]:
+        counts = {"": int(dto.totalwordsinarticle)}
+        counts.update((word.word, int(word.amount)) for word in dto.words)
+        return counts
+
+    @staticmethod
+    def __delta(dto: DocumentWordCountDto, previous_counts: Dict[str, int]) -> DocumentWordCountDto:
+        """
+        Computes the change in word counts since the previous counts.
+
+        :param dto: The current word counts
+        :param previous_counts: The counts last sent, as stored by commit
+        :return: A data transfer object holding the changes
+        """
+        previous_total = previous_counts.pop("", 0)
+        words = []
+        for word in dto.words:
+            change = int(word.amount) - previous_counts.pop(word.word, 0)
+            if change != 0:
+                words.append(Word(word.word, change))
+        # Words that are not in the article anymore
+        for word, amount in previous_counts.items():
+            words.append(Word(word, -amount))
+
+        return DocumentWordCountDto(dto.articletitle, dto.filepath, int(dto.totalwordsinarticle) - previous_total,
+                                    words, dto.publication)
@@ -0,0 +1,209 @@
+import csv
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
+from utils import logging
+
+
+class WordCountMatrixExporter:
+    """
+    Export target for word counts that builds a sparse term-document matrix on disk instead of posting to the
+    database layer. Each article becomes a row and each distinct word a column.
+
+    Rows are appended incrementally to raw binary part files (CSR indices, data and row pointers), so the dense
+    matrix is never held in memory. Calling write() assembles the parts into a SciPy-compatible .npz file, which can
+    be loaded with scipy.sparse.load_npz. The vocabulary and the row metadata are kept next to it as plain text.
+
+    Output files for output_path "export/backfill":
+        export/backfill.npz             - The CSR matrix (rows = articles, columns = terms)
+        export/backfill.vocabulary.txt  - One term per line, line number = column index
+        export/backfill.rows.csv        - Article id, title, publisher, file path and total words per row
+        export/backfill.parts/          - Raw part files used while accumulating, allows resuming after a restart
+    """
+
+    INDEX_DTYPE = np.int32
+    DATA_DTYPE = np.int32
+    INDPTR_DTYPE = np.int64
+
+    def __init__(self, output_path: str):
+        """
+
+        :param output_path: Path of the export without file extension
+        """
+        self.output_path = output_path
+        self.parts_path = output_path + ".parts"
+        self.vocabulary: Dict[str, int] = {}
+        self.number_of_rows = 0
+        self.number_of_entries = 0
+        self.has_pending_rows = False
+
+        directory = os.path.dirname(output_path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        os.makedirs(self.parts_path, exist_ok=True)
+
+        self.__resume()
+
+        self.__indices_file = open(self.__part("indices"), "ab")
+        self.__data_file = open(self.__part("data"), "ab")
+        self.__indptr_file = open(self.__part("indptr"), "ab")
+        self.__vocabulary_file = open(output_path + ".vocabulary.txt", "a", encoding="utf-8")
+        rows_exists = os.path.exists(output_path + ".rows.csv")
+        self.__rows_file = open(output_path + ".rows.csv", "a", encoding="utf-8", newline="")
+        self.__rows_writer = csv.writer(self.__rows_file)
+        if not rows_exists:
+            self.__rows_writer.writerow(["article_id", "title", "publisher", "filepath", "total_words"])
+
+        if self.number_of_rows == 0 and os.path.getsize(self.__part("indptr")) == 0:
+            np.zeros(1, dtype=self.INDPTR_DTYPE).tofile(self.__indptr_file)
+            self.__indptr_file.flush()
+
+    def export_word_count(self, documentWordCounts: List[DocumentWordCountDto], article_ids: List[str] = None):
+        """
+        Appends the word counts of a publication to the matrix, one row per data transfer object.
+
+        :param documentWordCounts: A list of data transfer objects containing word count result of documents
+        :param article_ids: The ids of the articles, in the same order as documentWordCounts
+        :return: True if successful
+        """
+        for index, dto in enumerate(documentWordCounts):
+            article_id = article_ids[index] if article_ids is not None else ""
+
+            columns = np.fromiter((self.__column(word.word) for word in dto.words), dtype=self.INDEX_DTYPE,
+                                  count=len(dto.words))
+            amounts = np.fromiter((int(word.amount) for word in dto.words), dtype=self.DATA_DTYPE,
+                                  count=len(dto.words))
+            order = np.argsort(columns, kind="stable")
+
+            # Everything else is written before the row pointer, so an interrupted row is discarded when resuming
+            self.__vocabulary_file.flush()
+            self.__rows_writer.writerow([article_id, dto.articletitle, dto.publication, dto.filepath,
+                                         dto.totalwordsinarticle])
+            self.__rows_file.flush()
+            columns[order].tofile(self.__indices_file)
+            amounts[order].tofile(self.__data_file)
+            self.__indices_file.flush()
+            self.__data_file.flush()
+            self.number_of_entries += len(columns)
+            np.array([self.number_of_entries], dtype=self.INDPTR_DTYPE).tofile(self.__indptr_file)
+            self.__indptr_file.flush()
+            self.number_of_rows += 1
+
+        self.has_pending_rows = self.has_pending_rows or len(documentWordCounts) > 0
+        return True
+
+    def write(self) -> str:
+        """
+        Assembles the accumulated rows into a .npz file in the scipy.sparse CSR layout. The part files are
+        memory-mapped, so the matrix is streamed to disk rather than loaded. Can be called repeatedly, each call
+        writes a snapshot of everything exported so far.
+
+        :return: The path of the written .npz file
+        """
+        matrix_path = self.output_path + ".npz"
+        temporary_path = self.output_path + ".tmp.npz"
+
+        with open(temporary_path, "wb") as f:
+            np.savez(f,
+                     indices=self.__memmap("indices", self.INDEX_DTYPE, self.number_of_entries),
+                     indptr=self.__memmap("indptr", self.INDPTR_DTYPE, self.number_of_rows + 1),
+                     format=np.array("csr"),
+                     shape=np.array((self.number_of_rows, len(self.vocabulary))),
+                     data=self.__memmap("data", self.DATA_DTYPE, self.number_of_entries))
+        os.replace(temporary_path, matrix_path)
+
+        self.has_pending_rows = False
+        logging.LogF.log(f"Exported word count matrix with {self.number_of_rows} rows and "
+                         f"{len(self.vocabulary)} terms to {matrix_path}")
+        return matrix_path
+
+    def close(self):
+        """
+        Closes the underlying part files.
+        """
+        for f in [self.__indices_file, self.__data_file, self.__indptr_file, self.__vocabulary_file,
+                  self.__rows_file]:
+            f.close()
+
+    def __column(self, word: str) -> int:
+        """
+        Looks up the column of a word, adding it to the vocabulary if it has not been seen before.
+
+        :param word: The word to look up
+        :return: The column index of the word
+        """
+        column = self.vocabulary.get(word)
+        if column is None:
+            column = len(self.vocabulary)
+            self.vocabulary[word] = column
+            self.__vocabulary_file.write(word + "\n")
+        return column
+
+    def __resume(self):
+        """
+        Restores the vocabulary and counters from an earlier, unfinished export, and truncates part files to the
+        last completely written row.
+        """
+        vocabulary_path = self.output_path + ".vocabulary.txt"
+        if os.path.exists(vocabulary_path):
+            with open(vocabulary_path, encoding="utf-8") as f:
+                for line in f:
+                    self.vocabulary[line.rstrip("\n")] = len(self.vocabulary)
+
+        indptr_path = self.__part("indptr")
+        if not os.path.exists(indptr_path) or os.path.getsize(indptr_path) == 0:
+            return
+
+        indptr_itemsize = np.dtype(self.INDPTR_DTYPE).itemsize
+        complete_rows = os.path.getsize(indptr_path) // indptr_itemsize
+        indptr = np.memmap(indptr_path, dtype=self.INDPTR_DTYPE, mode="r", shape=(complete_rows,))
+        self.number_of_rows = complete_rows - 1
+        self.number_of_entries = int(indptr[-1])
+        del indptr
+
+        os.truncate(indptr_path, complete_rows * indptr_itemsize)
+        os.truncate(self.__part("indices"), self.number_of_entries * np.dtype(self.INDEX_DTYPE).itemsize)
+        os.truncate(self.__part("data"), self.number_of_entries * np.dtype(self.DATA_DTYPE).itemsize)
+        self.__truncate_rows()
+
+    def __truncate_rows(self):
+        """
+        Drops row metadata written for a row whose matrix data was never completed.
+        """
+        rows_path = self.output_path + ".rows.csv"
+        if not os.path.exists(rows_path):
+            return
+
+        with open(rows_path, encoding="utf-8", newline="") as f:
+            number_of_lines = sum(1 for _ in csv.reader(f))
+        if number_of_lines <= self.number_of_rows + 1:
+            return
+
+        temporary_path = rows_path + ".tmp"
+        with open(rows_path, encoding="utf-8", newline="") as source, \
+                open(temporary_path, "w", encoding="utf-8", newline="") as target:
+            writer = csv.writer(target)
+            for line_number, row in enumerate(csv.reader(source)):
+                if line_number > self.number_of_rows:
+                    break
+                writer.writerow(row)
+        os.replace(temporary_path, rows_path)
+
+    def __memmap(self, name: str, dtype, length: int):
+        """
+        Memory-maps a part file.
+
+        :param name: Name of the part
+        :param dtype: NumPy type of the stored values
+        :param length: The number of values to map
+        :return: The mapped array, or an empty array if length is 0 (mmap does not support empty files)
+        """
+        if length == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.__part(name), dtype=dtype, mode="r", shape=(length,))
+
+    def __part(self, name: str) -> str:
+        return os.path.join(self.parts_path, name + ".bin")
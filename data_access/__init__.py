@@ -1 +1,7 @@
+from .DtoSerializer import DtoSerializer
 from .WordCountDao import WordCountDao
+from .WordCountMatrixExporter import WordCountMatrixExporter
+from .Outbox import Outbox
+from .WordCountFingerprintStore import WordCountFingerprintStore
+from .EmittedTripleStore import EmittedTripleStore
+from .LocalTripleStore import LocalTripleStore
@@ -1,11 +1,17 @@
-# from rdf import NJTripleExtractor, GFTripleExtractor
+import threading
+
+from rdf.extractor import NJTripleExtractor, GFTripleExtractor, TripleExtractor
 from utils import logging
-from model.Document import Document, Article
+from model.Document import Document, Article, Byline
 from pre_processing import *
 from environment import EnvironmentVariables as Ev
 
 Ev()
 
+# The data sources of documents
+GF = "GF"
+NJ = "NJ"
+
 
 class DocumentClassifier:
     """
@@ -19,21 +25,72 @@ class DocumentClassifier:
     def __init__(self):
         self.nj_preprocessor = NJPreProcessor()
         self.gf_preprocessor = GFPreProcessor()
-        # self.nj_triple_extractor = NJTripleExtractor(Ev.instance.get_value(Ev.instance.NJ_SPACY_MODEL))
-        # self.gf_triple_extractor = GFTripleExtractor(Ev.instance.get_value(Ev.instance.GF_SPACY_MODEL))
+        # The triple extractors are created the first time a document from their source is extracted. They are the
+        # pipeline's own, so the API is never kept waiting while a document is extracted and uploaded
+        self.__triple_extractors = {}
+        self.__triple_extractors_lock = threading.Lock()
 
     def classify(self, document_dict):
         """
         Constructs the intermediary Document object, then classifies the JSON data according to its data source and
-        calls the appropriate word count pre-processor and triple extractor.
+        calls the appropriate word count pre-processor.
 
         :param document_dict: Dictionary containing document information
         :return: Document object containing document title, processed body, publisher, and path
         """
+        document = self.construct_document(document_dict)
 
-        # Construct Document object from document_dict
+        if self.__source(document_dict) == GF:
+            logging.LogF.log(f"0% : GFPreProcessing of {document.publisher}")
+            processed_document = self.gf_preprocessor.process(document)
+        else:
+            logging.LogF.log(f"0% : NJPreProcessing of {document.publisher}")
+            processed_document = self.nj_preprocessor.process(document)
+
+        return processed_document
+
+    def extract_triples(self, document_dict) -> None:
+        """
+        Constructs a Document object of its own, so it is not affected by the pre-processing done by classify, and
+        streams the triples extracted from it by the triple extractor of its data source to the database layer.
+        It can run concurrently with classify.
+
+        :param document_dict: Dictionary containing document information
+        """
+        extractor = self.triple_extractor(document_dict)
+        document = self.construct_document(document_dict)
+        logging.LogF.log(f"0% : Triple extraction of {document.publisher}")
+        extractor.stream_publication(document)
+        logging.LogF.log(f"100% : Triple extraction of {document.publisher}")
+
+    def triple_extractor(self, document_dict) -> TripleExtractor:
+        """
+        :param document_dict: Dictionary containing document information
+        :return: The triple extractor for the data source of the document
+        """
+        source = self.__source(document_dict)
+        with self.__triple_extractors_lock:
+            if source not in self.__triple_extractors:
+                if source == GF:
+                    extractor = GFTripleExtractor(Ev.instance.get_value(Ev.instance.GF_SPACY_MODEL))
+                else:
+                    extractor = NJTripleExtractor(Ev.instance.get_value(Ev.instance.NJ_SPACY_MODEL))
+                self.__triple_extractors[source] = extractor
+            return self.__triple_extractors[source]
+
+    def construct_document(self, document_dict) -> Document:
+        """
+        Constructs the intermediary Document object from the JSON data.
+
+        :param document_dict: Dictionary containing document information
+        :return: Document object containing the articles of the document, before any pre-processing
+        """
         publisher = document_dict["content"]["publisher"]
-        document = Document(publisher)
+        document = Document(publisher, document_dict["content"].get("publication"))
+        published_at = document_dict["content"].get("published_at")
+        if published_at:
+            # Only the date part of the ISO 8601 timestamp
+            document.date = published_at[:10]
         total_number_of_articles = len(document_dict["content"]["articles"])
         total_number_of_processed_articles = 0
 
@@ -43,25 +100,29 @@ class DocumentClassifier:
                 f"{int((total_number_of_processed_articles * 100) / total_number_of_articles)}% : Document Construction of {publisher} - {title}")
             # TODO: Why is extracted_from a list? Figure this out
             path = article["extracted_from"][0]
-            body = ""
+            # The body is joined from the paragraphs when it is first used
+            paragraphs = [paragraph["value"] for paragraph in article["paragraphs"]]
 
-            for paragraph in article["paragraphs"]:
-                body += ' ' + paragraph["value"]
+            byline = None
+            if article.get("byline") is not None:
+                byline = Byline(article["byline"]["name"], article["byline"].get("email"))
 
-            article = Article(title, body, path)
+            article = Article(title, path=path, byline=byline, paragraphs=paragraphs)
             document.articles.append(article)
             total_number_of_processed_articles += 1
 
         logging.LogF.log(f"100% : Document Construction of {publisher}")
+        return document
+
+    @staticmethod
+    def __source(document_dict) -> str:
+        """
+        :param document_dict: Dictionary containing document information
+        :return: The data source of the document, GF or NJ
+        """
         if document_dict["generator"]["app"] == "GrundfosManuals_Handler":
-            logging.LogF.log(f"0% : GFPreProcessing of {document.publisher}")
-            # self.gf_triple_extractor.process_publication(document)
-            processed_document = self.gf_preprocessor.process(document)
+            return GF
         elif document_dict["type"] == "Publication":
-            logging.LogF.log(f"0% : NJPreProcessing of {document.publisher}")
-            # self.nj_triple_extractor.process_publication(document)
-            processed_document = self.nj_preprocessor.process(document)
+            return NJ
         else:
             raise Exception("Unable to classify document")
-
-        return processed_document
@@ -20,6 +20,44 @@ class EnvironmentVariables:
             self.ONTOLOGY_NAMESPACE = "ONTOLOGY_NAMESPACE"
             self.TRIPLE_DATA_ENDPOINT = "TRIPLE_DATA_ENDPOINT"
             self.GF_PATTERN_PATH = "GF_PATTERN_PATH"
+            self.GF_REWRITE_RULES_PATH = "GF_REWRITE_RULES_PATH"
+            self.GF_GAZETTEER_PATH = "GF_GAZETTEER_PATH"
+            self.WORD_COUNT_EXPORT_PATH = "WORD_COUNT_EXPORT_PATH"
+            self.WORD_COUNT_MAX_CHUNK_BYTES = "WORD_COUNT_MAX_CHUNK_BYTES"
+            self.WORD_COUNT_MAX_CHUNK_ARTICLES = "WORD_COUNT_MAX_CHUNK_ARTICLES"
+            self.WORD_COUNT_UPLOAD_WORKERS = "WORD_COUNT_UPLOAD_WORKERS"
+            self.WORD_COUNT_GZIP = "WORD_COUNT_GZIP"
+            self.HTTP_TIMEOUT = "HTTP_TIMEOUT"
+            self.HTTP_RETRIES = "HTTP_RETRIES"
+            self.HTTP_RETRY_BACKOFF = "HTTP_RETRY_BACKOFF"
+            self.OUTBOX_PATH = "OUTBOX_PATH"
+            self.OUTBOX_POLL_INTERVAL = "OUTBOX_POLL_INTERVAL"
+            self.OUTBOX_MAX_BACKOFF = "OUTBOX_MAX_BACKOFF"
+            self.WORD_COUNT_FINGERPRINT_PATH = "WORD_COUNT_FINGERPRINT_PATH"
+            self.WORD_COUNT_DELTA_ENDPOINT = "WORD_COUNT_DELTA_ENDPOINT"
+            self.URI_CACHE_SIZE = "URI_CACHE_SIZE"
+            self.TRIPLE_EXTRACTION = "TRIPLE_EXTRACTION"
+            self.TRIPLE_MAX_ATTEMPTS = "TRIPLE_MAX_ATTEMPTS"
+            self.GF_NLP_BATCH_SIZE = "GF_NLP_BATCH_SIZE"
+            self.GF_NLP_N_PROCESS = "GF_NLP_N_PROCESS"
+            self.NJ_NLP_BATCH_SIZE = "NJ_NLP_BATCH_SIZE"
+            self.NJ_NLP_N_PROCESS = "NJ_NLP_N_PROCESS"
+            self.NLP_MAX_CHUNK_CHARS = "NLP_MAX_CHUNK_CHARS"
+            self.DOC_CACHE_PATH = "DOC_CACHE_PATH"
+            self.DOC_CACHE_MAX_BYTES = "DOC_CACHE_MAX_BYTES"
+            self.LEGACY_ARTICLE_IDS = "LEGACY_ARTICLE_IDS"
+            self.UPLOAD_SEEN_PATH = "UPLOAD_SEEN_PATH"
+            self.UPLOAD_SEEN_RETENTION_HOURS = "UPLOAD_SEEN_RETENTION_HOURS"
+            self.UPLOAD_SEEN_MAX_ENTRIES = "UPLOAD_SEEN_MAX_ENTRIES"
+            self.EMITTED_TRIPLES_PATH = "EMITTED_TRIPLES_PATH"
+            self.TRIPLE_FULL_RESYNC = "TRIPLE_FULL_RESYNC"
+            self.TRIPLE_MAX_CHUNK_BYTES = "TRIPLE_MAX_CHUNK_BYTES"
+            self.TRIPLE_GZIP = "TRIPLE_GZIP"
+            self.TRIPLE_TURTLE_PREFIXES = "TRIPLE_TURTLE_PREFIXES"
+            self.LOCAL_TRIPLE_STORE_PATH = "LOCAL_TRIPLE_STORE_PATH"
+            self.ENTITY_CANONICAL_PATH = "ENTITY_CANONICAL_PATH"
+            self.ENTITY_SIMILARITY_THRESHOLD = "ENTITY_SIMILARITY_THRESHOLD"
+            self.VECTORS_MMAP_DIR = "VECTORS_MMAP_DIR"
             load_dotenv()
 
         def get_value(self, key: str, default = None):
@@ -31,6 +69,39 @@ class EnvironmentVariables:
             :return: The value for the given key as a string
             """
             return os.environ.get(key) if os.environ.get(key) is not None else default
+
+        def get_int(self, key: str, default: int = None):
+            """
+            Reads the value for the given key and converts it to an integer.
+
+            :param key: The key to look up in the .env file
+            :param default: The default value to put if no value is found for the key
+            :return: The value for the given key as an integer
+            """
+            value = self.get_value(key)
+            return int(value) if value is not None else default
+
+        def get_float(self, key: str, default: float = None):
+            """
+            Reads the value for the given key and converts it to a float.
+
+            :param key: The key to look up in the .env file
+            :param default: The default value to put if no value is found for the key
+            :return: The value for the given key as a float
+            """
+            value = self.get_value(key)
+            return float(value) if value is not None else default
+
+        def get_bool(self, key: str, default: bool = False):
+            """
+            Reads the value for the given key and converts it to a boolean. "true", "1" and "yes" are considered true.
+
+            :param key: The key to look up in the .env file
+            :param default: The default value to put if no value is found for the key
+            :return: The value for the given key as a boolean
+            """
+            value = self.get_value(key)
+            return value.strip().lower() in ["true", "1", "yes"] if value is not None else default
     
     instance: __EnvironmentVariables = None
 
@@ -1 +1 @@
-from .exceptions import PostFailedException, UnparsableException
\ No newline at end of file
+from .exceptions import PostFailedException, UnparsableException, RequeueException
\ No newline at end of file
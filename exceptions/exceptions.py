@@ -19,3 +19,15 @@ class UnparsableException(Exception):
 
     def __init__(self, message: str):
         self.message: str = message
+
+
+class RequeueException(Exception):
+    """
+    A RequeueException: The document was only partly processed. It is kept in the queue as the given content, to be
+    processed again in a later round
+    """
+
+    def __init__(self, message: str, content):
+        super().__init__(message)
+        self.message: str = message
+        self.content = content
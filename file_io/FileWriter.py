@@ -6,6 +6,7 @@ import time
 from os.path import exists
 import json
 from environment.EnvironmentConstants import EnvironmentVariables as Ev
+from file_io.UploadSeenSet import UploadSeenSet
 
 Ev()
 
@@ -13,16 +14,48 @@ class FileWriter:
     """
 
     """
-    async def add_to_queue(self, request: Request) -> None:
+    def __init__(self):
+        # Counters of the uploads handled, exposed by the API
+        self.queued = 0
+        self.duplicates = 0
+
+    async def add_to_queue(self, request: Request) -> bool:
         """
-        Adds the request to a file queue
+        Adds the request to a file queue. If UPLOAD_SEEN_PATH is set, exact duplicates of earlier uploads are not
+        queued again.
         :param request: The post request sent the endpoint
-        :return: None
+        :return: True if the request was queued, False if it is a duplicate
         """
         queue_path: str = Ev.instance.get_value(Ev.instance.QUEUE_PATH)
+        content = await request.json()
+
+        seen_set = UploadSeenSet.get_instance()
+        content_hash = None
+        if seen_set is not None:
+            content_hash = UploadSeenSet.content_hash(content)
+            if not seen_set.add(content_hash):
+                self.duplicates += 1
+                return False
 
         unix_time: int = int(time.time())
         file_name: str = str(uuid.uuid4()) + str(unix_time)+".json"
 
-        with open(queue_path + file_name, "w", encoding="utf-8") as f:
-            f.write(json.dumps(await request.json()))
\ No newline at end of file
+        try:
+            with open(queue_path + file_name, "w", encoding="utf-8") as f:
+                f.write(json.dumps(content))
+        except Exception:
+            # Not queued, so a retry of the upload must not count as a duplicate
+            if content_hash is not None:
+                seen_set.remove(content_hash)
+            raise
+        self.queued += 1
+        return True
+
+    def counters(self) -> dict:
+        """
+        :return: The number of uploads queued and rejected as duplicates since startup, and the number of content
+            hashes kept, or None if duplicates are not detected
+        """
+        seen_set = UploadSeenSet.get_instance()
+        return {"queued": self.queued, "duplicates": self.duplicates,
+                "seen": len(seen_set) if seen_set is not None else None}
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from environment.EnvironmentConstants import EnvironmentVariables as Ev
+
+Ev()
+
+
+class UploadSeenSet:
+    """
+    A persistent set of the content hashes of uploaded documents, used to recognise exact duplicates of earlier
+    uploads before they are queued.
+
+    The hash is taken over a canonical form of the JSON, so differences in key order and whitespace do not matter.
+    Hashes are retained for a limited time, and at most a limited number of them are kept, the most recent. The hash of
+    a document the scheduler removes from the queue unprocessed is removed, so the document can be uploaded again.
+    """
+
+    instance = None
+    __instance_lock = threading.Lock()
+
+    # How many additions there are between checks of the number of kept hashes
+    PRUNE_INTERVAL = 1000
+
+    def __init__(self, path: str, retention_seconds: float, max_entries: int):
+        """
+
+        :param path: Path of the SQLite file backing the set
+        :param retention_seconds: How long a hash is kept after the document was last uploaded
+        :param max_entries: The maximum number of hashes kept
+        """
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.max_entries = max_entries
+        self.__lock = threading.Lock()
+        self.__additions = 0
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                content_hash BLOB PRIMARY KEY,
+                last_seen REAL NOT NULL,
+                duplicates INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID""")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS seen_last_seen ON seen (last_seen)")
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the set configured by UPLOAD_SEEN_PATH, UPLOAD_SEEN_RETENTION_HOURS and UPLOAD_SEEN_MAX_ENTRIES. The same
+        instance is returned on every call.
+
+        :return: The set, or None if UPLOAD_SEEN_PATH is not set
+        """
+        path = Ev.instance.get_value(Ev.instance.UPLOAD_SEEN_PATH)
+        if path is None:
+            return None
+        with cls.__instance_lock:
+            if cls.instance is None:
+                retention_hours = Ev.instance.get_float(Ev.instance.UPLOAD_SEEN_RETENTION_HOURS, 24 * 7)
+                cls.instance = UploadSeenSet(path, retention_hours * 3600,
+                                             Ev.instance.get_int(Ev.instance.UPLOAD_SEEN_MAX_ENTRIES, 100000))
+        return cls.instance
+
+    @staticmethod
+    def content_hash(content) -> bytes:
+        """
+        :param content: The parsed JSON of a document
+        :return: A hash of the canonical form of the JSON
+        """
+        canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+    def add(self, content_hash: bytes) -> bool:
+        """
+        Adds a hash to the set, unless it is already there.
+
+        :param content_hash: The hash of a document, see content_hash
+        :return: True if the hash was added, False if the document is a duplicate of an upload within the retention
+        """
+        now = time.time()
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            try:
+                self.__connection.execute("DELETE FROM seen WHERE last_seen < ?", (now - self.retention_seconds,))
+                added = self.__connection.execute("INSERT OR IGNORE INTO seen (content_hash, last_seen) VALUES (?, ?)",
+                                                  (content_hash, now)).rowcount == 1
+                if not added:
+                    # The retention of a duplicate starts over, so a producer resending a document keeps it coalesced
+                    self.__connection.execute("UPDATE seen SET last_seen = ?, duplicates = duplicates + 1 "
+                                              "WHERE content_hash = ?", (now, content_hash))
+                self.__connection.execute("COMMIT")
+            except Exception:
+                self.__connection.execute("ROLLBACK")
+                raise
+
+            if added:
+                self.__additions += 1
+                if self.__additions % self.PRUNE_INTERVAL == 0:
+                    self.__prune()
+        return added
+
+    def remove(self, content_hash: bytes):
+        """
+        Removes a hash from the set, e.g. when the document it was added for could not be queued after all.
+
+        :param content_hash: The hash of a document, see content_hash
+        """
+        with self.__lock:
+            self.__connection.execute("DELETE FROM seen WHERE content_hash = ?", (content_hash,))
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def __prune(self):
+        """
+        Deletes the least recently seen hashes beyond max_entries. The lock must be held.
+        """
+        self.__connection.execute("DELETE FROM seen WHERE content_hash IN "
+                                  "(SELECT content_hash FROM seen ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                                  (self.max_entries,))
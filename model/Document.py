@@ -1,46 +1,89 @@
+import hashlib
 from typing import List
-from dataclasses import dataclass
+
+from environment import EnvironmentVariables as Ev
+
+Ev()
 
 
-@dataclass
 class Byline:
     """
 
     """
+    __slots__ = ("name", "email")
 
     def __init__(self, name: str, email = None):
         self.name = name
         self.email = email
 
 
-@dataclass
 class Article:
     """
     Subpart of the Document object, encapsulating a single article.
+
+    An article can be made from its paragraphs instead of its body. The body is then joined from the paragraphs the
+    first time it is used, and the paragraphs are kept, so they can also be processed one at a time.
     """
+    __slots__ = ("title", "path", "byline", "_id", "_body", "_paragraphs")
 
-    def __init__(self, title: str, body: str, path: str, byline: Byline = None, article_id: str = None):
+    def __init__(self, title: str, body: str = None, path: str = None, byline: Byline = None, article_id: str = None,
+                 paragraphs: List[str] = None):
         """
 
         :param title: Title of the article (headline)
-        :param body: All paragraphs of the article concatenated
+        :param body: All paragraphs of the article concatenated. Can be left out if paragraphs are given
         :param path: The filepath to the original file
         :param byline: The author of the article (Nordjyske)
         :param article_id: An ID assigned to the article
+        :param paragraphs: The paragraphs of the article, used if no body is given
         """
         self.title = title
-        self.body = body
         self.path = path
         self.byline = byline
         self._id = article_id
+        self._body = body
+        self._paragraphs = paragraphs
+
+    @property
+    def body(self) -> str:
+        """
+        All paragraphs of the article, each preceded by a space.
+        """
+        if self._body is None:
+            self._body = " " + " ".join(self._paragraphs) if self._paragraphs else ""
+        return self._body
+
+    @body.setter
+    def body(self, value: str):
+        # The paragraphs no longer match the body
+        self._body = value
+        self._paragraphs = None
+
+    @property
+    def paragraphs(self) -> List[str]:
+        """
+        The paragraphs of the article. If the body has been set, it is the only paragraph.
+        """
+        if self._paragraphs is None:
+            return [self.body] if self._body else []
+        return self._paragraphs
 
+    @paragraphs.setter
+    def paragraphs(self, value: List[str]):
+        # The body is joined from the new paragraphs when it is used next
+        self._paragraphs = value
+        self._body = None
 
     @property
     def id(self):
-        if self._id is not None:
-            return self._id
-        else:
-            return str(hash(self.title + self.path))
+        """
+        The id assigned to the article, or else an id derived from its title and path. The derived id is a BLAKE2b
+        hash, so the same article has the same id in every process and after restarts. It is computed once.
+        With LEGACY_ARTICLE_IDS set, the derived id is the built-in string hash, which varies between processes.
+        """
+        if self._id is None:
+            self._id = self.derive_id(self.title, self.path)
+        return self._id
 
     @id.setter
     def id(self, value):
@@ -50,12 +93,25 @@ class Article:
     def id(self):
         self._id = None
 
+    @staticmethod
+    def derive_id(title: str, path: str) -> str:
+        """
+        :param title: Title of the article
+        :param path: The filepath to the original file
+        :return: The id derived from the title and path
+        """
+        if Ev.instance.get_bool(Ev.instance.LEGACY_ARTICLE_IDS):
+            return str(hash(title + path))
+        # The separator keeps e.g. ("ab", "c") and ("a", "bc") apart
+        canonical = (title + "\x1f" + path).encode("utf-8")
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
 
-@dataclass
 class Document:
     """
     Intermediary format for documents received from the Preprocessing Layer.
     """
+    __slots__ = ("publisher", "publication", "articles", "date")
 
     def __init__(self, publisher: str, publication: str = None, articles=None, date: str = None):
         """
@@ -2,7 +2,7 @@ from typing import List, Tuple
 
 from environment.EnvironmentConstants import EnvironmentVariables as Ev
 from model.Document import Document, Article
-from utils import load_model
+from utils import load_model, profile_disable
 
 Ev()
 import spacy
@@ -18,7 +18,8 @@ class NJPreProcessor(PreProcessor):
     """
 
     def __init__(self):
-        self.nlp = spacy.load('da_core_news_lg', disable=["lemmatizer"])
+        # Shared with the other pre-processors, which run on the same thread. Only the POS components are run
+        self.nlp = load_model('da_core_news_lg')
         self.io_handler = IOHandler(Generator(), "")
 
     def process(self, document: Document) -> Document:
@@ -81,7 +82,8 @@ class NJPreProcessor(PreProcessor):
         return article
 
     def lower_noun(self, word):
-        token = self.nlp(word)
+        # Not through the Doc cache, which is for whole texts. A cache entry per word would evict them
+        token = self.nlp(word, disable=profile_disable(self.nlp, "pos-only"))
         if len(token) > 0 and token[0].pos_ == 'NOUN':
             return word.lower()
         else:
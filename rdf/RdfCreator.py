@@ -1,50 +1,174 @@
+import functools
+import io
 import urllib.parse
 
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple
 
 import requests
-from rdflib import Graph, Literal, BNode
-from rdflib.namespace import NamespaceManager, RDFS, OWL, XSD, RDF
-from environment.EnvironmentConstants import EnvironmentVariables as ev
-from requests.exceptions import ConnectionError
+from rdflib import Literal, BNode
+from rdflib.namespace import RDFS, OWL, XSD, RDF
 from rdflib.namespace import ClosedNamespace
 from rdflib import URIRef
 from environment.EnvironmentConstants import EnvironmentVariables as Ev
-from utils import logging
+from data_access.Outbox import Outbox
+from data_access.EmittedTripleStore import EmittedTripleStore
+from data_access.LocalTripleStore import LocalTripleStore
+from rdf.RdfConstants import RelationTypeConstants
+from rdf.TripleWriter import TripleWriter
+from utils import logging, http_client
 
 Ev()
 
 
-def store_rdf_triples(rdf_triples: List[Tuple], graph_name: str):
+def store_rdf_triples(rdf_triples: Iterable[Tuple], graph_name: str):
     """
     Input:
-        rdfTriples: list of RDF triples with correct type - List containing triples on the form (Subject, RelationPredicate, Object).
+        rdfTriples: iterable of RDF triples with correct type - Triples on the form (Subject, RelationPredicate, Object).
         output_file_name: str - The Name of the outputted file
     
-    Takes in a list of RDF triples and parse them into a ready RDF format.
-    The format and output folder of the files are dependent of the configation of the .env file
+    Takes in RDF triples and serializes them as Turtle, which is sent to the database layer.
+    The triples are streamed into chunks of at most TRIPLE_MAX_CHUNK_BYTES, each a complete Turtle document, which are
+    sent one at a time, so a large graph does not become one monolithic request.
+    If EMITTED_TRIPLES_PATH is set, triples already sent for the graph are left out, unless TRIPLE_FULL_RESYNC is set.
+    Triples are recorded as sent once their chunk has been delivered, by the outbox if one is configured.
+    If LOCAL_TRIPLE_STORE_PATH is set, all triples are also stored locally.
     
     """
+    local_store = LocalTripleStore.get_instance()
+    if local_store is not None:
+        rdf_triples = local_store.tee(rdf_triples, graph_name)
+
+    emitted_store = EmittedTripleStore.get_instance()
+    pending = []
+    if emitted_store is not None:
+        rdf_triples = emitted_store.filter_new(graph_name, rdf_triples, pending,
+                                               resync=Ev.instance.get_bool(Ev.instance.TRIPLE_FULL_RESYNC))
+
+    # If an outbox is configured the triples are delivered in the background
+    outbox = Outbox.get_instance()
+    max_bytes = Ev.instance.get_int(Ev.instance.TRIPLE_MAX_CHUNK_BYTES, 4 * 1024 * 1024)
+    chunk_count, triple_count = 0, 0
+    for serialized_graph, count in serialize_chunks(rdf_triples, max_bytes):
+        # The filter hands out the triples in order, so the first hashes pending are those of the triples in this chunk
+        triple_hashes = pending[triple_count:triple_count + count]
+        if outbox is not None:
+            # The hashes travel with the chunk, and are only recorded once the outbox has delivered it
+            outbox.put(Outbox.TRIPLES, encode_outbox_triples(serialized_graph, graph_name, triple_hashes))
+        else:
+            send_turtle(serialized_graph, graph_name)
+            if emitted_store is not None:
+                emitted_store.commit(graph_name, triple_hashes)
+        chunk_count += 1
+        triple_count += count
+
+    if outbox is not None:
+        logging.LogF.log(f'Stored {triple_count} triples for graph {graph_name} in the outbox in {chunk_count} chunks')
+    else:
+        logging.LogF.log(f'Sent {triple_count} triples for graph {graph_name} in {chunk_count} chunks')
+
+
+def serialize_chunks(rdf_triples: Iterable[Tuple], max_bytes: int) -> Iterator[Tuple[bytes, int]]:
+    """
+    Serializes triples as Turtle, split into chunks, see turtle_writer. If prefixes are used, each chunk declares the
+    prefixes it uses, so it can be parsed on its own. A chunk is ended by the first triple taking it to max_bytes or
+    beyond.
+
+    :param rdf_triples: Triples on the form (Subject, RelationPredicate, Object)
+    :param max_bytes: The size in bytes a chunk is ended at
+    :return: An iterator over the chunks, paired with the number of triples in them. Nothing if there are no triples
+    """
+    buffer = io.BytesIO()
+    writer = turtle_writer(buffer)
+    for triple in rdf_triples:
+        writer.write(triple)
+        if buffer.tell() >= max_bytes:
+            writer.close()
+            yield buffer.getvalue(), writer.triple_count
+            buffer = io.BytesIO()
+            writer = turtle_writer(buffer)
+    if writer.triple_count > 0:
+        writer.close()
+        yield buffer.getvalue(), writer.triple_count
+
+
+def turtle_writer(buffer: io.BytesIO) -> TripleWriter:
+    """
+    Returns a Turtle writer for the triples sent to the database layer and shown by the API. IRIs are written in full,
+    as the database layer expects, unless TRIPLE_TURTLE_PREFIXES is set, in which case they are shortened to prefixed
+    names declared where they are first used.
+
+    :param buffer: The buffer the triples are written to
+    :return: The writer
+    """
+    return TripleWriter(buffer, "turtle", compact=Ev.instance.get_bool(Ev.instance.TRIPLE_TURTLE_PREFIXES))
+
+
+def encode_outbox_triples(serialized_graph: bytes, graph_name: str, triple_hashes: List[bytes]) -> bytes:
+    """
+    Encodes a chunk of triples as an outbox payload for send_outbox_triples.
+
+    :param serialized_graph: The triples serialized as Turtle
+    :param graph_name: The name of the graph the triples belong to
+    :param triple_hashes: The hashes of the triples to record as sent once delivered, see EmittedTripleStore
+    :return: The graph name, the number of hashes and the hashes, followed by the Turtle
+    """
+    return ((graph_name or "").encode("utf-8") + b"\n" + str(len(triple_hashes)).encode("ascii") + b"\n"
+            + b"".join(triple_hashes) + serialized_graph)
+
+
+def send_outbox_triples(payload: bytes):
+    """
+    Delivers a triple payload stored in the outbox by store_rdf_triples, and records its triples as sent.
+
+    :param payload: The graph name, the number of triple hashes, the hashes and the serialized Turtle, see
+        encode_outbox_triples. Payloads of only the graph name and the Turtle are delivered as well
+    """
+    graph_name, rest = payload.split(b"\n", 1)
+    graph_name = graph_name.decode("utf-8") or None
+    count, separator, serialized_graph = rest.partition(b"\n")
+    triple_hashes = []
+    if separator and count.isdigit():
+        hash_size = EmittedTripleStore.HASH_SIZE
+        hashes_length = int(count) * hash_size
+        triple_hashes = [serialized_graph[start:start + hash_size] for start in range(0, hashes_length, hash_size)]
+        serialized_graph = serialized_graph[hashes_length:]
+    else:
+        # Stored before the hashes were part of the payload. Turtle does not start with a number
+        serialized_graph = rest
+    send_turtle(serialized_graph, graph_name)
+
+    emitted_store = EmittedTripleStore.get_instance()
+    if emitted_store is not None and triple_hashes:
+        emitted_store.commit(graph_name, triple_hashes)
+
 
-    # Get the "graph" in order to contain the rdfTriples
-    # Switch the bad namespacemanager with the good one which do not create prefix'es
-    graph: Graph = Graph()
-    name_space_manager = KnoxNameSpaceManager(graph)
-    graph.namespace_manager = name_space_manager
-
-    for sub, rel, obj in rdf_triples:
-        graph.add((sub, rel, obj))
-        logging.LogF.log(f'sub: {urllib.parse.unquote(sub)}, rel: {urllib.parse.unquote(rel)}, obj: {urllib.parse.unquote(obj)}')
-
-    serialized_graph = graph.serialize(format='turtle', encoding="utf-8")
-    # with open(path, 'wb') as f:
-    #     f.write(serialized_graph)
-    payload = dict(graph=graph_name, turtle=serialized_graph)
-    success = requests.post(ev.instance.get_value(ev.instance.TRIPLE_DATA_ENDPOINT),
-                            data=payload, headers={}, files=[])
-    if not success:
-        logging.LogF.log(f'ERROR: Unable to send file to database')
-        raise ConnectionError('Unable to post to the database')
+def send_turtle(serialized_graph: bytes, graph_name: str):
+    """
+    Posts serialized Turtle to the database layer as the form fields graph and turtle. The request is retried on
+    connection errors and retryable status codes. It is only gzip compressed if TRIPLE_GZIP is set, as form parsers
+    rarely decompress request bodies, so the endpoint must be known to do so.
+
+    :param serialized_graph: The triples serialized as Turtle
+    :param graph_name: The name of the graph the triples belong to
+    :raises requests.exceptions.RequestException: If the database layer could not be reached or answered with an error
+    """
+    fields = [("graph", graph_name)] if graph_name is not None else []
+    fields.append(("turtle", serialized_graph))
+    body = urllib.parse.urlencode(fields).encode("ascii")
+    headers = {"Content-Type": "application/x-www-form-urlencoded",
+               "Idempotency-Key": http_client.idempotency_key(body)}
+    if Ev.instance.get_bool(Ev.instance.TRIPLE_GZIP):
+        headers["Content-Encoding"] = "gzip"
+        compressed = b"".join(http_client.iter_gzip([body]))
+        request_body = lambda: compressed
+    else:
+        request_body = lambda: body
+
+    try:
+        http_client.post_with_retry(Ev.instance.get_value(Ev.instance.TRIPLE_DATA_ENDPOINT), request_body, headers)
+    except requests.exceptions.RequestException as error:
+        logging.LogF.log(f'ERROR: Unable to send file to database: {error}')
+        raise error
     logging.LogF.log(f'Successfully sent publication to server')
 
 
@@ -55,19 +179,12 @@ def return_rdf_triples(rdfTriples):
     :param rdfTriples: The triples to be converted to Turtle
     :return: The triples following RDF Turtle format
     """
+    buffer = io.BytesIO()
+    writer = turtle_writer(buffer)
+    writer.write_all(rdfTriples)
+    writer.close()
 
-    # Get the "graph" in order to contain the rdfTriples
-    # Switch the bad namespacemanager with the good one which do not create prefix'es
-    graph: Graph = Graph()
-    name_space_manager = KnoxNameSpaceManager(graph)
-    graph.namespace_manager = name_space_manager
-
-    for sub, rel, obj in rdfTriples:
-        graph.add((sub, rel, obj))
-        logging.LogF.log(
-            f'sub: {urllib.parse.unquote(sub)}, rel: {urllib.parse.unquote(rel)}, obj: {urllib.parse.unquote(obj)}')
-
-    return graph.serialize(format='turtle').decode("utf-8").replace("<", "&lt;").replace(">", "&gt;")
+    return buffer.getvalue().decode("utf-8").replace("<", "&lt;").replace(">", "&gt;")
 
 
 def generate_blank_node():
@@ -104,6 +221,8 @@ def generate_uri_reference(namespace, sub_uri_list=[], ref=""):
         An instance of the RDF URIRef class, containing the combined URL for the specified resource
     
     Generates an URI reference to a RDF resource.
+    References are cached, so the same URIRef instance is returned for repeated calls with the same arguments.
+    The size of the cache is set by URI_CACHE_SIZE, see uri_reference_cache_info for its statistics.
 
     Example of usage:
     To generate the URL resource: http://example.org/person/important/localhero/BobTheMan  
@@ -112,13 +231,35 @@ def generate_uri_reference(namespace, sub_uri_list=[], ref=""):
         sub_uri_list: ["person", "important", "localhero"]  
         ref: "BobTheMan"  
     """
+    return _uri_reference(namespace, tuple(sub_uri_list), ref)
+
+
+def uri_reference_cache_info():
+    """
+    Returns:
+        The statistics of the cache used by generate_uri_reference, as a named tuple of hits, misses, maxsize and
+        currsize
+    """
+    return _uri_reference.cache_info()
+
+
+@functools.lru_cache(maxsize=Ev.instance.get_int(Ev.instance.URI_CACHE_SIZE, 65536))
+def _uri_reference(namespace, sub_uris: Tuple, ref):
+    return URIRef(_uri_prefix(namespace, sub_uris) + urllib.parse.quote(ref.replace("/", "-")))
+
+
+@functools.lru_cache(maxsize=1024)
+def _uri_prefix(namespace, sub_uris: Tuple) -> str:
+    """
+    The namespace and quoted sub uri's are shared by many references, e.g. all references to articles, and are
+    cached separately so they are only quoted once even when the references themselves miss the cache.
+    """
     reference_str = namespace
 
-    for sub_uri in sub_uri_list:
+    for sub_uri in sub_uris:
         reference_str += urllib.parse.quote(sub_uri) + "/"
 
-    reference_str += urllib.parse.quote(ref.replace("/", "-"))
-    return URIRef(reference_str)
+    return reference_str
 
 
 def generate_relation(relationTypeConstant):
@@ -130,6 +271,14 @@ def generate_relation(relationTypeConstant):
     Raises:
         Exception - If <relationTypeConstant> has not been defined in the function
     """
+    # The relations of all RelationTypeConstants are looked up in a precomputed table
+    relation = RELATIONS.get(relationTypeConstant)
+    if relation is not None:
+        return relation
+    return _parse_relation(relationTypeConstant)
+
+
+def _parse_relation(relationTypeConstant):
     relType, relValue = relationTypeConstant.split(":")
     if relType == "rdf":
         return RDF.term(relValue)
@@ -182,18 +331,20 @@ KNOX = ClosedNamespace(
 )
 
 
-class KnoxNameSpaceManager(NamespaceManager):
+def _build_relation_table():
     """
-    An override of rdflib built-in NamespaceManager.
-    This is used in order to escape the default prefix'es being added to the output
+    Returns:
+        A dict from the value of each RelationTypeConstant to its relation. The constants are str enums, which hash and
+        compare equal to their value, so they can be looked up directly. Constants that cannot be resolved are left
+        out, so generate_relation reports them when they are used.
     """
+    relations = {}
+    for constant in RelationTypeConstants:
+        try:
+            relations[constant.value] = _parse_relation(constant.value)
+        except Exception:
+            pass
+    return relations
+
 
-    def __init__(self, graph):
-        self.graph = graph
-        self.__cache = {}
-        self.__cache_strict = {}
-        self.__log = None
-        self.__strie = {}
-        self.__trie = {}
-        for p, n in self.namespaces():  # self.bind is not always called
-            super().insert_trie(self.__trie, str(n))
+RELATIONS = _build_relation_table()
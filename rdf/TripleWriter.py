@@ -0,0 +1,156 @@
+import re
+from typing import BinaryIO, Dict, Iterable, Tuple
+
+from rdflib import Literal, URIRef, BNode
+from rdflib.namespace import RDF, RDFS, OWL, XSD
+# Importing the N-Triples serializer also registers the "_rdflib_nt_escape" codec error handler
+from rdflib.plugins.serializers.nt import _quoteLiteral
+
+
+class TripleWriter:
+    """
+    Writes triples straight to a binary stream as N-Triples or Turtle, without building an rdflib Graph first.
+    Terms are escaped the same way as rdflib's N-Triples serializer does.
+
+    In Turtle, consecutive triples sharing a subject (and predicate) are grouped, and IRIs are shortened to prefixed
+    names. Prefixes are declared the first time their namespace is used, so the output can be written in one pass.
+
+    Example of usage:
+        with open("graph.ttl", "wb") as f:
+            writer = TripleWriter(f, "turtle")
+            writer.write_all(triples)
+            writer.close()
+    """
+
+    FORMATS = ["nt", "turtle"]
+
+    # Well-known namespaces, always abbreviated with their customary prefix
+    DEFAULT_PREFIXES = {"rdf": str(RDF), "rdfs": str(RDFS), "owl": str(OWL), "xsd": str(XSD)}
+
+    # A conservative subset of the Turtle PN_PREFIX and PN_LOCAL productions, which every Turtle parser accepts
+    __PREFIX_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9_\-]*$")
+    __LOCAL_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*$")
+
+    def __init__(self, stream: BinaryIO, format: str = "turtle", compact: bool = True):
+        """
+
+        :param stream: The binary stream the triples are written to
+        :param format: "nt" for N-Triples or "turtle" for Turtle
+        :param compact: Whether Turtle output uses prefixed names. Ignored for N-Triples
+        """
+        if format not in self.FORMATS:
+            raise Exception("Unsupported format: " + format + ". Supported formats are: " + ", ".join(self.FORMATS))
+
+        self.stream = stream
+        self.format = format
+        self.compact = compact and format == "turtle"
+        self.triple_count = 0
+        self.__namespaces: Dict[str, str] = {}
+        self.__prefixes = set()
+        self.__subject = None
+        self.__predicate = None
+
+    def write(self, triple: Tuple):
+        """
+        Writes a single triple.
+
+        :param triple: A triple on the form (Subject, RelationPredicate, Object)
+        """
+        subject, predicate, _object = triple
+        self.triple_count += 1
+
+        if self.format == "nt":
+            self.__write_nt(subject, predicate, _object)
+            return
+
+        # Declarations must come before the statement using them
+        subject_text = self.__turtle_term(subject)
+        predicate_text = self.__turtle_term(predicate)
+        object_text = self.__turtle_term(_object)
+
+        if subject == self.__subject and predicate == self.__predicate:
+            self.stream.write((" ,\n        " + object_text).encode("utf-8"))
+        elif subject == self.__subject:
+            self.stream.write((" ;\n    " + predicate_text + " " + object_text).encode("utf-8"))
+        else:
+            self.__end_statement()
+            self.stream.write((subject_text + " " + predicate_text + " " + object_text).encode("utf-8"))
+        self.__subject = subject
+        self.__predicate = predicate
+
+    def write_all(self, triples: Iterable[Tuple]) -> int:
+        """
+        Writes all triples of an iterable. The iterable is consumed lazily.
+
+        :param triples: Triples on the form (Subject, RelationPredicate, Object)
+        :return: The number of triples written
+        """
+        count = 0
+        for triple in triples:
+            self.write(triple)
+            count += 1
+        return count
+
+    def close(self):
+        """
+        Terminates the last statement. Does not close the underlying stream.
+        """
+        self.__end_statement()
+
+    def __write_nt(self, subject, predicate, _object):
+        if isinstance(_object, Literal):
+            row = "%s %s %s .\n" % (subject.n3(), predicate.n3(), _quoteLiteral(_object))
+        else:
+            row = "%s %s %s .\n" % (subject.n3(), predicate.n3(), _object.n3())
+        # N-Triples is ASCII, other characters are written as \\u escapes
+        self.stream.write(row.encode("ascii", "_rdflib_nt_escape"))
+
+    def __end_statement(self):
+        if self.__subject is not None:
+            self.stream.write(b" .\n")
+            self.__subject = None
+            self.__predicate = None
+
+    def __turtle_term(self, term) -> str:
+        """
+        :param term: An rdflib term
+        :return: The Turtle representation of the term, declaring a prefix for it first if needed
+        """
+        if isinstance(term, Literal):
+            return _quoteLiteral(term)
+        if isinstance(term, BNode) or not self.compact:
+            return term.n3()
+
+        iri = str(term)
+        split = max(iri.rfind("/"), iri.rfind("#")) + 1
+        namespace, local_name = iri[:split], iri[split:]
+        if split == 0 or not self.__LOCAL_PATTERN.match(local_name):
+            return URIRef(iri).n3()
+        return self.__prefix(namespace) + ":" + local_name
+
+    def __prefix(self, namespace: str) -> str:
+        """
+        Returns the prefix of a namespace, declaring it if this is the first time the namespace is used.
+
+        :param namespace: The namespace IRI
+        :return: The prefix
+        """
+        prefix = self.__namespaces.get(namespace)
+        if prefix is not None:
+            return prefix
+
+        prefix = next((p for p, n in self.DEFAULT_PREFIXES.items() if n == namespace), None)
+        if prefix is None:
+            # Prefer the last segment of the namespace, e.g. "Person" for http://www.Knox.test/Person/
+            candidate = namespace.rstrip("/#").rsplit("/", 1)[-1]
+            prefix = candidate if self.__PREFIX_PATTERN.match(candidate) else "ns"
+            number = 1
+            while prefix in self.__prefixes or prefix in self.DEFAULT_PREFIXES:
+                prefix = candidate + str(number) if self.__PREFIX_PATTERN.match(candidate) else "ns" + str(number)
+                number += 1
+
+        self.__namespaces[namespace] = prefix
+        self.__prefixes.add(prefix)
+        self.__end_statement()
+        self.stream.write(("@prefix " + prefix + ": " + URIRef(namespace).n3() + " .\n").encode("utf-8"))
+        return prefix
@@ -0,0 +1,398 @@
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+from spacy.language import Language
+
+from environment import EnvironmentVariables as Ev
+from utils import BucketIndex
+
+Ev()
+
+
+class EntityCanonicalizer:
+    """
+    Merges variants of the name of an entity, e.g. "Mette Frederiksen", "METTE FREDERIKSEN", "Mette Frederiksen's"
+    and "Mette Frederiksens", into one canonical name, the first variant seen, so they are given the same URI.
+
+    Names are first compared by a normalized form, which ignores case, punctuation and possessives. Names without an
+    exact match are compared by a vector: the character trigrams of each word of the normalized name, hashed with the
+    position of the word into a fixed number of dimensions, joined with the mean of the word vectors of the model, if
+    it has any. A name is merged into the most similar canonical name of the same label whose cosine similarity
+    reaches the threshold, if the similarity of their trigrams alone does too. Word vectors of different names of the
+    same kind are close, e.g. of the surnames Pedersen and Petersen, so they can keep names apart but not merge them.
+
+    The canonical names, the normalized names mapped to them and the locality sensitive hashes of their vectors are
+    stored in SQLite, so a name keeps its canonical name across restarts, and processes using the same file agree on
+    it. A lookup only compares a name with the few canonical names sharing a bucket with it in at least min_shared of
+    the hash tables. Names of the same kind share a bucket in a table now and then, but rarely in several, while
+    variants of a name share one in several. The buckets are indexed in memory, taking about 8 bytes per table per
+    canonical name, and the names stored by other processes are added to the index before each lookup. Of the names
+    themselves, only a bounded cache of recently looked up names is held in memory.
+
+    Example of usage:
+        canonicalizer = EntityCanonicalizer(nlp, "entities.sqlite")
+        canonicalizer.canonicalize(["Jens Hansen", "Jens Hansen's"], "PER")  # ["Jens Hansen", "Jens Hansen"]
+    """
+
+    instance = None
+    __instance_lock = threading.Lock()
+
+    # Number of dimensions the character trigrams are hashed into
+    TRIGRAM_DIMENSIONS = 256
+    # Number of canonical names of normalized names kept in memory. A stored name never changes its canonical name,
+    # so they are never stale
+    ALIAS_CACHE_SIZE = 100000
+
+    __POSSESSIVE_PATTERN = re.compile(r"['’]s?\b")
+    __SEPARATOR_PATTERN = re.compile(r"[\W_]+")
+
+    def __init__(self, nlp: Language = None, path: str = ":memory:", threshold: float = 0.85,
+                 word_weight: float = 0.5, bits: int = 15, tables: int = 64, min_shared: int = 3, seed: int = 0):
+        """
+
+        :param nlp: The model whose word vectors are used. Without a model, or if it has no vectors, only the
+            character trigrams are compared
+        :param path: Path of the SQLite file the canonical names are stored in. By default they are only kept in memory
+        :param threshold: The cosine similarity at which a name is merged into a canonical name
+        :param word_weight: The share of the similarity given by the word vectors, when both names have them
+        :param bits: The number of hyperplanes, and so bits, of each hash table. The buckets of all tables are
+            numbered in 32 bits, so tables << bits must be below 2**32
+        :param tables: The number of hash tables. More tables find more of the similar names, at the cost of more
+            comparisons
+        :param min_shared: The number of tables in which a canonical name must share the bucket of a name to be
+            compared with it. Fewer find more of the similar names, at the cost of more comparisons
+        :param seed: Seed of the random hyperplanes
+        """
+        self.path = path
+        self.threshold = threshold
+        self.word_weight = word_weight
+        self.bits = bits
+        self.tables = tables
+        self.min_shared = min_shared
+        self.__vectors = nlp.vocab.vectors if nlp is not None and nlp.vocab.vectors.shape[0] > 0 else None
+        self.__strings = nlp.vocab.strings if nlp is not None else None
+        word_dimensions = self.__vectors.shape[1] if self.__vectors is not None else 0
+        self.dimensions = self.TRIGRAM_DIMENSIONS + word_dimensions
+        self.__hyperplanes = numpy.random.default_rng(seed).standard_normal(
+            (self.dimensions, tables * bits)).astype(numpy.float32)
+        self.__powers = (1 << numpy.arange(bits, dtype=numpy.int64))
+
+        self.__lock = threading.Lock()
+        self.__alias_cache: OrderedDict = OrderedDict()
+        self.__indexes: Dict[str, BucketIndex] = {}
+        # The id of the last canonical name added to the indexes. Ids only grow, so the names stored since are those
+        # with a greater id
+        self.__indexed_id = 0
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )""")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS names (
+                id INTEGER PRIMARY KEY,
+                label TEXT NOT NULL,
+                name TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                codes BLOB NOT NULL
+            )""")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS aliases (
+                label TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                name_id INTEGER NOT NULL,
+                PRIMARY KEY (label, normalized)
+            ) WITHOUT ROWID""")
+        self.__check_settings(nlp, seed)
+
+    @classmethod
+    def get_instance(cls, nlp: Language):
+        """
+        Returns the canonicalizer configured by ENTITY_CANONICAL_PATH and ENTITY_SIMILARITY_THRESHOLD. The same
+        instance is returned on every call.
+
+        :param nlp: The model whose word vectors are used
+        :return: The canonicalizer, or None if ENTITY_CANONICAL_PATH is not set
+        """
+        path = Ev.instance.get_value(Ev.instance.ENTITY_CANONICAL_PATH)
+        if path is None:
+            return None
+        with cls.__instance_lock:
+            if cls.instance is None:
+                cls.instance = EntityCanonicalizer(
+                    nlp, path, threshold=Ev.instance.get_float(Ev.instance.ENTITY_SIMILARITY_THRESHOLD, 0.85))
+        return cls.instance
+
+    def canonicalize(self, names: List[str], label: str, record: bool = True) -> List[str]:
+        """
+        Looks up the canonical name of each name. A name with no similar canonical name becomes canonical itself.
+        The vectors and hashes of the names are computed in one batch.
+
+        :param names: The names of entities, as found in the text
+        :param label: The label of the entities. Only names with the same label are merged
+        :param record: Whether to store the names not seen before. If not, e.g. for a preview, the stored names are
+            only looked up, and a name with no similar canonical name is returned as it is
+        :return: The canonical name of each name, in the order of the names
+        """
+        if not names:
+            return []
+        normalized = [self.normalize(name) for name in names]
+
+        with self.__lock:
+            canonical = {}
+            for normalized_name in normalized:
+                canonical_name = self.__alias_cache.get((label, normalized_name))
+                if canonical_name is not None:
+                    self.__alias_cache.move_to_end((label, normalized_name))
+                    canonical[normalized_name] = canonical_name
+            # A name of only punctuation, e.g. "'s", has no normalized form to compare, so it is left as it is
+            uncached = [(name, normalized_name) for name, normalized_name in zip(names, normalized)
+                        if normalized_name and normalized_name not in canonical]
+            if uncached:
+                canonical.update(self.__look_up(uncached, label, record))
+
+        return [canonical.get(normalized_name) or name for name, normalized_name in zip(names, normalized)]
+
+    @classmethod
+    def normalize(cls, name: str) -> str:
+        """
+        :param name: The name of an entity
+        :return: The name in lower case, without possessives and punctuation, e.g. "jens hansen" for
+            "Jens Hansen's"
+        """
+        name = unicodedata.normalize("NFKC", name).lower()
+        name = cls.__POSSESSIVE_PATTERN.sub("", name)
+        return cls.__SEPARATOR_PATTERN.sub(" ", name).strip()
+
+    def vector(self, normalized_name: str) -> numpy.ndarray:
+        """
+        :param normalized_name: A name normalized by normalize
+        :return: The unit vector of the name, or a zero vector for an empty name
+        """
+        vector = numpy.zeros(self.dimensions, dtype=numpy.float32)
+        for position, word in enumerate(normalized_name.split()):
+            # The trigrams are hashed with the position of their word, so "Hans Jensen" is not "Jens Hansen"
+            padded = str(min(position, 3)) + " " + word + " "
+            for start in range(1, len(padded) - 2):
+                trigram = (padded[0] + padded[start:start + 3]).encode("utf-8")
+                vector[zlib.crc32(trigram) % self.TRIGRAM_DIMENSIONS] += 1
+        self.__scale(vector[:self.TRIGRAM_DIMENSIONS], 1 - self.word_weight)
+
+        word_vector = self.__word_vector(normalized_name)
+        if word_vector is not None:
+            vector[self.TRIGRAM_DIMENSIONS:] = word_vector
+            self.__scale(vector[self.TRIGRAM_DIMENSIONS:], self.word_weight)
+
+        self.__scale(vector, 1)
+        return vector
+
+    def __len__(self) -> int:
+        """
+        :return: The number of canonical names of all labels
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+
+    def __look_up(self, names: List[Tuple[str, str]], label: str, record: bool) -> Dict[str, Optional[str]]:
+        """
+        Looks up the canonical names of names in the file, storing the names not seen before if record is set.
+        The lock must be held.
+
+        :param names: The names paired with their normalized form
+        :return: The canonical name of each normalized name, or None if it has none and record is not set
+        """
+        # Taking the write lock up front keeps other processes from making a variant canonical meanwhile
+        self.__connection.execute("BEGIN IMMEDIATE" if record else "BEGIN")
+        try:
+            self.__update_indexes()
+            name_ids = self.__aliases(label, set(normalized_name for _, normalized_name in names))
+            new = [(name, normalized_name) for name, normalized_name in names if normalized_name not in name_ids]
+            if new:
+                vectors = numpy.stack([self.vector(normalized_name) for _, normalized_name in new])
+                # Plain ints are faster parameters than NumPy integers
+                codes = self.__hash(vectors).tolist()
+                for (name, normalized_name), vector, name_codes in zip(new, vectors, codes):
+                    # Later occurrences of the same normalized name skip the vector comparison
+                    if normalized_name in name_ids:
+                        continue
+                    name_id = self.__nearest(label, vector, name_codes)
+                    if record:
+                        if name_id is None:
+                            name_id = self.__add(label, name, vector, name_codes)
+                        self.__connection.execute("INSERT INTO aliases (label, normalized, name_id) VALUES (?, ?, ?)",
+                                                  (label, normalized_name, name_id))
+                    name_ids[normalized_name] = name_id
+            canonical_names = self.__names(set(name_id for name_id in name_ids.values() if name_id is not None))
+            self.__connection.execute("COMMIT")
+        except Exception:
+            self.__connection.execute("ROLLBACK")
+            # The indexes may hold names that were rolled back, so they are loaded again on the next lookup
+            self.__indexes.clear()
+            self.__indexed_id = 0
+            raise
+
+        canonical = {}
+        for normalized_name, name_id in name_ids.items():
+            canonical[normalized_name] = canonical_names.get(name_id)
+            # Only stored names are cached, as a name looked up without being recorded can be stored later
+            if name_id is not None:
+                self.__alias_cache[(label, normalized_name)] = canonical[normalized_name]
+                if len(self.__alias_cache) > self.ALIAS_CACHE_SIZE:
+                    self.__alias_cache.popitem(last=False)
+        return canonical
+
+    def __check_settings(self, nlp: Optional[Language], seed: int):
+        """
+        Stores the settings the hashes and vectors depend on in a new file, or checks that they are those of an
+        existing file.
+        """
+        model = [nlp.lang, nlp.meta.get("name"), nlp.meta.get("version")] if nlp is not None else None
+        # The version is that of the layout of the file, raised when files stored by older code cannot be read
+        settings = json.dumps({"version": 2, "dimensions": self.dimensions, "bits": self.bits, "tables": self.tables,
+                               "seed": seed, "word_weight": self.word_weight, "model": model}, sort_keys=True)
+        with self.__lock:
+            self.__connection.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('vectors', ?)", (settings,))
+            stored = self.__connection.execute("SELECT value FROM settings WHERE key = 'vectors'").fetchone()[0]
+        if stored != settings:
+            raise Exception("The canonical names in " + self.path + " were stored with other settings: " + stored)
+
+    def __aliases(self, label: str, normalized_names: set) -> Dict[str, int]:
+        """
+        :return: The ids of the canonical names of the normalized names stored before. The lock must be held.
+        """
+        normalized_names = list(normalized_names)
+        name_ids = {}
+        # Bounded by SQLite's limit on the number of parameters of a statement
+        for start in range(0, len(normalized_names), 500):
+            part = normalized_names[start:start + 500]
+            name_ids.update(self.__connection.execute(
+                "SELECT normalized, name_id FROM aliases WHERE label = ? AND normalized IN ("
+                + ",".join("?" * len(part)) + ")", [label] + part).fetchall())
+        return name_ids
+
+    def __names(self, name_ids: set) -> Dict[int, str]:
+        """
+        :return: The canonical names of ids. The lock must be held.
+        """
+        name_ids = list(name_ids)
+        names = {}
+        for start in range(0, len(name_ids), 500):
+            part = name_ids[start:start + 500]
+            names.update(self.__connection.execute(
+                "SELECT id, name FROM names WHERE id IN (" + ",".join("?" * len(part)) + ")", part).fetchall())
+        return names
+
+    def __nearest(self, label: str, vector: numpy.ndarray, codes: List[int]) -> Optional[int]:
+        """
+        :return: The id of the most similar canonical name sharing at least min_shared buckets with the vector, if it
+            is similar enough. The lock must be held.
+        """
+        index = self.__indexes.get(label)
+        if index is None:
+            return None
+        candidates = index.candidates(self.__buckets(codes), self.min_shared)
+        best_id, best_similarity = None, self.threshold
+        for start in range(0, len(candidates), 500):
+            part = candidates[start:start + 500]
+            rows = self.__connection.execute(
+                "SELECT id, vector FROM names WHERE id IN (" + ",".join("?" * len(part)) + ")", part).fetchall()
+            vectors = numpy.stack([numpy.frombuffer(row[1], dtype=numpy.float16) for row in rows]).astype(
+                numpy.float32)
+            similarities = vectors @ vector
+            trigram_similarities = self.__cosine(vectors[:, :self.TRIGRAM_DIMENSIONS],
+                                                 vector[:self.TRIGRAM_DIMENSIONS])
+            for (name_id, _), similarity, trigram_similarity in zip(rows, similarities, trigram_similarities):
+                if similarity >= best_similarity and trigram_similarity >= self.threshold:
+                    best_id, best_similarity = name_id, similarity
+        return best_id
+
+    def __add(self, label: str, name: str, vector: numpy.ndarray, codes: List[int]) -> int:
+        """
+        :return: The id of the new canonical name. The lock must be held.
+        """
+        # Half precision halves the size of the file, and is plenty for comparing names
+        name_id = self.__connection.execute(
+            "INSERT INTO names (label, name, vector, codes) VALUES (?, ?, ?, ?)",
+            (label, name, vector.astype(numpy.float16).tobytes(), numpy.array(codes, dtype=numpy.uint32).tobytes())
+        ).lastrowid
+        # The write lock is held, so no other process has stored a name since the indexes were updated
+        self.__indexes.setdefault(label, BucketIndex()).add(name_id, self.__buckets(codes))
+        self.__indexed_id = name_id
+        return name_id
+
+    def __update_indexes(self):
+        """
+        Adds the canonical names stored since the last update, by this or other processes, to the indexes. On the
+        first update, all stored names are added. The lock must be held, and a transaction begun.
+        """
+        rows = self.__connection.execute("SELECT id, label, codes FROM names WHERE id > ? ORDER BY id",
+                                         (self.__indexed_id,)).fetchall()
+        if not rows:
+            return
+        offsets = numpy.arange(self.tables, dtype=numpy.uint32) << self.bits
+        labels = {}
+        for name_id, label, codes in rows:
+            labels.setdefault(label, ([], []))
+            labels[label][0].append(name_id)
+            labels[label][1].append(codes)
+        for label, (name_ids, codes) in labels.items():
+            buckets = numpy.frombuffer(b"".join(codes), dtype=numpy.uint32).reshape(len(name_ids), self.tables)
+            self.__indexes.setdefault(label, BucketIndex()).extend(numpy.array(name_ids), buckets + offsets)
+        self.__indexed_id = rows[-1][0]
+
+    def __buckets(self, codes: List[int]) -> List[int]:
+        """
+        :return: The buckets of the codes of a vector, numbered across the tables
+        """
+        return [(table << self.bits) | code for table, code in enumerate(codes)]
+
+    def __word_vector(self, normalized_name: str) -> Optional[numpy.ndarray]:
+        """
+        :return: The mean of the vectors of the words of the name that have one, or None if none of them has
+        """
+        if self.__vectors is None:
+            return None
+        keys = [self.__strings[word] for word in normalized_name.split()]
+        if not keys:
+            return None
+        rows = self.__vectors.find(keys=keys)
+        rows = rows[rows >= 0]
+        if len(rows) == 0:
+            return None
+        return numpy.asarray(self.__vectors.data[rows]).mean(axis=0)
+
+    def __hash(self, vectors: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param vectors: Vectors as rows
+        :return: The bucket of each vector in each table, with a row per vector and a column per table
+        """
+        signs = (vectors @ self.__hyperplanes > 0).reshape(len(vectors), self.tables, self.bits)
+        return signs.astype(numpy.int64) @ self.__powers
+
+    @staticmethod
+    def __cosine(vectors: numpy.ndarray, vector: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: The cosine similarity of each row of vectors with vector, 0 for zero vectors
+        """
+        norms = numpy.linalg.norm(vectors, axis=1) * numpy.linalg.norm(vector)
+        return numpy.divide(vectors @ vector, norms, out=numpy.zeros(len(vectors), dtype=numpy.float32),
+                            where=norms > 0)
+
+    @staticmethod
+    def __scale(vector: numpy.ndarray, weight: float):
+        """
+        Scales a vector in place to the norm sqrt(weight), unless it is zero. Joined vectors scaled like this have a
+        cosine similarity that is the weighted sum of the similarities of the parts.
+        """
+        norm = numpy.linalg.norm(vector)
+        if norm > 0:
+            vector *= numpy.sqrt(weight) / norm
@@ -1,10 +1,13 @@
-import re
-from typing import List, Tuple
+import os
+from typing import List, Tuple, Iterator
 
 from model import Document, Article
 from rdf.RdfConstants import RelationTypeConstants
 from .TripleExtractor import TripleExtractor, Triple, TripleExtractorEnum
+from .TextRewriter import TextRewriter
+from .Gazetteer import Gazetteer
 from rdf.RdfCreator import generate_uri_reference, generate_relation, generate_literal
+from utils import pipe_entities
 from environment import EnvironmentVariables as Ev
 Ev()
 
@@ -23,16 +26,36 @@ class GFTripleExtractor(TripleExtractor):
         # TODO: The pump name SHOULD NOT be hard-coded. It is only like this since we don't receive the pump name
         #  from the previous layer
         self.pump_name = "SQ/SQE"
+        # Number of lines per batch, and number of processes, when running the lines of a manual through the pipeline
+        self.batch_size = Ev.instance.get_int(Ev.instance.GF_NLP_BATCH_SIZE, 256)
+        self.n_process = Ev.instance.get_int(Ev.instance.GF_NLP_N_PROCESS, 1)
+
+        # The rewrite rules of the pre-processing are kept next to the patterns by default
+        rules_path = Ev.instance.get_value(Ev.instance.GF_REWRITE_RULES_PATH, os.path.join(
+            os.path.dirname(Ev.instance.get_value(Ev.instance.GF_PATTERN_PATH)), "manual_rewrite_rules.json"))
+        self.rewriter = TextRewriter.from_file(rules_path)
 
         super().__init__(spacy_model, [], [], "http://www.KnoxGrundfos.test/")
         self._init_spacy_pipeline()
 
     def _init_spacy_pipeline(self):
         """
-        Adds patterns for the rule-based matching of pumps.
+        Adds patterns for the rule-based matching of pumps to the model of the extractor, which is its own, so the
+        model used by the API and the pre-processors is left as it is.
+
+        The patterns are compiled into a gazetteer artifact at GF_GAZETTEER_PATH, which is memory-mapped on later
+        startups, and recompiled when the patterns file changes. Patterns files holding token patterns are loaded
+        into an entity_ruler instead.
         """
-        test = Ev.instance.get_value(Ev.instance.GF_PATTERN_PATH)
-        self.nlp.add_pipe("entity_ruler").from_disk(test)
+        patterns_path = Ev.instance.get_value(Ev.instance.GF_PATTERN_PATH)
+        gazetteer_path = Ev.instance.get_value(Ev.instance.GF_GAZETTEER_PATH,
+                                               os.path.splitext(patterns_path)[0] + ".gazetteer")
+
+        if Gazetteer.is_compiled(self.nlp, patterns_path, gazetteer_path) \
+                or Gazetteer.compile(self.nlp, patterns_path, gazetteer_path):
+            self.nlp.add_pipe("gazetteer", config={"path": gazetteer_path})
+        else:
+            self.nlp.add_pipe("entity_ruler").from_disk(patterns_path)
 
     # TODO: find out if it should have common implementation in TripleExtractor
     def _append_token(self, article: Article, pair: Tuple[str, str]):
@@ -56,57 +79,32 @@ class GFTripleExtractor(TripleExtractor):
         self.triples.append(
             Triple(_object, generate_relation(RelationTypeConstants.KNOX_NAME), generate_literal(pair[0])))
 
-    def extract_content(self, document: Document):
+    def extract_content(self, document: Document) -> Iterator[Triple]:
         """
         Calls the pre-processor, processor, and extracts the manual path for the input document.
 
         :param document: The document to be processed
+        :return: An iterator over the triples, yielded one manual at a time
         """
         for article in document.articles:
             # For each article, process the text and extract non-textual data in it.
             article.body = self._pre_process_manual(article.body)
             self.__process_manual(article)
             self.__extract_manual_path(article)
+            yield from self.triples.drain()
 
     def _pre_process_manual(self, body):
         """
         Cleans the body of the manual, attempting to discard nonsensical information, as well as replacing occurrences
-        of "the pump", etc. with the actual name of the pump.
+        of "the pump", etc. with the actual name of the pump. The rewrite rules are loaded from GF_REWRITE_RULES_PATH.
 
         :param body: The text to be pre-processed
         :return: The cleaned text
         """
-        processed_body = body
-        processed_body = processed_body.replace("\n", " ")
-        processed_body = processed_body.replace("- ", "")
-        processed_body = processed_body.replace(". ", ".\n")
-        processed_body = re.sub(r'([mM]in\.|[Ee]\.g\.|[mM]ax\.|[fF]ig(s)?\.) *\n', r'\1 ', processed_body)
-        processed_body = processed_body.replace(" .", ".")
-        processed_body = re.sub(r' +', ' ', processed_body)
-        processed_body = re.sub(r'\d (\d |\d)+', '', processed_body)
-        processed_body = processed_body.replace("\n ", "\n")
-        processed_body = processed_body.replace("The pump ", self.pump_name + " ")
-        processed_body = processed_body.replace(" the pump ", " " + self.pump_name + " ")
-        processed_body = processed_body.replace(" the pump.", " " + self.pump_name + ".")
-        processed_body = processed_body.replace("This pump ", self.pump_name + " ")
-        processed_body = processed_body.replace(" this pump ", " " + self.pump_name + " ")
-        processed_body = processed_body.replace(" this pump.", " " + self.pump_name + ".")
-        processed_body = processed_body.replace("The pumps ", self.pump_name + " ")
-        processed_body = processed_body.replace(" the pumps ", " " + self.pump_name + " ")
-        processed_body = processed_body.replace(" the pumps.", " " + self.pump_name + ".")
-        processed_body = processed_body.replace("These pumps ", self.pump_name + " ")
-        processed_body = processed_body.replace(" these pumps ", " " + self.pump_name + " ")
-        processed_body = processed_body.replace(" these pumps.", " " + self.pump_name + ".")
+        processed_body = self.rewriter.rewrite(body, pump_name=self.pump_name)
 
         # Remove short (5 chars or less), and presumably, redundant lines
-        clean_processed_body = ""
-        for line in processed_body.split("\n"):
-            if len(line) >= 5:
-                clean_processed_body += line + "\n"
-            else:
-                clean_processed_body += "\n"
-
-        return clean_processed_body
+        return "\n".join(line if len(line) >= 5 else "" for line in processed_body.split("\n")) + "\n"
 
     def __process_manual(self, manual: Article):
         """
@@ -127,14 +125,18 @@ class GFTripleExtractor(TripleExtractor):
         :return: The entities identified in the body
         """
         manual_entities = []
-        for line in body.split("\n"):
-            processed_text = self.nlp(line)
-
+        # The lines are run through the pipeline in batches, in their original order. Empty lines have no entities and
+        # are skipped. Lines longer than NLP_MAX_CHUNK_CHARS are parsed in chunks. With GF_NLP_N_PROCESS above 1, a
+        # pool of processes is started for each manual, unless it has fewer lines than a batch per process
+        lines = [line for line in body.split("\n") if line]
+        line_entities = pipe_entities(self.nlp, lines, batch_size=self.batch_size, n_process=self.n_process,
+                                      profile="ner-only")
+        for processed_text in line_entities:
             found_pump = False
 
-            for entity in processed_text.ents:
-                if entity.label_ == "Pump":
-                    found_pump = (entity.text, entity.label_)
+            for entity in processed_text:
+                if entity.label == "Pump":
+                    found_pump = (entity.text, entity.label)
 
             if found_pump:
                 self.__process_pump_line(found_pump, processed_text)
@@ -148,7 +150,7 @@ class GFTripleExtractor(TripleExtractor):
         Creates triples for the PumpRelates relation.
 
         :param pump_pair: A Tuple containing a pump's name and label
-        :param processed_text: The Doc object returned by the NLP method
+        :param processed_text: The entities of the line
         """
         pump_object_ref, pump_object_label = pump_pair
         pump_object_ref = pump_object_ref.replace(" ", "_")
@@ -157,9 +159,9 @@ class GFTripleExtractor(TripleExtractor):
         self.triples.append(
             Triple(_pump_object, generate_relation(RelationTypeConstants.KNOX_NAME), generate_literal(pump_object_ref)))
 
-        for entity in processed_text.ents:
-            if entity.label_ != "Pump":
-                object_ref, object_label = entity.text, entity.label_
+        for entity in processed_text:
+            if entity.label != "Pump":
+                object_ref, object_label = entity.text, entity.label
                 object_ref = object_ref.replace(" ", "_")
                 object_label = self._convert_spacy_label_to_namespace(object_label)
 
@@ -176,13 +178,13 @@ class GFTripleExtractor(TripleExtractor):
         """
         Identifies entities for the mentions relation.
 
-        :param processed_text: The Doc object returned by the nlp method
+        :param processed_text: The entities of the line
         :return: A list of entities
         """
         manual_entities = []
-        for entity in processed_text.ents:
-            if entity.label_ not in self.ignore_label_list:
-                name, label = entity.text, entity.label_
+        for entity in processed_text:
+            if entity.label not in self.ignore_label_list:
+                name, label = entity.text, entity.label
                 manual_entities.append((name, label))
                 self._queue_named_individual(name.replace(" ", "_"), self._convert_spacy_label_to_namespace(label))
 
@@ -0,0 +1,196 @@
+import json
+import os
+from typing import List, Optional
+
+import numpy
+from spacy.language import Language
+from spacy.tokens import Doc, Span
+from spacy.util import filter_spans
+
+# Multiplier used to combine the token keys of a phrase into one 64 bit hash
+HASH_MULTIPLIER = numpy.uint64(1099511628211)
+
+
+class Gazetteer:
+    """
+    A spaCy component matching a large list of phrases, e.g. a product catalogue, and adding them as entities. It is
+    a faster replacement for an entity_ruler holding only phrase patterns.
+
+    The phrases are compiled into a binary artifact: the token keys of every phrase, and a sorted table of a hash of
+    each phrase. The artifact is memory-mapped when loaded, so startup does not depend on the number of phrases.
+    Matching looks up the hash of every token sequence of each phrase length in the table, and verifies the token
+    keys of hits.
+
+    Like an entity_ruler, overlapping matches are resolved in favour of the longest, and matches overlapping
+    entities already in the document are left out.
+
+    Example of usage:
+        Gazetteer.compile(nlp, "patterns.jsonl", "patterns.gazetteer")
+        nlp.add_pipe("gazetteer", config={"path": "patterns.gazetteer"})
+    """
+
+    # Token attributes phrases can be matched on
+    ATTRIBUTES = ["ORTH", "LOWER", "NORM"]
+
+    def __init__(self, nlp: Language, name: str, path: str):
+        """
+
+        :param nlp: The pipeline the component is added to
+        :param name: The name of the component
+        :param path: Path of the artifact made by Gazetteer.compile
+        """
+        self.name = name
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        self.attr = meta["attr"]
+        self.labels: List[str] = meta["labels"]
+        # Identifies the phrases matched, so Docs cached by utils.doc_cache are not reused after a recompile
+        self.cache_stamp = meta["source"]
+
+        arrays = {array_name: numpy.load(os.path.join(path, array_name + ".npy"), mmap_mode="r")
+                  for array_name in ["phrase_hashes", "phrase_ids", "token_keys", "offsets", "label_ids", "lengths"]}
+        self.__phrase_hashes = arrays["phrase_hashes"]
+        self.__phrase_ids = arrays["phrase_ids"]
+        self.__token_keys = arrays["token_keys"]
+        self.__offsets = arrays["offsets"]
+        self.__label_ids = arrays["label_ids"]
+        self.__lengths = [int(length) for length in arrays["lengths"]]
+
+    def __call__(self, doc: Doc) -> Doc:
+        if len(doc) == 0 or len(self.__phrase_hashes) == 0:
+            return doc
+
+        matches = filter_spans(self.__match(doc))
+        # Entities found by earlier components take precedence
+        occupied = set(index for entity in doc.ents for index in range(entity.start, entity.end))
+        new_entities = [span for span in matches if not occupied.intersection(range(span.start, span.end))]
+        if new_entities:
+            doc.ents = list(doc.ents) + new_entities
+        return doc
+
+    def __match(self, doc: Doc) -> List[Span]:
+        """
+        :param doc: The document to search
+        :return: Every occurrence of a phrase in the document, possibly overlapping
+        """
+        keys = doc.to_array(self.attr).astype(numpy.uint64)
+        matches = []
+        for length in self.__lengths:
+            if length > len(keys):
+                continue
+            hashes = sequence_hashes(keys, length)
+            positions = numpy.searchsorted(self.__phrase_hashes, hashes)
+            positions[positions == len(self.__phrase_hashes)] = 0
+            for start in numpy.flatnonzero(self.__phrase_hashes[positions] == hashes):
+                position = positions[start]
+                # Several phrases may share a hash, e.g. the same phrase with two labels
+                while position < len(self.__phrase_hashes) and self.__phrase_hashes[position] == hashes[start]:
+                    phrase_id = self.__phrase_ids[position]
+                    phrase = self.__token_keys[self.__offsets[phrase_id]:self.__offsets[phrase_id + 1]]
+                    if numpy.array_equal(phrase, keys[start:start + length]):
+                        matches.append(Span(doc, int(start), int(start) + length,
+                                            label=self.labels[self.__label_ids[phrase_id]]))
+                    position += 1
+        return matches
+
+    @staticmethod
+    def compile(nlp: Language, patterns_path: str, path: str, attr: str = "ORTH") -> bool:
+        """
+        Compiles the phrase patterns of an entity_ruler JSONL file into an artifact. Only the tokenizer of the pipeline
+        is used, and it must be the tokenizer of the pipeline the component is added to.
+
+        :param nlp: The pipeline whose tokenizer splits the phrases into tokens
+        :param patterns_path: Path of a JSONL file of {"label": ..., "pattern": ...} lines
+        :param path: Path of the directory the artifact is written to
+        :param attr: The token attribute phrases are matched on, one of Gazetteer.ATTRIBUTES
+        :return: True if the artifact was written, False if the file holds token patterns, which only an
+            entity_ruler supports
+        """
+        if attr not in Gazetteer.ATTRIBUTES:
+            raise Exception("Unsupported attribute: " + attr + ". Supported attributes are: "
+                            + ", ".join(Gazetteer.ATTRIBUTES))
+
+        labels, label_ids, phrases = [], [], []
+        with open(patterns_path, encoding="utf-8") as patterns_file:
+            for line in patterns_file:
+                if line.strip() == "":
+                    continue
+                pattern = json.loads(line)
+                if not isinstance(pattern["pattern"], str):
+                    return False
+                if pattern["label"] not in labels:
+                    labels.append(pattern["label"])
+                label_ids.append(labels.index(pattern["label"]))
+                phrases.append(pattern["pattern"])
+
+        token_keys = [nlp.make_doc(phrase).to_array(attr).astype(numpy.uint64) for phrase in phrases]
+        # Phrases without tokens can never match
+        kept = [index for index, keys in enumerate(token_keys) if len(keys) > 0]
+        token_keys = [token_keys[index] for index in kept]
+        label_ids = [label_ids[index] for index in kept]
+
+        lengths = numpy.array([len(keys) for keys in token_keys], dtype=numpy.int64)
+        offsets = numpy.zeros(len(token_keys) + 1, dtype=numpy.int64)
+        numpy.cumsum(lengths, out=offsets[1:])
+        phrase_hashes = numpy.array([sequence_hashes(keys, len(keys))[0] for keys in token_keys],
+                                    dtype=numpy.uint64)
+        phrase_ids = numpy.argsort(phrase_hashes, kind="stable").astype(numpy.int64)
+
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "phrase_hashes": phrase_hashes[phrase_ids],
+            "phrase_ids": phrase_ids,
+            "token_keys": numpy.concatenate(token_keys) if token_keys else numpy.zeros(0, dtype=numpy.uint64),
+            "offsets": offsets,
+            "label_ids": numpy.array(label_ids, dtype=numpy.int64),
+            "lengths": numpy.unique(lengths),
+        }
+        for name, array in arrays.items():
+            numpy.save(os.path.join(path, name + ".npy"), array)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as meta_file:
+            json.dump({"attr": attr, "labels": labels, "source": Gazetteer.source_stamp(nlp, patterns_path)},
+                      meta_file)
+        return True
+
+    @staticmethod
+    def is_compiled(nlp: Language, patterns_path: str, path: str) -> bool:
+        """
+        :param nlp: The pipeline whose tokenizer splits the phrases into tokens
+        :param patterns_path: Path of the JSONL file of patterns
+        :param path: Path of the artifact
+        :return: Whether the artifact exists and was compiled from the current patterns file with the same pipeline
+        """
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as meta_file:
+                return json.load(meta_file)["source"] == Gazetteer.source_stamp(nlp, patterns_path)
+        except (OSError, ValueError, KeyError):
+            return False
+
+    @staticmethod
+    def source_stamp(nlp: Language, patterns_path: str) -> dict:
+        """
+        :return: What the artifact depends on: the patterns file and the pipeline providing the tokenizer
+        """
+        stat = os.stat(patterns_path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime, "lang": nlp.lang,
+                "model": nlp.meta.get("name"), "version": nlp.meta.get("version")}
+
+
+def sequence_hashes(keys: numpy.ndarray, length: int) -> numpy.ndarray:
+    """
+    :param keys: The token keys of a document, as unsigned 64 bit integers
+    :param length: The number of tokens of the sequences
+    :return: The hash of the sequence of the given length starting at each token, as long as the sequence fits
+    """
+    count = len(keys) - length + 1
+    hashes = numpy.zeros(count, dtype=numpy.uint64)
+    with numpy.errstate(over="ignore"):
+        for offset in range(length):
+            hashes = hashes * HASH_MULTIPLIER + keys[offset:offset + count]
+    return hashes
+
+
+@Language.factory("gazetteer", default_config={"path": None})
+def create_gazetteer(nlp: Language, name: str, path: Optional[str]):
+    return Gazetteer(nlp, name, path)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 import datetime
-from typing import List
+from typing import List, Iterator, Iterable, Tuple
 
 from model import Document, Article
 from rdf.RdfConstants import RelationTypeConstants
-from .TripleExtractor import TripleExtractor, TripleExtractorEnum
+from utils import pipe_entities, Entity
+from .TripleExtractor import TripleExtractor, Triple, TripleExtractorEnum
+from .EntityCanonicalizer import EntityCanonicalizer
 # TODO: Make a function that can determine the right preprocessor
 from environment import EnvironmentVariables as Ev
 
@@ -21,6 +23,13 @@ class NJTripleExtractor(TripleExtractor):
         # Initialise superclass
         super().__init__(spacy_model, tuple_label_dict, ignore_label_list, namespace)
         self.graph_name = "NJ"
+        # Number of articles per batch, and number of processes, when running articles through the pipeline
+        self.batch_size = Ev.instance.get_int(Ev.instance.NJ_NLP_BATCH_SIZE, 32)
+        self.n_process = Ev.instance.get_int(Ev.instance.NJ_NLP_N_PROCESS, 1)
+        # Merges variants of the names of entities before their URIs are made. Shared with the other NJ extractors
+        self.canonicalizer = EntityCanonicalizer.get_instance(self.nlp)
+        # Whether the triples are only previewed, see return_ttl
+        self.__preview = False
         # Set Threashold year
         self.preprocess_year_threshold = 1948
         # Get convertion tuple
@@ -31,44 +40,83 @@ class NJTripleExtractor(TripleExtractor):
         else:
             self.tuple_label_dict = tuple_label_dict
 
-    def extract_content(self, document: Document):
-        for article in document.articles:
+    def extract_content(self, document: Document) -> Iterator[Triple]:
+        return self.__extract_articles(document, self.__find_entities(document.articles))
+
+    def return_ttl(self, document: Document) -> str:
+        """
+        Extracts triples from the input document and returns a stringified version of these. The names of entities
+        not seen before are not made canonical, so a preview does not change the URIs given to later documents.
+
+        :param document: The document to extract triples from
+        :return: A string representation of the triples extracted
+        """
+        self.__preview = True
+        try:
+            return super().return_ttl(document)
+        finally:
+            self.__preview = False
+
+    def __find_entities(self, articles: Iterable[Article]) -> Iterator[List[Entity]]:
+        """
+        Input:
+            articles: Iterable[Article] - The articles to parse
+        Returns:
+            An iterator over the entities of the article bodies, in the order of the articles
+
+        Runs the article bodies through the spacy pipeline in batches. With NJ_NLP_N_PROCESS above 1 the batches are
+        spread across a pool of processes, and the entities are sent back to this process in article order. The pool
+        is started for each publication, so it only pays off for very large issues, and publications with fewer
+        articles than a batch per process are parsed in this process, see pipe_entities.
+        Bodies longer than NLP_MAX_CHUNK_CHARS are parsed in chunks.
+        """
+        return pipe_entities(self.nlp, [article.body for article in articles], batch_size=self.batch_size,
+                             n_process=self.n_process, profile="ner-only")
+
+    def __extract_articles(self, document: Document, article_entities: Iterator[List[Entity]]) -> Iterator[Triple]:
+        for article, entities in zip(document.articles, article_entities):
             # For each article, process the text and extract non-textual data in it.
-            self.__process_article(article)
+            self.__process_article(article, entities)
             self.__extract_article(article, document)
+            yield from self.triples.drain()
 
 
-    def __process_article_text(self, article_text: str) -> List[(str, str)]:
+    def __process_article_text(self, entities: List[Entity]) -> List[Tuple[str, str, str]]:
         """
         Input:
-            article_text: str - The entire content of an article
+            entities: List[Entity] - The entities found in the content of an article by the spacy pipeline
         Returns:
-            A list of "string" and label pairs. Eg: [("Jens Jensen", Person), ...]
+            A list of "string", label and canonical "string" triples. Eg: [("Jens Jensen's", Person, "Jens Jensen"), ...]
 
-        Runs the article text through the spacy pipeline
+        Filters the entities found by the NER of the spacy pipeline. With ENTITY_CANONICAL_PATH set, the canonical
+        string of an entity is the first variant of its name stored by the canonicalizer, else it is the string itself
         """
-        # Perform NLP on the article text, with the purpose of doing a NER
-        document = self.nlp(article_text)
+        # ignore ignored labels, expects ignore_label_list to be a list of strings
+        entities = [entity for entity in entities if entity.label not in self.ignore_label_list]
+        canonical_names = [entity.text for entity in entities]
+        if self.canonicalizer is not None:
+            # The names of each label are looked up in one batch
+            for label in set(entity.label for entity in entities):
+                positions = [position for position, entity in enumerate(entities) if entity.label == label]
+                canonical = self.canonicalizer.canonicalize([entities[position].text for position in positions], label,
+                                                            record=not self.__preview)
+                for position, canonical_name in zip(positions, canonical):
+                    canonical_names[position] = canonical_name
 
         # Create article entity from the document entities
         article_entities = []
-
-        for entities in document.ents:
-            name = entities.text
-            # label_ is correct for acquiring the spaCy string version of the entity
-            label = entities.label_
-
-            # ignore ignored labels, expects ignore_label_list to be a list of strings
-            if label not in self.ignore_label_list:
-                # Add entity to list, create it as named individual.
-                article_entities.append((name, label))
-                self._queue_named_individual(name.replace(" ", "_"), self._convert_spacy_label_to_namespace(label))
+        for entity, canonical_name in zip(entities, canonical_names):
+            # Add entity to list, create it as named individual.
+            article_entities.append((entity.text, entity.label, canonical_name))
+            self._queue_named_individual(canonical_name.replace(" ", "_"),
+                                         self._convert_spacy_label_to_namespace(entity.label))
         return article_entities
 
-    def __process_article(self, article: Article) -> None:
+    def __process_article(self, article: Article, entities: List[Entity]) -> None:
         """
         Input:
             article: Article - An Article object from the loader package
+            entities: List[Entity] - The entities found in the body of the article by the spacy pipeline
         Returns: None
         """
 
@@ -76,10 +124,10 @@ class NJTripleExtractor(TripleExtractor):
         ##content = ' '.join(para.value for para in article.paragraphs).replace('”', '"')
 
         # Does nlp on the text
-        article_entities = self.__process_article_text(article.body)
+        article_entities = self.__process_article_text(entities)
 
-        for pair in article_entities:
-            self._append_token(article, pair)
+        for name, label, canonical_name in article_entities:
+            self._append_token(article, (canonical_name, label), name)
 
     def __extract_article(self, article: Article, document: Document) -> None:
         """
@@ -0,0 +1,61 @@
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+class TextRewriter:
+    """
+    Rewrites text according to ordered passes of substitution rules.
+
+    The rules of a pass are compiled into a single regular expression, an alternation with a named group per rule,
+    and applied in one scan over the text. The name of the group that matched is looked up to find its replacement.
+    Within a pass, the first rule matching at a position wins, so the order of the rules matters.
+
+    A replacement may contain variables, e.g. {pump_name}, which are given when rewriting. A replacement of None
+    keeps the matched text, which lets a rule protect text from the rules after it. Rule patterns should not use
+    capturing groups of their own.
+    """
+
+    def __init__(self, passes: List[List[Tuple[str, Optional[str]]]]):
+        """
+
+        :param passes: The passes, in the order they are applied. Each pass is a list of (pattern, replacement) rules
+        """
+        self.__passes: List[Tuple[re.Pattern, Dict[str, Optional[str]]]] = []
+        for rules in passes:
+            replacements = {"r" + str(index): replacement for index, (_, replacement) in enumerate(rules)}
+            pattern = re.compile("|".join("(?P<r" + str(index) + ">" + rule_pattern + ")"
+                                          for index, (rule_pattern, _) in enumerate(rules)))
+            self.__passes.append((pattern, replacements))
+
+    @staticmethod
+    def from_file(path: str):
+        """
+        Loads the passes from a JSON file of the form {"passes": [{"rules": [{"pattern": ..., "replacement": ...}]}]}.
+
+        :param path: Path of the JSON file
+        :return: A TextRewriter applying the passes of the file
+        """
+        with open(path, encoding="utf-8") as rules_file:
+            content = json.load(rules_file)
+        return TextRewriter([[(rule["pattern"], rule["replacement"]) for rule in rewrite_pass["rules"]]
+                             for rewrite_pass in content["passes"]])
+
+    def rewrite(self, text: str, **variables) -> str:
+        """
+        Applies all passes to the text.
+
+        :param text: The text to rewrite
+        :param variables: Values of the variables used in the replacements
+        :return: The rewritten text
+        """
+        for pattern, replacements in self.__passes:
+            table = {name: replacement.format_map(variables) if replacement is not None else None
+                     for name, replacement in replacements.items()}
+
+            def substitute(match: re.Match) -> str:
+                replacement = table[match.lastgroup]
+                return match.group() if replacement is None else replacement
+
+            text = pattern.sub(substitute, text)
+        return text
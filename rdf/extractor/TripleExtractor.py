@@ -1,11 +1,12 @@
 from __future__ import annotations
+import threading
 from abc import abstractmethod
-from typing import List, Any, Tuple, NamedTuple
+from typing import List, Any, Tuple, NamedTuple, Iterator
 
 from model import Document, Article
 from rdf.RdfConstants import RelationTypeConstants
 from rdf.RdfCreator import generate_uri_reference, generate_relation, generate_literal, store_rdf_triples, return_rdf_triples
-from utils import load_model
+from utils import load_model, OrderedSet
 from .TripleExtractorEnum import TripleExtractorEnum
 from environment import EnvironmentVariables as Ev
 Ev()
@@ -25,10 +26,15 @@ class TripleExtractor:
         """
         # PreProcessor.nlp = self.nlp
         self.graph_name = None
-        self.nlp = load_model(spacy_model)
+        # Not shared, as the extractor may add components to the pipeline. Its model holds no word vectors, so a copy
+        # only costs its pipeline weights
+        self.nlp = load_model(spacy_model, shared=False)
+        # The extractor holds the state of the document it extracts, so callers sharing it across threads hold its lock
+        self.lock = threading.RLock()
         self.namespace = namespace
-        self.triples = []
-        self.named_individual = []
+        # Both are sets, so entities mentioned more than once only give one set of triples
+        self.triples: OrderedSet[Triple] = OrderedSet()
+        self.named_individual: OrderedSet[Tuple[str, str]] = OrderedSet()
         self.tuple_label_dict = tuple_label_dict
         self.ignore_label_list = ignore_label_list
 
@@ -37,22 +43,51 @@ class TripleExtractor:
         Initiates all processing and triple extraction of the document.
 
         :param document: The document object to be processed
+        :return: The triples extracted from the document
         """
+        triples = list(self.iter_triples(document))
+        # Function from rdf.RdfCreator, writes triples to file
+        store_rdf_triples(triples, self.graph_name)
+
+        return triples
+
+    def stream_publication(self, document: Document) -> None:
+        """
+        Initiates all processing and triple extraction of the document, like process_publication, but streams the
+        triples to the serializer as they are extracted instead of collecting them first.
+
+        :param document: The document object to be processed
+        """
+        store_rdf_triples(self.iter_triples(document), self.graph_name)
+
+    def iter_triples(self, document: Document) -> Iterator[Triple]:
+        """
+        Extracts the triples of the document lazily, one article at a time, so only the triples of the article
+        being processed are held in memory.
+
+        Triples are deduplicated within an article. Named individuals are deduplicated within the whole document, and
+        their triples are yielded after the triples of the last article.
+
+        :param document: The document object to be processed
+        :return: An iterator over the triples extracted from the document
+        """
+        self.clear_stored_triples()
+        self.named_individual.clear()
+
         # Extract publication info and adds it to the RDF triples.
         self.extract_publication(document)
-        self.extract_content(document)
+        yield from self.triples.drain()
+        yield from self.extract_content(document)
         # Adds named individuals to the triples list.
         self._append_named_individual()
-        # Function from rdf.RdfCreator, writes triples to file
-        store_rdf_triples(self.triples, self.graph_name)
-
-        return self.triples
+        yield from self.triples.drain()
+        self.named_individual.clear()
 
     def clear_stored_triples(self):
         """
         Clears all triples in the triple list.
         """
-        self.triples = []
+        self.triples.clear()
 
     def return_ttl(self, document: Document) -> str:
         """
@@ -61,24 +96,17 @@ class TripleExtractor:
         :param document: The document to extract triples from
         :return: A string representation of the triples extracted
         """
-
-        # Extract publication info and adds it to the RDF triples.
-        self.extract_publication(document)
-        self.extract_content(document)
-        # Adds named individuals to the triples list.
-        self._append_named_individual()
-        # Function from rdf.RdfCreator, writes triples to file
-        return str(return_rdf_triples(self.triples))
+        # Function from rdf.RdfCreator, serializes the triples as they are extracted
+        return str(return_rdf_triples(self.iter_triples(document)))
 
     def _queue_named_individual(self, prop_1, prop_2) -> None:
         """
-        Adds the named individuals to the named_individual list if it's not already in it.
+        Adds the named individuals to the named_individual set if it's not already in it.
 
         :param prop_1: Name
         :param prop_2: Label
         """
-        if [prop_1, prop_2] not in self.named_individual:
-            self.named_individual.append([prop_1, prop_2])
+        self.named_individual.append((prop_1, prop_2))
 
     def extract_publication(self, document: Document) -> None:
         """
@@ -120,11 +148,12 @@ class TripleExtractor:
         else:
             return string
 
-    def _append_token(self, article: Article, pair: Tuple[str, str]):
+    def _append_token(self, article: Article, pair: Tuple[str, str], name: str = None):
         """
 
         :param article:
         :param pair:
+        :param name: The name of the entity as found in the text, if pair holds its canonical name
         """
         # Ensure formatting of the objects name is compatible, eg. Jens Jensen -> Jens_Jensen
         object_ref, object_label = pair
@@ -138,7 +167,8 @@ class TripleExtractor:
         self.triples.append(Triple(_subject, relation, _object))
         # Each entity given the name data property
         self.triples.append(
-            Triple(_object, generate_relation(RelationTypeConstants.KNOX_NAME), generate_literal(pair[0])))
+            Triple(_object, generate_relation(RelationTypeConstants.KNOX_NAME),
+                   generate_literal(name if name is not None else pair[0])))
 
     def _append_triples_literal(self, uri_types: List[str], uri_value: Any, relation_type: str, literal: str):
         """
@@ -191,7 +221,14 @@ class TripleExtractor:
             ))
 
     @abstractmethod
-    def extract_content(self, document: Document):
+    def extract_content(self, document: Document) -> Iterator[Triple]:
+        """
+        Extracts the triples of the articles of the document. Implementations append the triples of an article to
+        self.triples and yield them with self.triples.drain() before moving on to the next article.
+
+        :param document: The document to extract triples from
+        :return: An iterator over the triples of the articles
+        """
         pass
 
 
@@ -2,3 +2,6 @@ from .TripleExtractorEnum import TripleExtractorEnum
 from .NJTripleExtractor import NJTripleExtractor
 from .GFTripleExtractor import GFTripleExtractor
 from .TripleExtractor import TripleExtractor, Triple
+from .TextRewriter import TextRewriter
+from .Gazetteer import Gazetteer
+from .EntityCanonicalizer import EntityCanonicalizer
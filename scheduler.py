@@ -4,6 +4,8 @@ import os
 
 from os.path import exists
 from environment import EnvironmentVariables as Ev
+from exceptions import RequeueException
+from file_io.UploadSeenSet import UploadSeenSet
 
 # Instantiate EnvironmentVariables class for future use. Environment constants cannot be accessed without this
 Ev()
@@ -13,13 +15,17 @@ filePath = Ev.instance.get_value(Ev.instance.QUEUE_PATH)
 if not exists(filePath):
     os.mkdir(filePath)
 
+# The key under which a queue file records what is left to do for a document that was only partly processed, see
+# RequeueException. It is not part of the uploaded document
+QUEUE_STATE = "knowledge_layer_queue_state"
+
 
 def queue(callBack):
     # Creates a list of all files in the folder defined as filePath.
     list_of_files = os.listdir(filePath)
 
     for file in sorted(list_of_files):
-
+        content = None
         try:
             with open(filePath + file) as json_file:
                 content = json.load(json_file)
@@ -34,13 +40,38 @@ def queue(callBack):
             logging.LogF.log(f"{len(os.listdir(filePath))} files left in queue")
         except ConnectionError as error:
             logging.LogF.log("Connection error: Adding to queue again")
+        except RequeueException as error:
+            # The file is replaced by what is left to do, and processed again in the next round
+            with open(filePath + file, "w", encoding="utf-8") as json_file:
+                json.dump(error.content, json_file)
+            logging.LogF.log("Partly processed: Kept in queue")
+            logging.LogF.log("Error with message: " + error.message)
         except Exception as error:
             logging.LogF.log("Unexpected error: Removed from queue")
             logging.LogF.log("Error with message: " + str(error))
             os.remove(filePath + file)
+            forget_upload(content)
+
+
+def forget_upload(content):
+    """
+    Removes the content hash of a document removed from the queue unprocessed from the UploadSeenSet, so uploading it
+    again is not rejected as a duplicate.
+
+    :param content: The content of the queue file, or None if it could not be read
+    """
+    seen_set = UploadSeenSet.get_instance()
+    if seen_set is None or not isinstance(content, dict):
+        return
+    # The hash was taken of the document as uploaded, before any state was added to it
+    upload = {key: value for key, value in content.items() if key != QUEUE_STATE}
+    seen_set.remove(UploadSeenSet.content_hash(upload))
 
 
-def scheduler(sc, callBack):
+def scheduler(sc, callBack, idleCallBack=None):
     logging.LogF.log("No more files! \nWaiting for 30 seconds before rerun.")
     queue(callBack)
-    sc.enter(30, 1, scheduler, (sc, callBack))
\ No newline at end of file
+    # Called once the queue has been emptied, e.g. to flush exports
+    if idleCallBack is not None:
+        idleCallBack()
+    sc.enter(30, 1, scheduler, (sc, callBack, idleCallBack))
\ No newline at end of file
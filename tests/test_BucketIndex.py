@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch
+
+import numpy
+
+from utils import BucketIndex
+
+
+class BucketIndexTest(unittest.TestCase):
+
+    def test_candidates__min_shared__only_ids_in_enough_buckets(self):
+        # Arrange
+        index = BucketIndex()
+        index.add(1, [10, 20, 30])
+        index.add(2, [10, 21, 31])
+        index.add(3, [11, 20, 30])
+
+        # Act
+        one = index.candidates([10, 20, 30])
+        two = index.candidates([10, 20, 30], min_shared=2)
+
+        # Assert
+        assert one == [1, 2, 3]
+        assert two == [1, 3]
+
+    @patch.object(BucketIndex, "MERGE_SIZE", 2)
+    def test_candidates__merged_and_recent_ids__both_found(self):
+        # Arrange
+        index = BucketIndex()
+        index.add(1, [10, 20])
+        index.add(2, [10, 21])
+        index.add(3, [10, 20])
+
+        # Act
+        candidates = index.candidates([10, 20], min_shared=2)
+
+        # Assert
+        assert candidates == [1, 3]
+        assert len(index) == 6
+
+    def test_extend__many_ids__found_by_bucket(self):
+        # Arrange
+        index = BucketIndex()
+        buckets = numpy.array([[5, 100], [6, 100], [5, 101]], dtype=numpy.uint32)
+
+        # Act
+        index.extend(numpy.array([7, 8, 9]), buckets)
+
+        # Assert
+        assert index.candidates([5]) == [7, 9]
+        assert index.candidates([100, 6], min_shared=2) == [8]
+        assert index.candidates([4, 102]) == []
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+from model import Article
+
+
+class ArticleTest(unittest.TestCase):
+
+    def test_id__no_id_assigned__derived_from_title_and_path(self):
+        # Arrange
+        article = Article("Title", "Body", "/path/to/file")
+
+        # Act
+        article_id = article.id
+
+        # Assert
+        assert article_id == Article.derive_id("Title", "/path/to/file")
+        assert len(article_id) == 32
+
+    def test_id__id_assigned__returned(self):
+        # Arrange
+        article = Article("Title", "Body", "/path/to/file", article_id="1")
+
+        # Act
+        article_id = article.id
+
+        # Assert
+        assert article_id == "1"
+
+    def test_derive_id__same_in_other_process(self):
+        # Arrange
+        code = "from model import Article; print(Article.derive_id('Title', '/path/to/file'))"
+        root = os.path.join(os.path.dirname(__file__), "..")
+
+        # Act
+        other = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+
+        # Assert
+        assert other.stdout.strip() == Article.derive_id("Title", "/path/to/file")
+
+    def test_derive_id__fields_not_confused(self):
+        # Act
+        first = Article.derive_id("ab", "c")
+        second = Article.derive_id("a", "bc")
+
+        # Assert
+        assert first != second
+
+    @patch.dict(os.environ, {"LEGACY_ARTICLE_IDS": "true"})
+    def test_derive_id__legacy_ids__builtin_hash(self):
+        # Act
+        article_id = Article.derive_id("Title", "/path/to/file")
+
+        # Assert
+        assert article_id == str(hash("Title" + "/path/to/file"))
+
+    def test_body__from_paragraphs__joined(self):
+        # Arrange
+        article = Article("Title", path="/path/to/file", paragraphs=["First paragraph.", "Second paragraph."])
+
+        # Act
+        body = article.body
+
+        # Assert
+        assert body == " First paragraph. Second paragraph."
+        assert article.paragraphs == ["First paragraph.", "Second paragraph."]
+
+    def test_body__no_paragraphs__empty(self):
+        # Arrange
+        article = Article("Title", path="/path/to/file", paragraphs=[])
+
+        # Act
+        body = article.body
+
+        # Assert
+        assert body == ""
+
+    def test_body__set__replaces_paragraphs(self):
+        # Arrange
+        article = Article("Title", path="/path/to/file", paragraphs=["First paragraph.", "Second paragraph."])
+
+        # Act
+        article.body = "New body"
+
+        # Assert
+        assert article.body == "New body"
+        assert article.paragraphs == ["New body"]
+
+    def test_paragraphs__set__body_joined_again(self):
+        # Arrange
+        article = Article("Title", "Old body", "/path/to/file")
+
+        # Act
+        article.paragraphs = [paragraph.upper() for paragraph in ["one", "two"]]
+
+        # Assert
+        assert article.body == " ONE TWO"
+
+    def test_article__slotted__no_instance_dict(self):
+        # Arrange
+        article = Article("Title", "Body", "/path/to/file")
+
+        # Act
+        has_dict = hasattr(article, "__dict__")
+
+        # Assert
+        assert not has_dict
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,3 +34,22 @@ class DocumentClassifierTest(unittest.TestCase):
         assert publisher == expected[0]
         assert body == expected[1]
         assert path == expected[2]
+
+    def test__construct_document_gf__not_pre_processed(self):
+        # Arrange
+        json_input = classifier_gf_json
+        expected = [
+            "Grundfos A/S",
+            "Grundfosliterature-6253430",
+            " I am a Grundfos paragraph! 2nd paragraph.",
+            None
+        ]
+
+        # Act
+        actual = self.classifier.construct_document(json_input)
+
+        # Assert
+        assert actual.publisher == expected[0]
+        assert actual.publication == expected[1]
+        assert actual.articles[0].body == expected[2]
+        assert actual.date == expected[3]
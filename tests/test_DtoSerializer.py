@@ -0,0 +1,56 @@
+import dataclasses
+import gzip
+import json
+import unittest
+from unittest.mock import patch
+
+from data_access import DtoSerializer
+from utils import http_client
+from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
+from model.Word import Word
+
+
+def generate_dto():
+    return DocumentWordCountDto("Æblegrød \"med\" fløde", "/path/1", 3, [Word("æble", 2), Word("grød", 1)],
+                                "Publisher")
+
+
+class DtoSerializerTest(unittest.TestCase):
+
+    def test_encode__matches_asdict(self):
+        # Arrange
+        dto = generate_dto()
+
+        # Act
+        encoded = DtoSerializer.encode(dto)
+
+        # Assert
+        assert json.loads(encoded) == dataclasses.asdict(dto)
+
+    @patch('data_access.DtoSerializer.orjson', None)
+    def test_encode__stdlib_fallback__matches_asdict(self):
+        # Arrange
+        dto = generate_dto()
+
+        # Act
+        encoded = DtoSerializer.encode(dto)
+
+        # Assert
+        assert json.loads(encoded) == dataclasses.asdict(dto)
+
+    def test_iter_json_array__gzip__valid_array(self):
+        # Arrange
+        encoded_objects = [DtoSerializer.encode(generate_dto()) for _ in range(3)]
+
+        # Act
+        body = b"".join(http_client.iter_gzip(DtoSerializer.iter_json_array(encoded_objects)))
+
+        # Assert
+        assert json.loads(gzip.decompress(body)) == 3 * [dataclasses.asdict(generate_dto())]
+
+    def test_iter_json_array__no_objects__empty_array(self):
+        # Act
+        body = b"".join(DtoSerializer.iter_json_array([]))
+
+        # Assert
+        assert body == b"[]"
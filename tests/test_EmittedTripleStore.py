@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+from rdflib import Literal, URIRef
+from rdflib.namespace import RDF, OWL
+
+from data_access import EmittedTripleStore, Outbox
+from rdf.RdfCreator import store_rdf_triples, send_outbox_triples
+
+PERSON = URIRef("http://www.Knox.test/Person/Bob")
+TRIPLES = [(PERSON, RDF.type, OWL.NamedIndividual),
+           (PERSON, URIRef("http://www.Knox.test/name"), Literal("Bob"))]
+
+
+class EmittedTripleStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = EmittedTripleStore(os.path.join(self.directory.name, "emitted.sqlite"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_filter_new__committed_triples__left_out(self):
+        # Arrange
+        pending = []
+        list(self.store.filter_new("NJ", TRIPLES[:1], pending))
+        self.store.commit("NJ", pending)
+        pending = []
+
+        # Act
+        new = list(self.store.filter_new("NJ", TRIPLES, pending))
+
+        # Assert
+        assert new == TRIPLES[1:]
+        assert pending == [EmittedTripleStore.triple_hash(TRIPLES[1])]
+
+    def test_filter_new__not_committed__passed_again(self):
+        # Arrange
+        list(self.store.filter_new("NJ", TRIPLES, []))
+
+        # Act
+        new = list(self.store.filter_new("NJ", TRIPLES, []))
+
+        # Assert
+        assert new == TRIPLES
+
+    def test_filter_new__other_graph__passed(self):
+        # Arrange
+        pending = []
+        list(self.store.filter_new("NJ", TRIPLES, pending))
+        self.store.commit("NJ", pending)
+
+        # Act
+        new = list(self.store.filter_new("GF", TRIPLES, []))
+
+        # Assert
+        assert new == TRIPLES
+
+    def test_filter_new__resync__all_passed_once(self):
+        # Arrange
+        pending = []
+        list(self.store.filter_new("NJ", TRIPLES, pending))
+        self.store.commit("NJ", pending)
+
+        # Act
+        new = list(self.store.filter_new("NJ", TRIPLES + TRIPLES, [], resync=True))
+
+        # Assert
+        assert new == TRIPLES
+
+    def test_triple_hash__literal_and_iri_differ(self):
+        # Act
+        literal_hash = EmittedTripleStore.triple_hash((PERSON, RDF.value, Literal("http://example.org/")))
+        iri_hash = EmittedTripleStore.triple_hash((PERSON, RDF.value, URIRef("http://example.org/")))
+
+        # Assert
+        assert literal_hash != iri_hash
+
+    @patch('rdf.RdfCreator.Outbox.get_instance', return_value=None)
+    @patch('rdf.RdfCreator.send_turtle')
+    def test_store_rdf_triples__sent_before__only_new_triples_sent(self, mock_send, mock_outbox):
+        # Arrange
+        with patch('rdf.RdfCreator.EmittedTripleStore.get_instance', return_value=self.store):
+            store_rdf_triples(TRIPLES[:1], "NJ")
+
+            # Act
+            store_rdf_triples(TRIPLES, "NJ")
+            store_rdf_triples(TRIPLES, "NJ")
+
+        # Assert
+        assert mock_send.call_count == 2
+        second_upload = mock_send.call_args_list[1][0][0]
+        assert b"Bob" in second_upload and b"NamedIndividual" not in second_upload
+        assert self.store.count("NJ") == 2
+
+    @patch('rdf.RdfCreator.Outbox.get_instance', return_value=None)
+    @patch('rdf.RdfCreator.send_turtle', side_effect=ConnectionError)
+    def test_store_rdf_triples__upload_failed__not_recorded(self, mock_send, mock_outbox):
+        # Arrange
+        with patch('rdf.RdfCreator.EmittedTripleStore.get_instance', return_value=self.store):
+            # Act
+            self.assertRaises(ConnectionError, store_rdf_triples, TRIPLES, "NJ")
+
+        # Assert
+        assert self.store.count("NJ") == 0
+
+
+    @patch('rdf.RdfCreator.send_turtle')
+    def test_store_rdf_triples__outbox__recorded_once_delivered(self, mock_send):
+        # Arrange
+        outbox = Outbox(os.path.join(self.directory.name, "outbox.sqlite"), poll_interval=0, max_backoff=0)
+        outbox.register_handler(Outbox.TRIPLES, send_outbox_triples)
+        with patch('rdf.RdfCreator.EmittedTripleStore.get_instance', return_value=self.store), \
+                patch('rdf.RdfCreator.Outbox.get_instance', return_value=outbox):
+            store_rdf_triples(TRIPLES, "NJ")
+            stored_count = self.store.count("NJ")
+
+            # Act
+            outbox.ship()
+
+        # Assert
+        assert stored_count == 0
+        assert self.store.count("NJ") == 2
+        assert mock_send.call_args[0][1] == "NJ"
+        assert mock_send.call_args[0][0].startswith(b"<http")
+
+    @patch('rdf.RdfCreator.send_turtle',
+           side_effect=requests.exceptions.HTTPError(response=MagicMock(status_code=400)))
+    def test_store_rdf_triples__outbox_payload_rejected__not_recorded(self, mock_send):
+        # Arrange
+        outbox = Outbox(os.path.join(self.directory.name, "outbox.sqlite"), poll_interval=0, max_backoff=0)
+        outbox.register_handler(Outbox.TRIPLES, send_outbox_triples)
+        with patch('rdf.RdfCreator.EmittedTripleStore.get_instance', return_value=self.store), \
+                patch('rdf.RdfCreator.Outbox.get_instance', return_value=outbox):
+            store_rdf_triples(TRIPLES, "NJ")
+
+            # Act
+            outbox.ship()
+
+        # Assert
+        assert mock_send.call_count == 1
+        assert self.store.count("NJ") == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
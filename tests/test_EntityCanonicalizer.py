@@ -0,0 +1,225 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+import numpy
+import spacy
+from spacy.util import is_package
+
+from rdf.extractor import EntityCanonicalizer
+
+
+class EntityCanonicalizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.canonicalizer = EntityCanonicalizer()
+
+    def test_canonicalize__case_punctuation_possessive__merged(self):
+        # Act
+        canonical = self.canonicalizer.canonicalize(["Jens Hansen", "JENS  HANSEN", "Jens Hansen's", "Jens-Hansen"],
+                                                    "PER")
+
+        # Assert
+        assert canonical == ["Jens Hansen"] * 4
+        assert len(self.canonicalizer) == 1
+
+    def test_canonicalize__similar_variant__merged_across_batches(self):
+        # Arrange
+        self.canonicalizer.canonicalize(["Mette Frederiksen"], "PER")
+
+        # Act
+        canonical = self.canonicalizer.canonicalize(["Mette Frederiksens"], "PER")
+
+        # Assert
+        assert canonical == ["Mette Frederiksen"]
+
+    def test_canonicalize__swapped_words__not_merged(self):
+        # Act
+        canonical = self.canonicalizer.canonicalize(["Jens Hansen", "Hans Jensen"], "PER")
+
+        # Assert
+        assert canonical == ["Jens Hansen", "Hans Jensen"]
+
+    def test_canonicalize__other_label__not_merged(self):
+        # Arrange
+        self.canonicalizer.canonicalize(["Aalborg"], "LOC")
+
+        # Act
+        canonical = self.canonicalizer.canonicalize(["Aalborg"], "ORG")
+
+        # Assert
+        assert canonical == ["Aalborg"]
+        assert len(self.canonicalizer) == 2
+
+    def test_canonicalize__similar_surnames_with_close_word_vectors__not_merged(self):
+        # Arrange
+        nlp = spacy.blank("da")
+        for word in ["jens", "pedersen", "petersen"]:
+            nlp.vocab.set_vector(word, numpy.ones(4, dtype=numpy.float32))
+        canonicalizer = EntityCanonicalizer(nlp)
+
+        # Act
+        canonical = canonicalizer.canonicalize(["Jens Pedersen", "Jens Petersen"], "PER")
+
+        # Assert
+        assert canonical == ["Jens Pedersen", "Jens Petersen"]
+
+    def test_canonicalize__stored_in_file__same_canonical_names_in_new_instance(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "entities.sqlite")
+            EntityCanonicalizer(path=path).canonicalize(["Mette Frederiksen"], "PER")
+
+            # Act
+            canonical = EntityCanonicalizer(path=path).canonicalize(["Mette Frederiksens", "METTE FREDERIKSEN"],
+                                                                    "PER")
+
+        # Assert
+        assert canonical == ["Mette Frederiksen", "Mette Frederiksen"]
+
+    def test_canonicalize__not_recorded__new_names_not_stored(self):
+        # Arrange
+        self.canonicalizer.canonicalize(["Mette Frederiksen"], "PER")
+
+        # Act
+        preview = self.canonicalizer.canonicalize(["Mette Frederiksens", "Jens Hansen"], "PER", record=False)
+        canonical = self.canonicalizer.canonicalize(["Jens Hansen's"], "PER")
+
+        # Assert
+        assert preview == ["Mette Frederiksen", "Jens Hansen"]
+        assert canonical == ["Jens Hansen's"]
+        assert len(self.canonicalizer) == 2
+
+    def test_canonicalize__only_punctuation__returned_as_is_not_stored(self):
+        # Act
+        canonical = self.canonicalizer.canonicalize(["'s", "—", "Jens Hansen"], "PER")
+
+        # Assert
+        assert canonical == ["'s", "—", "Jens Hansen"]
+        assert len(self.canonicalizer) == 1
+
+    def test_canonicalize__stored_by_other_instance__merged(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "entities.sqlite")
+            first, second = EntityCanonicalizer(path=path), EntityCanonicalizer(path=path)
+            second.canonicalize(["Jens Hansen"], "PER")
+            first.canonicalize(["Mette Frederiksen"], "PER")
+
+            # Act
+            canonical = second.canonicalize(["Mette Frederiksens"], "PER")
+
+        # Assert
+        assert canonical == ["Mette Frederiksen"]
+
+    def test_init__file_with_other_settings__raises(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "entities.sqlite")
+            EntityCanonicalizer(path=path)
+
+            # Act & Assert
+            with self.assertRaises(Exception):
+                EntityCanonicalizer(path=path, bits=8)
+
+    def test_vector__model_with_vectors__word_vectors_joined(self):
+        # Arrange
+        nlp = spacy.blank("da")
+        nlp.vocab.set_vector("aalborg", numpy.ones(4, dtype=numpy.float32))
+        canonicalizer = EntityCanonicalizer(nlp)
+
+        # Act
+        vector = canonicalizer.vector("aalborg")
+
+        # Assert
+        assert len(vector) == EntityCanonicalizer.TRIGRAM_DIMENSIONS + 4
+        assert numpy.isclose(numpy.linalg.norm(vector), 1)
+        assert numpy.isclose(numpy.linalg.norm(vector[EntityCanonicalizer.TRIGRAM_DIMENSIONS:]) ** 2, 0.5)
+
+
+class EntityCanonicalizerBenchmarkTest(unittest.TestCase):
+    """
+    Stores ENTITY_CANONICALIZER_BENCHMARK_NAMES generated person names, 100000 by default, in a file, and times storing
+    and looking up names. The names share first names and surname endings, as Danish names do, so many of them are
+    close without being variants of each other.
+    """
+
+    FIRST_NAMES = ["anne", "kirsten", "hanne", "mette", "anna", "helle", "susanne", "lene", "maria", "marianne",
+                   "inge", "karen", "lone", "bente", "camilla", "pia", "charlotte", "jette", "louise", "tina", "peter",
+                   "michael", "lars", "jens", "thomas", "henrik", "søren", "christian", "martin", "jan", "morten",
+                   "jesper", "anders", "niels", "mads", "rasmus", "per", "hans", "ole", "mikkel"]
+    SURNAME_STEMS = ["jen", "han", "nie", "ped", "ander", "chri", "lar", "ras", "jør", "mad", "pet", "mik", "hen",
+                     "kri", "poul", "knud", "thom", "mort", "jes", "jak", "fred", "ib", "sven", "erik", "aage", "bent",
+                     "carl", "dan", "emil", "finn", "gert", "holg", "ivar", "jon", "karl", "leif", "max", "nils", "otto",
+                     "palle", "rolf", "stig", "tage", "uffe", "vagn", "walt", "axel"]
+
+    @classmethod
+    def names(cls, count: int):
+        generator = random.Random(0)
+        names = set()
+        while len(names) < count:
+            surname = generator.choice(cls.SURNAME_STEMS) + "".join(
+                generator.choice("aeiouylnrst") for _ in range(generator.randint(1, 3))) + "sen"
+            names.add(generator.choice(cls.FIRST_NAMES).capitalize() + " " + surname.capitalize())
+        return sorted(names)
+
+    def test_canonicalize__realistic_number_of_names__within_time(self):
+        # Arrange
+        count = int(os.environ.get("ENTITY_CANONICALIZER_BENCHMARK_NAMES", 100000))
+        names = self.names(count + 1000)
+        generator = random.Random(1)
+        generator.shuffle(names)
+        stored, looked_up = names[:count], names[count:]
+        with tempfile.TemporaryDirectory() as directory:
+            canonicalizer = EntityCanonicalizer(path=os.path.join(directory, "entities.sqlite"))
+            start = time.perf_counter()
+            for batch in range(0, count, 1000):
+                canonicalizer.canonicalize(stored[batch:batch + 1000], "PER")
+            store_time = (time.perf_counter() - start) / count
+
+            # Act
+            start = time.perf_counter()
+            for name in looked_up:
+                canonicalizer.canonicalize([name], "PER", record=False)
+            look_up_time = (time.perf_counter() - start) / len(looked_up)
+            variants = canonicalizer.canonicalize([name + "s" for name in stored[:100]], "PER", record=False)
+            canonical = canonicalizer.canonicalize(stored[:100], "PER", record=False)
+
+        # Assert
+        print("Stored in {:.3f} ms and looked up in {:.3f} ms per name".format(store_time * 1000, look_up_time * 1000))
+        assert store_time < 0.002
+        assert look_up_time < 0.002
+        assert sum(variant == name for variant, name in zip(variants, canonical)) >= 90
+
+
+@unittest.skipUnless(is_package("da_core_news_lg"), "da_core_news_lg is not installed")
+class EntityCanonicalizerModelTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nlp = spacy.load("da_core_news_lg")
+
+    def setUp(self):
+        self.canonicalizer = EntityCanonicalizer(self.nlp)
+
+    def test_canonicalize__distinct_surnames__not_merged(self):
+        # Act
+        canonical = self.canonicalizer.canonicalize(
+            ["Jens Pedersen", "Jens Petersen", "Anne Hansen", "Anne Jensen", "Pedersen", "Petersen"], "PER")
+
+        # Assert
+        assert canonical == ["Jens Pedersen", "Jens Petersen", "Anne Hansen", "Anne Jensen", "Pedersen", "Petersen"]
+
+    def test_canonicalize__variants__merged(self):
+        # Act
+        canonical = self.canonicalizer.canonicalize(
+            ["Mette Frederiksen", "Mette Frederiksens", "METTE FREDERIKSEN", "Mette Frederiksen's"], "PER")
+
+        # Assert
+        assert canonical == ["Mette Frederiksen"] * 4
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+
+import spacy
+from spacy.tokens import Span
+
+from rdf.extractor import Gazetteer
+
+
+class GazetteerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.patterns_path = os.path.join(self.directory.name, "patterns.jsonl")
+        self.gazetteer_path = os.path.join(self.directory.name, "patterns.gazetteer")
+        patterns = [{"label": "Pump", "pattern": "SQ/SQE"}, {"label": "Pump", "pattern": "Unilift CC5"},
+                    {"label": "Pump", "pattern": "Unilift CC5 A1"}, {"label": "Liquid", "pattern": "water"}]
+        with open(self.patterns_path, "w") as patterns_file:
+            patterns_file.write("\n".join(json.dumps(pattern) for pattern in patterns))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_call__same_entities_as_entity_ruler(self):
+        # Arrange
+        ruler_nlp = spacy.blank("en")
+        ruler_nlp.add_pipe("entity_ruler").from_disk(self.patterns_path)
+        nlp = spacy.blank("en")
+        Gazetteer.compile(nlp, self.patterns_path, self.gazetteer_path)
+        nlp.add_pipe("gazetteer", config={"path": self.gazetteer_path})
+        text = "The Unilift CC5 A1 and SQ/SQE pump water, unlike the Unilift CC5 or Unilift CC6."
+
+        # Act
+        expected = [(entity.text, entity.label_) for entity in ruler_nlp(text).ents]
+        actual = [(entity.text, entity.label_) for entity in nlp(text).ents]
+
+        # Assert
+        assert actual == expected
+        assert ("Unilift CC5 A1", "Pump") in actual
+
+    def test_call__existing_entities_kept(self):
+        # Arrange
+        nlp = spacy.blank("en")
+        Gazetteer.compile(nlp, self.patterns_path, self.gazetteer_path)
+        gazetteer = Gazetteer(nlp, "gazetteer", self.gazetteer_path)
+        doc = nlp.make_doc("Unilift CC5 pumps water")
+        doc.ents = [Span(doc, 0, 1, label="Other")]
+
+        # Act
+        actual = [(entity.text, entity.label_) for entity in gazetteer(doc).ents]
+
+        # Assert
+        assert actual == [("Unilift", "Other"), ("water", "Liquid")]
+
+    def test_is_compiled__patterns_changed__false(self):
+        # Arrange
+        nlp = spacy.blank("en")
+        Gazetteer.compile(nlp, self.patterns_path, self.gazetteer_path)
+
+        # Act
+        with open(self.patterns_path, "a") as patterns_file:
+            patterns_file.write('\n{"label": "Pump", "pattern": "Magna3"}')
+
+        # Assert
+        assert not Gazetteer.is_compiled(nlp, self.patterns_path, self.gazetteer_path)
+
+    def test_compile__token_patterns__not_compiled(self):
+        # Arrange
+        with open(self.patterns_path, "w") as patterns_file:
+            patterns_file.write('{"label": "Pump", "pattern": [{"LOWER": "sq"}]}')
+
+        # Act
+        compiled = Gazetteer.compile(spacy.blank("en"), self.patterns_path, self.gazetteer_path)
+
+        # Assert
+        assert not compiled
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from rdflib import Literal, URIRef
+from rdflib.namespace import RDF, OWL
+
+from data_access import LocalTripleStore
+from rdf.RdfCreator import KNOX
+
+ARTICLE = URIRef("http://www.Knox.test/Article/1")
+PERSON = URIRef("http://www.Knox.test/Person/Bob")
+LOCATION = URIRef("http://www.Knox.test/Location/Aalborg")
+TRIPLES = [(ARTICLE, KNOX.mentions, PERSON),
+           (ARTICLE, KNOX.mentions, LOCATION),
+           (PERSON, RDF.type, OWL.NamedIndividual),
+           (ARTICLE, KNOX.ArticleTitle, Literal('A "quoted" \\ title\nwith lines'))]
+
+
+class LocalTripleStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = LocalTripleStore(os.path.join(self.directory.name, "triples.sqlite"))
+        self.store.add_all(TRIPLES, "NJ")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_match__subject_and_predicate(self):
+        # Act
+        matches = self.store.match(subject=ARTICLE, predicate=KNOX.mentions)
+
+        # Assert
+        assert set(matches) == {TRIPLES[0], TRIPLES[1]}
+
+    def test_match__object__subjects_found(self):
+        # Act
+        matches = self.store.match(_object=PERSON)
+
+        # Assert
+        assert matches == [TRIPLES[0]]
+
+    def test_match__literal__round_trips(self):
+        # Act
+        matches = self.store.match(subject=ARTICLE, predicate=KNOX.ArticleTitle)
+
+        # Assert
+        assert matches == [TRIPLES[3]]
+
+    def test_match__unknown_term__nothing(self):
+        # Act
+        matches = self.store.match(subject=URIRef("http://www.Knox.test/Article/2"))
+
+        # Assert
+        assert matches == []
+
+    def test_match__other_graph__nothing(self):
+        # Act
+        matches = self.store.match(subject=ARTICLE, graph_name="GF")
+
+        # Assert
+        assert matches == []
+
+    def test_tee__stored_while_passed_on(self):
+        # Arrange
+        triple = (LOCATION, RDF.type, OWL.NamedIndividual)
+
+        # Act
+        passed = list(self.store.tee([triple, TRIPLES[0]], "NJ"))
+
+        # Assert
+        assert passed == [triple, TRIPLES[0]]
+        assert self.store.match(subject=LOCATION) == [triple]
+        assert self.store.count() == len(TRIPLES) + 1
+
+    def test_match__negative_limit__error_thrown(self):
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            self.store.match(limit=-1)
+
+    def test_match__pages__each_triple_once(self):
+        # Arrange
+        self.store.add_all(TRIPLES, "GF")
+
+        # Act
+        pages = [self.store.match(limit=3, offset=offset) for offset in range(0, 6, 3)]
+
+        # Assert
+        assert len(pages[0]) == 3
+        assert sorted(pages[0] + pages[1]) == sorted(TRIPLES)
+        assert pages == [self.store.match(limit=3, offset=offset) for offset in range(0, 6, 3)]
+
+
+if __name__ == '__main__':
+    unittest.main()
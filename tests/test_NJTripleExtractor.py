@@ -41,10 +41,9 @@ class TripleExtractorTests(unittest.TestCase):
         cls.spacy_model = load_model(spacy_model)
         cls.triple_extractor = NJTripleExtractor(spacy_model)
 
-    @patch('requests.post')
-    def test_process_publication__one_article__list_of_triples(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__one_article__list_of_triples(self, mock_session):
         # Arrange
-        mock_post.return_value = True
         articles = [Article(title="ArticleTest",
                             body="For at give et eksempel på hvad social ulighed i sundhed egentligt kan betyde, vil vi ved hjælp af data fra Sundhedsstyrelsen og de to eksperter gennemgå en række udvalgte faktorer med to fiktive kvinder. En højtuddannet kvinde og en kvinde, der udelukkende har færdiggjort folkeskolen." +
                                  "Begge kvinder er 30 år, og vi kalder dem henholdsvis for Tinna og Alice. Tinna er ufaglært lagermedarbejder, og Alice er uddannet jurist. Dermed er der også forskel i kvindernes indkomst, hvor Alice tjener mere end Tinna.",
@@ -56,10 +55,9 @@ class TripleExtractorTests(unittest.TestCase):
         is_of_type_triple = [isinstance(v, Triple) for v in result]
         self.assertTrue(all(is_of_type_triple))
 
-    @patch('requests.post')
-    def test_process_publication__multiple_article__list_of_triples(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__multiple_article__list_of_triples(self, mock_session):
         # Arrange
-        mock_post.return_value = True
         articles = 20 * [Article(title="ArticleTest",
                             body="For at give et eksempel på hvad social ulighed i sundhed egentligt kan betyde, vil vi ved hjælp af data fra Sundhedsstyrelsen og de to eksperter gennemgå en række udvalgte faktorer med to fiktive kvinder. En højtuddannet kvinde og en kvinde, der udelukkende har færdiggjort folkeskolen." +
                                  "Begge kvinder er 30 år, og vi kalder dem henholdsvis for Tinna og Alice. Tinna er ufaglært lagermedarbejder, og Alice er uddannet jurist. Dermed er der også forskel i kvindernes indkomst, hvor Alice tjener mere end Tinna.",
@@ -71,10 +69,9 @@ class TripleExtractorTests(unittest.TestCase):
         is_of_type_triple = [isinstance(v, Triple) for v in result]
         self.assertTrue(all(is_of_type_triple))
 
-    @patch('requests.post')
-    def test_process_publication__publication_as_integer__error_thrown(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__publication_as_integer__error_thrown(self, mock_session):
         # Arrange
-        mock_post.return_value = True
         articles = [Article(title="ArticleTest",
                             body="For at give et eksempel på hvad social ulighed i sundhed egentligt kan betyde, vil vi ved hjælp af data fra Sundhedsstyrelsen og de to eksperter gennemgå en række udvalgte faktorer med to fiktive kvinder. En højtuddannet kvinde og en kvinde, der udelukkende har færdiggjort folkeskolen." +
                                  "Begge kvinder er 30 år, og vi kalder dem henholdsvis for Tinna og Alice. Tinna er ufaglært lagermedarbejder, og Alice er uddannet jurist. Dermed er der også forskel i kvindernes indkomst, hvor Alice tjener mere end Tinna.",
@@ -86,10 +83,9 @@ class TripleExtractorTests(unittest.TestCase):
         self.assertRaises(AttributeError, result)
 
 
-    @patch('requests.post')
-    def test_process_publication__body_invalid_character__no_error_thrown(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__body_invalid_character__no_error_thrown(self, mock_session):
         # Arrange
-        mock_post.return_value = True
         articles = [Article(title="ArticleTest",
                             body="For — переменная + 變量 + ตัวแปร",
                             path="/this/is/test/path", article_id="1")]
@@ -101,10 +97,9 @@ class TripleExtractorTests(unittest.TestCase):
         self.assertTrue(all(is_of_type_triple))
 
 
-    @patch('requests.post')
-    def test_process_publication__non_required_fields_missing__list_of_triples(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__non_required_fields_missing__list_of_triples(self, mock_session):
         # Arrange
-        mock_post.return_value = True
         byline = Byline(name="Carlo, Harlo")
         articles = [Article(title="ArticleTest",
                             body="For at give et eksempel på hvad social ulighed i sundhed egentligt kan betyde, vil vi ved hjælp af data fra Sundhedsstyrelsen og de to eksperter gennemgå en række udvalgte faktorer med to fiktive kvinder. En højtuddannet kvinde og en kvinde, der udelukkende har færdiggjort folkeskolen." +
@@ -118,10 +113,9 @@ class TripleExtractorTests(unittest.TestCase):
         self.assertTrue(all(is_of_type_triple))
 
 
-    @patch('requests.post')
-    def test_process_publication__non_required_fields_present__list_of_triples(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__non_required_fields_present__list_of_triples(self, mock_session):
         # Arrange
-        mock_post.return_value = True
         byline = Byline(name="Carlo, Harlo", email="presidentoftesting@knox.dk")
         articles = [Article(title="ArticleTest",
                             body="For at give et eksempel på hvad social ulighed i sundhed egentligt kan betyde, vil vi ved hjælp af data fra Sundhedsstyrelsen og de to eksperter gennemgå en række udvalgte faktorer med to fiktive kvinder. En højtuddannet kvinde og en kvinde, der udelukkende har færdiggjort folkeskolen." +
@@ -134,10 +128,9 @@ class TripleExtractorTests(unittest.TestCase):
         is_of_type_triple = [isinstance(v, Triple) for v in result]
         self.assertTrue(all(is_of_type_triple))
 
-    @patch('requests.post')
-    def test_process_publication__send_empty_article__list_of_triples(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__send_empty_article__list_of_triples(self, mock_session):
         #Arrange
-        mock_post.return_value = True
         document = Document(publisher="Test", publication="Test", articles=[], date="2021-07-27")
 
         #Act
@@ -147,10 +140,9 @@ class TripleExtractorTests(unittest.TestCase):
         #Assert
         self.assertTrue(all(is_of_type_triple))
     from rdf.RdfCreator import store_rdf_triples
-    @patch('requests.post')
-    def test_process_publication__send_empty_publisher__no_error_thrown(self, mock_post):
+    @patch('utils.http_client.get_session')
+    def test_process_publication__send_empty_publisher__no_error_thrown(self, mock_session):
         # Arrange
-        mock_post.return_value = True
         document = Document(publisher="", publication="Test", articles=[], date="2021-07-27")
 
         # Act
@@ -0,0 +1,56 @@
+import unittest
+
+from utils import OrderedSet
+
+
+class OrderedSetTest(unittest.TestCase):
+
+    def test_append__duplicate__dropped(self):
+        # Arrange
+        ordered_set = OrderedSet()
+
+        # Act
+        first = ordered_set.append(("Bob", "Person"))
+        second = ordered_set.append(("Bob", "Person"))
+
+        # Assert
+        assert first
+        assert not second
+        assert len(ordered_set) == 1
+
+    def test_iter__keeps_insertion_order(self):
+        # Arrange
+        ordered_set = OrderedSet(["c", "a"])
+
+        # Act
+        ordered_set.extend(["b", "a", "d"])
+
+        # Assert
+        assert list(ordered_set) == ["c", "a", "b", "d"]
+
+    def test_drain__yields_items_and_empties(self):
+        # Arrange
+        ordered_set = OrderedSet(["a", "b"])
+
+        # Act
+        drained = ordered_set.drain()
+        ordered_set.append("c")
+
+        # Assert
+        assert list(drained) == ["a", "b"]
+        assert list(ordered_set) == ["c"]
+
+    def test_clear__empty(self):
+        # Arrange
+        ordered_set = OrderedSet(["a", "b"])
+
+        # Act
+        ordered_set.clear()
+
+        # Assert
+        assert len(ordered_set) == 0
+        assert "a" not in ordered_set
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from data_access import Outbox
+
+
+def http_error(status_code):
+    return requests.exceptions.HTTPError(response=MagicMock(status_code=status_code))
+
+
+class OutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.outbox = Outbox(os.path.join(self.directory.name, "outbox.sqlite"), poll_interval=0, max_backoff=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_ship__handler_succeeds__payload_removed(self):
+        # Arrange
+        handler = MagicMock()
+        self.outbox.register_handler(Outbox.WORD_COUNT, handler)
+        self.outbox.put(Outbox.WORD_COUNT, b"first")
+        self.outbox.put(Outbox.WORD_COUNT, b"second")
+
+        # Act
+        delivered = self.outbox.ship()
+
+        # Assert
+        assert delivered == 2
+        assert [c.args[0] for c in handler.call_args_list] == [b"first", b"second"]
+        assert self.outbox.pending() == 0
+
+    def test_ship__connection_error__payload_kept(self):
+        # Arrange
+        handler = MagicMock(side_effect=requests.exceptions.ConnectionError())
+        self.outbox.register_handler(Outbox.TRIPLES, handler)
+        self.outbox.put(Outbox.TRIPLES, b"first")
+        self.outbox.put(Outbox.TRIPLES, b"second")
+
+        # Act
+        delivered = self.outbox.ship()
+
+        # Assert
+        assert delivered == 0
+        # The second payload is not attempted once the first has failed
+        assert handler.call_count == 1
+        assert self.outbox.pending() == 2
+
+    def test_ship__client_error__payload_marked_failed(self):
+        # Arrange
+        handler = MagicMock(side_effect=[http_error(400), None])
+        self.outbox.register_handler(Outbox.WORD_COUNT, handler)
+        self.outbox.put(Outbox.WORD_COUNT, b"rejected")
+        self.outbox.put(Outbox.WORD_COUNT, b"accepted")
+
+        # Act
+        delivered = self.outbox.ship()
+
+        # Assert
+        assert delivered == 1
+        assert self.outbox.pending() == 0
+
+    def test_ship__client_error__failure_handler_called(self):
+        # Arrange
+        failure_handler = MagicMock()
+        self.outbox.register_handler(Outbox.WORD_COUNT, MagicMock(side_effect=[http_error(503), http_error(400)]),
+                                     failure_handler)
+        self.outbox.put(Outbox.WORD_COUNT, b"rejected")
+
+        # Act
+        self.outbox.ship()
+        retried_calls = failure_handler.call_count
+        self.outbox.ship()
+
+        # Assert
+        assert retried_calls == 0
+        failure_handler.assert_called_once_with(b"rejected")
+
+    def test_ship__retry_after_failure__payload_delivered(self):
+        # Arrange
+        handler = MagicMock(side_effect=[http_error(503), None])
+        self.outbox.register_handler(Outbox.WORD_COUNT, handler)
+        self.outbox.put(Outbox.WORD_COUNT, b"payload")
+
+        # Act
+        first = self.outbox.ship()
+        second = self.outbox.ship()
+
+        # Assert
+        assert first == 0 and second == 1
+        assert self.outbox.pending() == 0
+
+    def test_ship__older_payload_of_group_not_due__payload_waits(self):
+        # Arrange
+        outbox = Outbox(os.path.join(self.directory.name, "grouped.sqlite"), poll_interval=60, max_backoff=60)
+        first_handler = MagicMock(side_effect=[http_error(503), None])
+        second_handler = MagicMock()
+        outbox.register_handler(Outbox.WORD_COUNT, first_handler)
+        outbox.register_handler(Outbox.WORD_COUNT_DELTA, second_handler, group=Outbox.WORD_COUNT)
+        outbox.put(Outbox.WORD_COUNT, b"first")
+        outbox.put(Outbox.WORD_COUNT_DELTA, b"second")
+
+        # Act
+        outbox.ship()
+        outbox.ship()
+
+        # Assert
+        second_handler.assert_not_called()
+        assert outbox.pending() == 2
+
+    def test_discard__matching_payloads__failure_handler_called(self):
+        # Arrange
+        handler = MagicMock()
+        failure_handler = MagicMock()
+        self.outbox.register_handler(Outbox.WORD_COUNT_DELTA, handler, failure_handler)
+        self.outbox.put(Outbox.WORD_COUNT_DELTA, b"discarded")
+        self.outbox.put(Outbox.WORD_COUNT_DELTA, b"kept")
+
+        # Act
+        discarded = self.outbox.discard(Outbox.WORD_COUNT_DELTA, lambda payload: payload == b"discarded")
+        self.outbox.ship()
+
+        # Assert
+        assert discarded == 1
+        failure_handler.assert_called_once_with(b"discarded")
+        handler.assert_called_once_with(b"kept")
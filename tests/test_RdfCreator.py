@@ -0,0 +1,184 @@
+import gzip
+import os
+import unittest
+import urllib.parse
+from unittest.mock import patch, MagicMock
+
+import requests
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF, OWL
+
+from rdf.RdfConstants import RelationTypeConstants
+from rdf.RdfCreator import generate_uri_reference, generate_relation, uri_reference_cache_info, KNOX, \
+    serialize_chunks, send_turtle, encode_outbox_triples, send_outbox_triples, RELATIONS, \
+    store_rdf_triples
+
+
+class RdfCreatorTest(unittest.TestCase):
+
+    def test_generate_uri_reference__quotes_sub_uris_and_ref(self):
+        # Arrange
+        namespace = "http://example.org/"
+
+        # Act
+        reference = generate_uri_reference(namespace, ["person", "local hero"], "Bob/The Man")
+
+        # Assert
+        assert reference == URIRef("http://example.org/person/local%20hero/Bob-The%20Man")
+
+    def test_generate_uri_reference__repeated__cache_hit(self):
+        # Arrange
+        first = generate_uri_reference("http://example.org/", ["Article"], "cached")
+        hits = uri_reference_cache_info().hits
+
+        # Act
+        second = generate_uri_reference("http://example.org/", ["Article"], "cached")
+
+        # Assert
+        assert second is first
+        assert uri_reference_cache_info().hits == hits + 1
+
+    def test_generate_relation__constants__same_as_namespaces(self):
+        # Arrange
+        # Act
+        # Assert
+        assert generate_relation(RelationTypeConstants.RDF_TYPE) == RDF.type
+        assert generate_relation("owl:NamedIndividual") == OWL.NamedIndividual
+        assert generate_relation(RelationTypeConstants.KNOX_MENTIONS) == KNOX.mentions
+
+    def test_relations__keyed_by_value__found_by_constant(self):
+        # Act
+        relation = RELATIONS.get(RelationTypeConstants.KNOX_MENTIONS)
+
+        # Assert
+        assert relation == KNOX.mentions
+        assert all(type(key) is str for key in RELATIONS)
+
+    def test_generate_relation__unknown_namespace__raises(self):
+        # Arrange
+        # Act
+        # Assert
+        self.assertRaises(Exception, generate_relation, "foo:bar")
+
+    def test_serialize_chunks__each_chunk_parses_on_its_own(self):
+        # Arrange
+        triples = [(URIRef("http://www.Knox.test/Person/" + str(number)), RDF.type, OWL.NamedIndividual)
+                   for number in range(50)]
+
+        # Act
+        chunks = list(serialize_chunks(triples, 500))
+
+        # Assert
+        assert len(chunks) > 1
+        assert sum(count for _, count in chunks) == 50
+        graph = Graph()
+        for chunk, count in chunks:
+            chunk_graph = Graph().parse(data=chunk.decode("utf-8"), format="turtle")
+            assert len(chunk_graph) == count
+            graph += chunk_graph
+        assert set(graph) == set(triples)
+
+    @patch('rdf.RdfCreator.LocalTripleStore.get_instance', return_value=None)
+    @patch('rdf.RdfCreator.EmittedTripleStore.get_instance', return_value=None)
+    @patch('rdf.RdfCreator.Outbox.get_instance', return_value=None)
+    @patch('utils.http_client.get_session')
+    def test_store_rdf_triples__uploaded_turtle__full_iris(self, mock_session, mock_outbox, mock_emitted, mock_local):
+        # Arrange
+        mock_session.return_value.post.return_value = MagicMock(status_code=200)
+        triples = [(URIRef("http://www.Knox.test/Person/Bob"), RDF.type, OWL.NamedIndividual),
+                   (URIRef("http://www.Knox.test/Article/1"), KNOX.mentions, URIRef("http://www.Knox.test/Person/Bob"))]
+
+        # Act
+        store_rdf_triples(triples, "NJ")
+
+        # Assert
+        fields = urllib.parse.parse_qs(mock_session.return_value.post.call_args.kwargs["data"].decode("ascii"))
+        turtle = fields["turtle"][0]
+        assert "@prefix" not in turtle
+        assert "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>" in turtle
+        assert set(Graph().parse(data=turtle, format="turtle")) == set(triples)
+
+    @patch.dict(os.environ, {"TRIPLE_TURTLE_PREFIXES": "true"})
+    def test_serialize_chunks__prefixes_enabled__prefixed_names(self):
+        # Arrange
+        triples = [(URIRef("http://www.Knox.test/Person/Bob"), RDF.type, OWL.NamedIndividual)]
+
+        # Act
+        chunks = list(serialize_chunks(triples, 500))
+
+        # Assert
+        assert b"@prefix rdf:" in chunks[0][0]
+
+    def test_serialize_chunks__no_triples__no_chunks(self):
+        # Act
+        chunks = list(serialize_chunks([], 500))
+
+        # Assert
+        assert chunks == []
+
+    @patch('utils.http_client.get_session')
+    def test_send_turtle__form_fields_not_compressed(self, mock_session):
+        # Arrange
+        mock_session.return_value.post.return_value = MagicMock(status_code=200)
+        turtle = b'<http://www.Knox.test/a> <http://www.Knox.test/b> "c" .\n'
+
+        # Act
+        send_turtle(turtle, "NJ")
+
+        # Assert
+        kwargs = mock_session.return_value.post.call_args.kwargs
+        assert kwargs["headers"]["Content-Type"] == "application/x-www-form-urlencoded"
+        assert "Content-Encoding" not in kwargs["headers"]
+        fields = urllib.parse.parse_qs(kwargs["data"].decode("ascii"))
+        assert fields == {"graph": ["NJ"], "turtle": [turtle.decode("utf-8")]}
+
+    @patch.dict(os.environ, {"TRIPLE_GZIP": "true"})
+    @patch('utils.http_client.get_session')
+    def test_send_turtle__gzip_enabled__gzip_form_fields(self, mock_session):
+        # Arrange
+        mock_session.return_value.post.return_value = MagicMock(status_code=200)
+        turtle = b'<http://www.Knox.test/a> <http://www.Knox.test/b> "c" .\n'
+
+        # Act
+        send_turtle(turtle, "NJ")
+
+        # Assert
+        kwargs = mock_session.return_value.post.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert "timeout" in kwargs
+        fields = urllib.parse.parse_qs(gzip.decompress(kwargs["data"]).decode("ascii"))
+        assert fields == {"graph": ["NJ"], "turtle": [turtle.decode("utf-8")]}
+
+    @patch('utils.http_client.time.sleep')
+    @patch('utils.http_client.get_session')
+    def test_send_turtle__error_status__raises(self, mock_session, mock_sleep):
+        # Arrange
+        response = MagicMock(status_code=400)
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+        mock_session.return_value.post.return_value = response
+
+        # Act
+        result = lambda: send_turtle(b"", None)
+
+        # Assert
+        self.assertRaises(requests.exceptions.HTTPError, result)
+        assert mock_session.return_value.post.call_count == 1
+
+
+    @patch('rdf.RdfCreator.EmittedTripleStore.get_instance', return_value=None)
+    @patch('rdf.RdfCreator.send_turtle')
+    def test_send_outbox_triples__with_and_without_hashes__same_turtle_sent(self, mock_send, mock_store):
+        # Arrange
+        turtle = b'@prefix knox: <http://www.Knox.test/> .\n\nknox:a knox:b "c" .\n'
+        payloads = [encode_outbox_triples(turtle, "NJ", [b"\n" * 16, b"1" * 16]), b"NJ\n" + turtle]
+
+        # Act
+        for payload in payloads:
+            send_outbox_triples(payload)
+
+        # Assert
+        assert [call.args for call in mock_send.call_args_list] == [(turtle, "NJ"), (turtle, "NJ")]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import unittest
+
+from rdf.extractor import TextRewriter
+
+
+class TextRewriterTest(unittest.TestCase):
+
+    def test_rewrite__first_matching_rule_wins(self):
+        # Arrange
+        rewriter = TextRewriter([[("fig\\. ", None), ("\\. ", ".\n")]])
+
+        # Act
+        actual = rewriter.rewrite("See fig. 7. It works. ")
+
+        # Assert
+        assert actual == "See fig. 7.\nIt works.\n"
+
+    def test_rewrite__passes_applied_in_order(self):
+        # Arrange
+        rewriter = TextRewriter([[(" +", " ")], [("a b", "c")]])
+
+        # Act
+        actual = rewriter.rewrite("a    b")
+
+        # Assert
+        assert actual == "c"
+
+    def test_rewrite__variables_in_replacement(self):
+        # Arrange
+        rewriter = TextRewriter([[("(?<= )the pump(?=[ .])", "{pump_name}")]])
+
+        # Act
+        actual = rewriter.rewrite("Clean the pump the pump.", pump_name="SQ/SQE")
+
+        # Assert
+        assert actual == "Clean SQ/SQE SQ/SQE."
+
+    def test_from_file__manual_rules(self):
+        # Arrange
+        path = os.path.join(os.path.dirname(__file__), "..", "resources", "manual_rewrite_rules.json")
+        rewriter = TextRewriter.from_file(path)
+
+        # Act
+        actual = rewriter.rewrite("The pump is lift-\ning water . See e.g. these pumps. 7 3432 734 8", pump_name="SQ")
+
+        # Assert
+        assert actual == "SQ is lifting water.\nSee e.g. SQ.\n"
+
+
+if __name__ == '__main__':
+    unittest.main()
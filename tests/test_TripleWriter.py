@@ -0,0 +1,74 @@
+import io
+import unittest
+
+from rdflib import Graph, Literal, URIRef, BNode
+from rdflib.namespace import RDF, RDFS, OWL
+
+from rdf.TripleWriter import TripleWriter
+
+
+class TripleWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        person = URIRef("http://www.Knox.test/Person/Bob")
+        article = URIRef("http://www.Knox.test/Article/12")
+        self.triples = [
+            (person, RDF.type, OWL.NamedIndividual),
+            (person, RDFS.label, Literal("Bob \"the\" Man\nÆblegrød")),
+            (person, RDFS.label, Literal(12)),
+            (article, URIRef("http://www.Knox.test/mentions"), person),
+            (article, URIRef("http://www.Knox.test/path/with%20space"), BNode()),
+        ]
+
+    def __write(self, format: str) -> bytes:
+        stream = io.BytesIO()
+        writer = TripleWriter(stream, format)
+        writer.write_all(self.triples)
+        writer.close()
+        return stream.getvalue()
+
+    def test_write__turtle__parses_to_same_graph(self):
+        # Arrange
+        expected = len(self.triples)
+
+        # Act
+        graph = Graph().parse(data=self.__write("turtle").decode("utf-8"), format="turtle")
+
+        # Assert
+        assert len(graph) == expected
+        for triple in self.triples[:4]:
+            assert triple in graph
+
+    def test_write__nt__parses_to_same_graph(self):
+        # Arrange
+        expected = len(self.triples)
+
+        # Act
+        output = self.__write("nt")
+        graph = Graph().parse(data=output.decode("ascii"), format="nt")
+
+        # Assert
+        assert len(graph) == expected
+        for triple in self.triples[:4]:
+            assert triple in graph
+
+    def test_write__turtle__groups_subjects_and_declares_prefixes(self):
+        # Arrange
+        # Act
+        output = self.__write("turtle").decode("utf-8")
+
+        # Assert
+        assert output.count("@prefix Person: <http://www.Knox.test/Person/> .") == 1
+        # Both labels of Bob share one statement
+        assert output.count("Person:Bob rdfs:label") == 1
+        assert sum(line.startswith("Person:Bob ") for line in output.splitlines()) == 2
+
+    def test_init__unknown_format__raises(self):
+        # Arrange
+        # Act
+        # Assert
+        self.assertRaises(Exception, TripleWriter, io.BytesIO(), "xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from file_io.UploadSeenSet import UploadSeenSet
+
+
+class UploadSeenSetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.seen_set = UploadSeenSet(os.path.join(self.directory.name, "seen.sqlite"), 3600, 100)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_content_hash__other_key_order_and_whitespace__same_hash(self):
+        # Act
+        first = UploadSeenSet.content_hash({"a": 1, "b": [1, 2]})
+        second = UploadSeenSet.content_hash({"b": [1, 2], "a": 1})
+
+        # Assert
+        assert first == second
+
+    def test_add__duplicate__rejected(self):
+        # Arrange
+        content_hash = UploadSeenSet.content_hash({"a": 1})
+        self.seen_set.add(content_hash)
+
+        # Act
+        added = self.seen_set.add(content_hash)
+
+        # Assert
+        assert not added
+        assert len(self.seen_set) == 1
+
+    def test_add__after_retention__added_again(self):
+        # Arrange
+        content_hash = UploadSeenSet.content_hash({"a": 1})
+        self.seen_set.add(content_hash)
+        self.seen_set.retention_seconds = -1
+
+        # Act
+        added = self.seen_set.add(content_hash)
+
+        # Assert
+        assert added
+
+    def test_remove__added_again(self):
+        # Arrange
+        content_hash = UploadSeenSet.content_hash({"a": 1})
+        self.seen_set.add(content_hash)
+
+        # Act
+        self.seen_set.remove(content_hash)
+
+        # Assert
+        assert self.seen_set.add(content_hash)
+
+    def test_add__over_max_entries__oldest_pruned(self):
+        # Arrange
+        self.seen_set.max_entries = 5
+        self.seen_set.PRUNE_INTERVAL = 10
+
+        # Act
+        for number in range(10):
+            self.seen_set.add(UploadSeenSet.content_hash({"number": number}))
+
+        # Assert
+        assert len(self.seen_set) == 5
+        assert self.seen_set.add(UploadSeenSet.content_hash({"number": 0}))
+        assert not self.seen_set.add(UploadSeenSet.content_hash({"number": 9}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from data_access import WordCountDao, WordCountFingerprintStore, Outbox
+from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
+from environment import EnvironmentVariables as Ev
+from model.Word import Word
+
+Ev()
+
+
+class WordCountDaoTest(unittest.TestCase):
+
+    def test_chunk__max_articles__splits_chunks(self):
+        # Arrange
+        encoded_objects = [b'{"a":1}', b'{"b":2}', b'{"c":3}']
+
+        # Act
+        chunks = WordCountDao.chunk(encoded_objects, 1024, 2)
+
+        # Assert
+        assert chunks == [[b'{"a":1}', b'{"b":2}'], [b'{"c":3}']]
+
+    def test_chunk__max_bytes__splits_chunks(self):
+        # Arrange
+        encoded_objects = [b'{"a":1}', b'{"b":2}', b'{"c":3}']
+
+        # Act
+        # '[{"a":1},{"b":2}]' is exactly 17 bytes
+        chunks = WordCountDao.chunk(encoded_objects, 17, 100)
+
+        # Assert
+        assert chunks == [[b'{"a":1}', b'{"b":2}'], [b'{"c":3}']]
+
+    def test_chunk__object_larger_than_max_bytes__own_chunk(self):
+        # Arrange
+        encoded_objects = [b'{"a":1}', b'{"large":"' + b"x" * 100 + b'"}', b'{"c":3}']
+
+        # Act
+        chunks = WordCountDao.chunk(encoded_objects, 20, 100)
+
+        # Assert
+        assert len(chunks) == 3
+        assert chunks[1] == [encoded_objects[1]]
+
+    @patch('utils.http_client.get_session')
+    def test_send_word_count__json_array_not_compressed(self, mock_session):
+        # Arrange
+        mock_session.return_value.post.return_value = MagicMock(status_code=200)
+        dtos = [DocumentWordCountDto("Title", "/path", 2, [Word("word", 2)], "Publisher")]
+
+        # Act
+        result = WordCountDao.send_word_count(dtos)
+
+        # Assert
+        assert result
+        kwargs = mock_session.return_value.post.call_args.kwargs
+        assert "Content-Encoding" not in kwargs["headers"]
+        assert type(kwargs["data"]) is bytes
+        assert json.loads(kwargs["data"]) == [{
+            "articletitle": "Title", "filepath": "/path", "totalwordsinarticle": 2,
+            "words": [{"word": "word", "amount": 2}], "publication": "Publisher"
+        }]
+
+    @patch.dict(os.environ, {"WORD_COUNT_GZIP": "true"})
+    @patch('utils.http_client.get_session')
+    def test_send_word_count__gzip_enabled__gzip_json_array(self, mock_session):
+        # Arrange
+        response = MagicMock(status_code=200)
+        mock_session.return_value.post.return_value = response
+        dtos = [DocumentWordCountDto("Title", "/path", 2, [Word("word", 2)], "Publisher")]
+
+        # Act
+        result = WordCountDao.send_word_count(dtos)
+
+        # Assert
+        assert result
+        kwargs = mock_session.return_value.post.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert "Idempotency-Key" in kwargs["headers"]
+        assert json.loads(gzip.decompress(kwargs["data"])) == [{
+            "articletitle": "Title", "filepath": "/path", "totalwordsinarticle": 2,
+            "words": [{"word": "word", "amount": 2}], "publication": "Publisher"
+        }]
+
+    @patch('utils.http_client.get_session')
+    def test_send_word_count__with_and_without_orjson__same_body_and_key(self, mock_session):
+        # Arrange
+        mock_session.return_value.post.return_value = MagicMock(status_code=200)
+        dtos = [DocumentWordCountDto("Æblegrød", "/path", 2, [Word("fløde", 2)], "Publisher")]
+
+        # Act
+        WordCountDao.send_word_count(dtos)
+        with patch('data_access.DtoSerializer.orjson', None):
+            WordCountDao.send_word_count(dtos)
+
+        # Assert
+        first, second = [call.kwargs for call in mock_session.return_value.post.call_args_list]
+        assert first["data"] == second["data"]
+        assert first["headers"]["Idempotency-Key"] == second["headers"]["Idempotency-Key"]
+
+    @patch('data_access.WordCountDao.WordCountDao.send_encoded_word_count',
+           side_effect=requests.exceptions.HTTPError(response=MagicMock(status_code=400)))
+    def test_send_word_count__outbox_payload_rejected__articles_sent_again(self, mock_send):
+        # Arrange
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = WordCountFingerprintStore(os.path.join(directory.name, "fingerprints.sqlite"))
+        outbox = Outbox(os.path.join(directory.name, "outbox.sqlite"), poll_interval=0, max_backoff=0)
+        outbox.register_handler(Outbox.WORD_COUNT, WordCountDao.send_outbox_payload, WordCountDao.forget_outbox_payload)
+        dtos = [DocumentWordCountDto("Title", "/path", 2, [Word("word", 2)], "Publisher"),
+                DocumentWordCountDto("Title", "/path", 1, [Word("other", 1)], "Publisher")]
+        with patch('data_access.WordCountDao.WordCountFingerprintStore.get_instance', return_value=store), \
+                patch('data_access.WordCountDao.Outbox.get_instance', return_value=outbox):
+            WordCountDao.send_word_count(dtos, ["id1", "id2"])
+            stored = store.diff(dtos, store.article_keys(dtos, ["id1", "id2"]))
+
+            # Act
+            outbox.ship()
+
+        # Assert
+        assert stored == ([], [], 2)
+        assert store.diff(dtos, store.article_keys(dtos, ["id1", "id2"])) == (dtos, [], 0)
+        assert mock_send.call_args[0][0] == [b'{"articletitle":"Title","filepath":"/path","totalwordsinarticle":2,'
+                                             b'"words":[{"word":"word","amount":2}],"publication":"Publisher"}',
+                                             b'{"articletitle":"Title","filepath":"/path","totalwordsinarticle":1,'
+                                             b'"words":[{"word":"other","amount":1}],"publication":"Publisher"}']
+
+    def __outbox_with_delta(self, send_full):
+        """
+        Queues the full word counts of an article, then a delta of it, in an outbox whose full word count handler is
+        send_full.
+
+        :return: The fingerprint store, the outbox, the mocked delta handler and the changed data transfer object
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = WordCountFingerprintStore(os.path.join(directory.name, "fingerprints.sqlite"))
+        outbox = Outbox(os.path.join(directory.name, "outbox.sqlite"), poll_interval=60, max_backoff=60)
+        send_delta = MagicMock()
+        outbox.register_handler(Outbox.WORD_COUNT, send_full, WordCountDao.forget_outbox_payload)
+        outbox.register_handler(Outbox.WORD_COUNT_DELTA, send_delta, WordCountDao.forget_outbox_payload,
+                                group=Outbox.WORD_COUNT)
+        changed = DocumentWordCountDto("Title", "/path", 3, [Word("word", 3)], "Publisher")
+        patches = [patch('data_access.WordCountDao.WordCountFingerprintStore.get_instance', return_value=store),
+                   patch('data_access.WordCountDao.Outbox.get_instance', return_value=outbox),
+                   patch.object(Ev.instance, 'get_value', side_effect=lambda name, default=None: "http://delta"
+                                if name == Ev.instance.WORD_COUNT_DELTA_ENDPOINT else default)]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        WordCountDao.send_word_count([DocumentWordCountDto("Title", "/path", 2, [Word("word", 2)], "Publisher")],
+                                     ["id1"])
+        WordCountDao.send_word_count([changed], ["id1"])
+        return store, outbox, send_delta, changed
+
+    def test_send_word_count__full_word_counts_retried__delta_waits(self):
+        # Arrange
+        send_full = MagicMock(side_effect=[requests.exceptions.HTTPError(response=MagicMock(status_code=503)), None])
+        _, outbox, send_delta, _ = self.__outbox_with_delta(send_full)
+
+        # Act
+        first = outbox.ship()
+        # The full word counts are not due yet, so the delta is not attempted either
+        second = outbox.ship()
+
+        # Assert
+        assert first == 0 and second == 0
+        send_delta.assert_not_called()
+        assert outbox.pending() == 2
+
+    def test_send_word_count__full_word_counts_rejected__delta_discarded(self):
+        # Arrange
+        send_full = MagicMock(side_effect=requests.exceptions.HTTPError(response=MagicMock(status_code=400)))
+        store, outbox, send_delta, changed = self.__outbox_with_delta(send_full)
+
+        # Act
+        outbox.ship()
+
+        # Assert
+        send_delta.assert_not_called()
+        assert outbox.pending() == 0
+        # The article is sent in full with the next upload
+        assert store.diff([changed], store.article_keys([changed], ["id1"])) == ([changed], [], 0)
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+from data_access import WordCountFingerprintStore
+from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
+from model.Document import Article
+from model.Word import Word
+
+
+def generate_dto(words):
+    return DocumentWordCountDto("Title", "/path", sum(amount for _, amount in words),
+                                [Word(word, amount) for word, amount in words], "Publisher")
+
+
+class WordCountFingerprintStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = WordCountFingerprintStore(os.path.join(self.directory.name, "fingerprints.sqlite"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_diff__not_sent_before__new(self):
+        # Arrange
+        dto = generate_dto([("a", 1)])
+
+        # Act
+        new, changed, unchanged = self.store.diff([dto])
+
+        # Assert
+        assert new == [dto] and changed == [] and unchanged == 0
+
+    def test_diff__same_counts_other_order__unchanged(self):
+        # Arrange
+        self.store.commit([generate_dto([("a", 1), ("b", 2)])])
+
+        # Act
+        new, changed, unchanged = self.store.diff([generate_dto([("b", 2), ("a", 1)])])
+
+        # Assert
+        assert new == [] and changed == [] and unchanged == 1
+
+    def test_diff__changed_counts__delta(self):
+        # Arrange
+        self.store.commit([generate_dto([("a", 1), ("b", 2)])])
+        dto = generate_dto([("a", 3), ("c", 1)])
+
+        # Act
+        new, changed, unchanged = self.store.diff([dto])
+        _, delta = changed[0]
+
+        # Assert
+        assert new == [] and unchanged == 0
+        assert changed[0][0] == dto
+        assert delta.totalwordsinarticle == 1
+        assert sorted((word.word, word.amount) for word in delta.words) == [("a", 2), ("b", -2), ("c", 1)]
+
+    def test_diff__same_title_and_path_other_ids__kept_apart(self):
+        # Arrange
+        dtos = [generate_dto([("a", 1)]), generate_dto([("b", 1)])]
+        self.store.commit(dtos, self.store.article_keys(dtos, ["id1", "id2"]))
+
+        # Act
+        new, changed, unchanged = self.store.diff(dtos, self.store.article_keys(dtos, ["id1", "id2"]))
+
+        # Assert
+        assert new == [] and changed == [] and unchanged == 2
+
+    def test_diff__same_title_in_same_file__kept_apart(self):
+        # Arrange
+        # Articles with the same title in the same file have the same derived id
+        article_id = Article.derive_id("Title", "/path")
+        dtos = [generate_dto([("a", 1)]), generate_dto([("b", 1)])]
+        self.store.commit(dtos, self.store.article_keys(dtos, [article_id, article_id]))
+
+        # Act
+        new, changed, unchanged = self.store.diff(dtos, self.store.article_keys(dtos, [article_id, article_id]))
+
+        # Assert
+        assert new == [] and changed == [] and unchanged == 2
+
+    def test_diff__article_inserted_in_middle__following_articles_unchanged(self):
+        # Arrange
+        dtos = [generate_dto([("a", 1)]), generate_dto([("b", 1)]), generate_dto([("c", 1)])]
+        self.store.commit(dtos, self.store.article_keys(dtos, ["id1", "id2", "id3"]))
+        inserted = generate_dto([("d", 1)])
+        reuploaded = [dtos[0], inserted, dtos[1], dtos[2]]
+
+        # Act
+        new, changed, unchanged = self.store.diff(
+            reuploaded, self.store.article_keys(reuploaded, ["id1", "id4", "id2", "id3"]))
+
+        # Assert
+        assert new == [inserted] and changed == [] and unchanged == 3
+
+    def test_article_keys__other_publication__other_keys(self):
+        # Arrange
+        dto = generate_dto([("a", 1)])
+        other = DocumentWordCountDto("Title", "/path", 1, [Word("a", 1)], "Other publisher")
+
+        # Act
+        keys = self.store.article_keys([dto], ["id1"]) + self.store.article_keys([other], ["id1"])
+
+        # Assert
+        assert keys[0] != keys[1]
+
+    def test_forget__committed__new_again(self):
+        # Arrange
+        dto = generate_dto([("a", 1)])
+        self.store.commit([dto], ["id1"])
+
+        # Act
+        self.store.forget(["id1"])
+        new, changed, unchanged = self.store.diff([dto], ["id1"])
+
+        # Assert
+        assert new == [dto] and changed == [] and unchanged == 0
@@ -0,0 +1,86 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from data_access import WordCountMatrixExporter
+from data_access.data_transfer_objects.DocumentWordCountDto import DocumentWordCountDto
+from model.Word import Word
+
+
+def generate_dtos():
+    return [
+        DocumentWordCountDto("Title 1", "/path/1", 4, [Word("b", 1), Word("a", 3)], "Publisher"),
+        DocumentWordCountDto("Title 2", "/path/2", 3, [Word("c", 2), Word("a", 1)], "Publisher"),
+    ]
+
+
+def load_matrix(path):
+    loaded = np.load(path)
+    shape = tuple(loaded["shape"])
+    dense = np.zeros(shape, dtype=np.int64)
+    indptr, indices, data = loaded["indptr"], loaded["indices"], loaded["data"]
+    for row in range(shape[0]):
+        for entry in range(indptr[row], indptr[row + 1]):
+            dense[row, indices[entry]] = data[entry]
+    return str(loaded["format"]), dense
+
+
+class WordCountMatrixExporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.directory.name, "export")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write__two_articles__csr_matrix(self):
+        # Arrange
+        exporter = WordCountMatrixExporter(self.output_path)
+
+        # Act
+        exporter.export_word_count(generate_dtos(), ["1", "2"])
+        matrix_path = exporter.write()
+        exporter.close()
+        matrix_format, dense = load_matrix(matrix_path)
+
+        # Assert
+        assert matrix_format == "csr"
+        assert dense.tolist() == [[1, 3, 0], [0, 1, 2]]
+        with open(self.output_path + ".vocabulary.txt", encoding="utf-8") as f:
+            assert f.read().splitlines() == ["b", "a", "c"]
+        with open(self.output_path + ".rows.csv", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[1] == ["1", "Title 1", "Publisher", "/path/1", "4"]
+        assert rows[2] == ["2", "Title 2", "Publisher", "/path/2", "3"]
+
+    def test_write__after_restart__rows_are_appended(self):
+        # Arrange
+        exporter = WordCountMatrixExporter(self.output_path)
+        exporter.export_word_count(generate_dtos()[:1], ["1"])
+        exporter.close()
+
+        # Act
+        exporter = WordCountMatrixExporter(self.output_path)
+        exporter.export_word_count(generate_dtos()[1:], ["2"])
+        matrix_path = exporter.write()
+        exporter.close()
+        _, dense = load_matrix(matrix_path)
+
+        # Assert
+        assert dense.tolist() == [[1, 3, 0], [0, 1, 2]]
+
+    def test_write__no_articles__empty_matrix(self):
+        # Arrange
+        exporter = WordCountMatrixExporter(self.output_path)
+
+        # Act
+        matrix_path = exporter.write()
+        exporter.close()
+        _, dense = load_matrix(matrix_path)
+
+        # Assert
+        assert dense.shape == (0, 0)
@@ -1,8 +1,14 @@
+import os
+import tempfile
 import unittest
 from fastapi.testclient import TestClient
 from api.ImportApi import app
 from tests.json_test_data import *
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+
+from rdflib import URIRef
+
+from file_io.UploadSeenSet import UploadSeenSet
 
 
 class Test(unittest.TestCase):
@@ -32,4 +38,47 @@ class Test(unittest.TestCase):
             postItem = correctJson
             response = self.client.post("/uploadJsonDoc/", postItem)
             assert response.status_code == 200
-            #assert response.json() == "Json file successfully created"
\ No newline at end of file
+            #assert response.json() == "Json file successfully created"
+
+    @patch('data_access.LocalTripleStore.LocalTripleStore.get_instance')
+    def test_triples__limit_and_offset__passed_to_store(self, mock_store):
+        # Arrange
+        mock_store.return_value = MagicMock()
+        mock_store.return_value.match.return_value = [(URIRef("http://s"), URIRef("http://p"), URIRef("http://o"))]
+
+        # Act
+        response = self.client.get("/triples/", params={"limit": 5, "offset": 10})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == [{"subject": "<http://s>", "predicate": "<http://p>", "object": "<http://o>"}]
+        assert mock_store.return_value.match.call_args.kwargs["limit"] == 5
+        assert mock_store.return_value.match.call_args.kwargs["offset"] == 10
+
+    @patch('data_access.LocalTripleStore.LocalTripleStore.get_instance')
+    def test_triples__limit_or_offset_out_of_range__rejected(self, mock_store):
+        # Arrange
+        out_of_range = [{"limit": -1}, {"limit": 0}, {"limit": 10001}, {"offset": -1}]
+
+        # Act
+        responses = [self.client.get("/triples/", params=params) for params in out_of_range]
+
+        # Assert
+        assert [response.status_code for response in responses] == [422] * len(out_of_range)
+        mock_store.return_value.match.assert_not_called()
+
+    def test_upload_counters__duplicate_upload__counted(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            seen_set = UploadSeenSet(os.path.join(directory, "seen.sqlite"), 3600, 100)
+            with patch('file_io.FileWriter.UploadSeenSet.get_instance', return_value=seen_set):
+                before = self.client.get("/uploadCounters/").json()
+                self.client.post("/uploadJsonDoc/", correctJson)
+                self.client.post("/uploadJsonDoc/", correctJson)
+
+                # Act
+                response = self.client.get("/uploadCounters/")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"queued": before["queued"] + 1, "duplicates": before["duplicates"] + 1, "seen": 1}
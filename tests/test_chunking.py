@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+
+import spacy
+
+from utils import split_text, pipe_entities
+
+
+class ChunkingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nlp = spacy.blank("en")
+        cls.nlp.add_pipe("entity_ruler").add_patterns([{"label": "PER", "pattern": "Alice"}])
+
+    def test_split_text__short_text__one_chunk(self):
+        # Arrange
+        text = "Alice met Bob."
+
+        # Act
+        chunks = split_text(text, 100)
+
+        # Assert
+        assert chunks == [(0, text)]
+
+    def test_split_text__prefers_sentence_boundaries(self):
+        # Arrange
+        text = "One two three. Four five six. Seven eight"
+
+        # Act
+        chunks = split_text(text, 20)
+
+        # Assert
+        assert [chunk for _, chunk in chunks] == ["One two three. ", "Four five six. ", "Seven eight"]
+        assert all(text[offset:offset + len(chunk)] == chunk for offset, chunk in chunks)
+
+    def test_split_text__no_boundary__cut_at_max_length(self):
+        # Arrange
+        text = "x" * 25
+
+        # Act
+        chunks = split_text(text, 10)
+
+        # Assert
+        assert chunks == [(0, "x" * 10), (10, "x" * 10), (20, "x" * 5)]
+
+    def test_pipe_entities__chunked__offsets_on_whole_text(self):
+        # Arrange
+        texts = ["Alice went home. " * 20, "", "Nobody here.", "Then Alice left."]
+
+        # Act
+        actual = list(pipe_entities(self.nlp, texts, max_length=50))
+
+        # Assert
+        assert len(actual) == 4
+        assert len(actual[0]) == 20
+        assert all(texts[0][entity.start_char:entity.end_char] == "Alice" for entity in actual[0])
+        assert actual[1] == [] and actual[2] == []
+        assert [(entity.start_char, entity.label) for entity in actual[3]] == [(5, "PER")]
+
+    @patch('utils.chunking.pipe_docs', return_value=iter([]))
+    def test_pipe_entities__fewer_texts_than_a_batch_per_process__parsed_in_one_process(self, mock_pipe):
+        # Act
+        list(pipe_entities(self.nlp, ["Alice"] * 7, batch_size=2, n_process=4))
+
+        # Assert
+        assert mock_pipe.call_args.kwargs["n_process"] == 1
+
+    @patch('utils.chunking.pipe_docs', return_value=iter([]))
+    def test_pipe_entities__a_batch_per_process__parsed_in_pool(self, mock_pipe):
+        # Act
+        list(pipe_entities(self.nlp, ["Alice"] * 8, batch_size=2, n_process=4))
+
+        # Assert
+        assert mock_pipe.call_args.kwargs["n_process"] == 4
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+import spacy
+from spacy.language import Language
+from spacy.util import minibatch
+
+from utils import DocCache
+
+
+class _Batcher:
+    """
+    Reads ahead in batches, like the trainable components of the real models.
+    """
+
+    def __call__(self, doc):
+        return doc
+
+    def pipe(self, stream, batch_size=128):
+        for batch in minibatch(stream, batch_size):
+            yield from batch
+
+
+@Language.factory("doc_cache_test_batcher")
+def create_batcher(nlp, name):
+    return _Batcher()
+
+
+class DocCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nlp = spacy.blank("en")
+        cls.nlp.add_pipe("entity_ruler").add_patterns([{"label": "PER", "pattern": "Alice"}])
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DocCache(os.path.join(self.directory.name, "docs.sqlite"), 1024 ** 2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pipe__cached_docs__same_entities_in_order(self):
+        # Arrange
+        texts = ["Alice met Bob.", "Bob stayed home.", "Then Alice left."]
+        list(self.cache.pipe(self.nlp, texts[1:2]))
+
+        # Act
+        docs = list(self.cache.pipe(self.nlp, texts))
+
+        # Assert
+        assert [doc.text for doc in docs] == texts
+        assert [[entity.text for entity in doc.ents] for doc in docs] == [["Alice"], [], ["Alice"]]
+        assert self.cache.hits == 1
+        assert self.cache.misses == 3
+
+    def test_pipe__as_tuples__keeps_context(self):
+        # Arrange
+        texts = [("Alice met Bob.", 1), ("Bob stayed home.", 2)]
+        list(self.cache.pipe(self.nlp, texts[:1], as_tuples=True))
+
+        # Act
+        results = list(self.cache.pipe(self.nlp, texts, as_tuples=True))
+
+        # Assert
+        assert [(doc.text, context) for doc, context in results] == [("Alice met Bob.", 1), ("Bob stayed home.", 2)]
+
+    def test_pipe__cap_smaller_than_docs__cached_docs_evicted_while_waiting_parsed_again(self):
+        # Arrange
+        nlp = spacy.blank("en")
+        nlp.add_pipe("doc_cache_test_batcher")
+        nlp.add_pipe("entity_ruler").add_patterns([{"label": "PER", "pattern": "Alice"}])
+        texts = ["Alice met Bob.", "Bob stayed home.", "Then Alice left.", "Alice and Bob."]
+        list(self.cache.pipe(nlp, texts[1::2]))
+        self.cache.max_bytes = 1
+
+        # Act
+        docs = list(self.cache.pipe(nlp, texts))
+
+        # Assert
+        assert [doc.text for doc in docs] == texts
+        assert [[entity.text for entity in doc.ents] for doc in docs] == [["Alice"], [], ["Alice"], ["Alice"]]
+
+    def test_key_prefix__depends_on_profile(self):
+        # Arrange
+        text = "Alice met Bob."
+
+        # Act
+        full_key = self.cache.key(self.cache.key_prefix(self.nlp, "full"), text)
+        ner_key = self.cache.key(self.cache.key_prefix(self.nlp, "ner-only"), text)
+
+        # Assert
+        assert full_key != ner_key
+
+    def test_put__over_size_cap__least_recently_used_evicted(self):
+        # Arrange
+        prefix = self.cache.key_prefix(self.nlp, "full")
+        texts = ["Text number " + str(number) + " about Alice." for number in range(20)]
+        docs = list(self.nlp.pipe(texts))
+        self.cache.put(self.cache.key(prefix, texts[0]), docs[0])
+        self.cache.max_bytes = self.cache.size() * 5
+
+        # Act
+        for text, doc in zip(texts[1:], docs[1:]):
+            self.cache.put(self.cache.key(prefix, text), doc)
+            # Keeps the first Doc recently used
+            self.cache.get(self.cache.key(prefix, texts[0]), self.nlp)
+
+        # Assert
+        assert self.cache.size() <= self.cache.max_bytes
+        assert self.cache.contains(self.cache.key(prefix, texts[0]))
+        assert not self.cache.contains(self.cache.key(prefix, texts[1]))
+        assert self.cache.contains(self.cache.key(prefix, texts[-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy
+import spacy
+from spacy.vectors import Vectors
+
+from utils import load_model, profile_disable, share_vectors
+
+
+class LoadModelTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nlp = spacy.blank("da")
+        cls.nlp.add_pipe("tok2vec")
+        # The morphologizer listens to the shared tok2vec, the ner has a tok2vec of its own
+        cls.nlp.add_pipe("morphologizer", config={"model": {
+            "@architectures": "spacy.Tagger.v2",
+            "tok2vec": {"@architectures": "spacy.Tok2VecListener.v1", "width": 96, "upstream": "*"}}})
+        cls.nlp.add_pipe("ner")
+        cls.nlp.add_pipe("entity_ruler")
+
+    def test_profile_disable__pos_only__keeps_listened_tok2vec(self):
+        # Arrange
+        # Act
+        disabled = profile_disable(self.nlp, "pos-only")
+
+        # Assert
+        assert disabled == ["ner", "entity_ruler"]
+
+    def test_profile_disable__ner_only(self):
+        # Arrange
+        # Act
+        disabled = profile_disable(self.nlp, "ner-only")
+
+        # Assert
+        assert disabled == ["tok2vec", "morphologizer"]
+
+    def test_profile_disable__full__nothing_disabled(self):
+        # Arrange
+        # Act
+        disabled = profile_disable(self.nlp, "full")
+
+        # Assert
+        assert disabled == []
+
+    def test_profile_disable__unknown_profile__raises(self):
+        # Arrange
+        # Act
+        # Assert
+        self.assertRaises(Exception, profile_disable, self.nlp, "parser-only")
+
+    def test_share_vectors__vectors_memory_mapped(self):
+        # Arrange
+        nlp = spacy.blank("da")
+        data = numpy.arange(12, dtype=numpy.float32).reshape(3, 4)
+        nlp.vocab.vectors = Vectors(data=data, keys=[nlp.vocab.strings.add(word) for word in ["a", "b", "c"]])
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Act
+            shared = share_vectors(nlp, directory)
+
+            # Assert
+            assert shared
+            assert isinstance(nlp.vocab.vectors.data, numpy.memmap)
+            assert numpy.array_equal(nlp.vocab["b"].vector, data[1])
+            assert len(os.listdir(directory)) == 1
+
+            # Drops the mapping before the directory is removed
+            nlp.vocab.vectors = Vectors()
+
+    def test_share_vectors__no_vectors__not_shared(self):
+        # Arrange
+        nlp = spacy.blank("da")
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Act
+            shared = share_vectors(nlp, directory)
+
+            # Assert
+            assert not shared
+            assert os.listdir(directory) == []
+
+    def test_share_vectors__empty_directory_setting__not_shared(self):
+        # Arrange
+        nlp = spacy.blank("da")
+        data = numpy.arange(12, dtype=numpy.float32).reshape(3, 4)
+        nlp.vocab.vectors = Vectors(data=data, keys=[nlp.vocab.strings.add(word) for word in ["a", "b", "c"]])
+
+        # Act
+        with patch.dict(os.environ, {"VECTORS_MMAP_DIR": ""}):
+            shared = share_vectors(nlp)
+
+        # Assert
+        assert not shared
+        assert not isinstance(nlp.vocab.vectors.data, numpy.memmap)
+
+    def test_load_model__not_shared__own_instance(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            spacy.blank("da").to_disk(directory)
+
+            # Act
+            shared = load_model(directory)
+            shared_again = load_model(directory)
+            own = load_model(directory, shared=False)
+            own.add_pipe("sentencizer")
+
+        # Assert
+        assert shared is shared_again
+        assert own is not shared
+        assert "sentencizer" not in shared.pipe_names
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,13 @@
+import json
 import math
+import os
 import sched
-from scheduler import queue
+import tempfile
+from unittest.mock import patch
+
+from exceptions import RequeueException
+from file_io.UploadSeenSet import UploadSeenSet
+from scheduler import queue, QUEUE_STATE
 import time
 from environment import EnvironmentVariables as Ev
 
@@ -35,3 +42,44 @@ def test_Scheduler_FIFO_principle():
     # Assert test for one file
     for i in assertContent:
         assert i == check_array[i]
+
+
+def test_queue__requeue_exception__file_kept_with_new_content():
+    with tempfile.TemporaryDirectory() as directory:
+        # Arrange
+        queue_path = directory + os.sep
+        with open(queue_path + "1.json", "w", encoding="utf-8") as file:
+            file.write('{ "num": "1"}')
+
+        def partly_process(content):
+            raise RequeueException("Triples failed", dict(content, state="triples"))
+
+        # Act
+        with patch('scheduler.filePath', queue_path):
+            queue(partly_process)
+
+        # Assert
+        with open(queue_path + "1.json", encoding="utf-8") as file:
+            assert json.load(file) == {"num": "1", "state": "triples"}
+
+
+def test_queue__unexpected_error__upload_no_longer_seen():
+    with tempfile.TemporaryDirectory() as directory:
+        # Arrange
+        queue_path = directory + os.sep
+        seen_set = UploadSeenSet(os.path.join(directory, "seen.sqlite"), 3600, 100)
+        seen_set.add(UploadSeenSet.content_hash({"num": "1"}))
+        with open(queue_path + "1.json", "w", encoding="utf-8") as file:
+            json.dump({"num": "1", QUEUE_STATE: {"triple_attempts": 5}}, file)
+
+        def fail(content):
+            raise ValueError("Processing failed")
+
+        # Act
+        with patch('scheduler.filePath', queue_path), \
+                patch('scheduler.UploadSeenSet.get_instance', return_value=seen_set):
+            queue(fail)
+
+        # Assert
+        assert not os.path.exists(queue_path + "1.json")
+        assert seen_set.add(UploadSeenSet.content_hash({"num": "1"}))
@@ -1,2 +1,6 @@
 from .logging import LogF
-from .load_model import load_model
\ No newline at end of file
+from .load_model import load_model, profile_disable, share_vectors
+from .ordered_set import OrderedSet
+from .bucket_index import BucketIndex
+from .doc_cache import DocCache, pipe_docs
+from .chunking import Entity, split_text, pipe_entities
@@ -0,0 +1,90 @@
+from typing import Dict, List
+
+import numpy
+
+
+class BucketIndex:
+    """
+    An in-memory index of the ids in each bucket, e.g. of the locality sensitive hashes of vectors. The pairs of
+    bucket and id are held in two arrays sorted by bucket, so an id takes 8 bytes per bucket it is in, and the ids in
+    a bucket are found by a binary search. Ids added one at a time are held in a dict until MERGE_SIZE of them are,
+    and then merged into the arrays at once.
+    """
+
+    # Number of ids added one at a time before they are merged into the sorted arrays. Merging copies the arrays, so
+    # more ids make adding cheaper, at the cost of a larger dict
+    MERGE_SIZE = 4096
+
+    def __init__(self):
+        self.__buckets = numpy.empty(0, dtype=numpy.uint32)
+        self.__ids = numpy.empty(0, dtype=numpy.uint32)
+        self.__recent: Dict[int, List[int]] = {}
+        self.__recent_count = 0
+
+    def __len__(self) -> int:
+        """
+        :return: The number of pairs of bucket and id
+        """
+        return len(self.__buckets) + sum(len(ids) for ids in self.__recent.values())
+
+    def add(self, id: int, buckets: List[int]):
+        """
+        Adds an id to buckets.
+
+        :param id: The id, a non-negative integer below 2**32
+        :param buckets: The buckets of the id, non-negative integers below 2**32 - 1
+        """
+        for bucket in buckets:
+            self.__recent.setdefault(bucket, []).append(id)
+        self.__recent_count += 1
+        if self.__recent_count >= self.MERGE_SIZE:
+            self.__merge_recent()
+
+    def extend(self, ids: numpy.ndarray, buckets: numpy.ndarray):
+        """
+        Adds many ids at once, e.g. when the index is loaded.
+
+        :param ids: The ids
+        :param buckets: The buckets of each id, with a row per id
+        """
+        self.__merge(numpy.repeat(ids, buckets.shape[1]), buckets.reshape(-1))
+
+    def candidates(self, buckets: List[int], min_shared: int = 1) -> List[int]:
+        """
+        :param buckets: The buckets to look in, each at most once
+        :param min_shared: The number of the buckets an id must be in
+        :return: The ids in at least min_shared of the buckets
+        """
+        query = numpy.array(buckets, dtype=numpy.uint32)
+        # The ids of a bucket end where those of the next bucket number start, so one search finds both
+        bounds = numpy.searchsorted(self.__buckets, numpy.concatenate([query, query + 1]))
+        starts = bounds[:len(query)]
+        lengths = bounds[len(query):] - starts
+        # The positions of the ids of every bucket, found without a loop over the buckets
+        positions = numpy.arange(lengths.sum()) + numpy.repeat(starts - (numpy.cumsum(lengths) - lengths), lengths)
+        recent = [id for bucket in buckets for id in self.__recent.get(bucket, ())]
+        ids = numpy.concatenate([self.__ids[positions], numpy.array(recent, dtype=numpy.uint32)])
+        if min_shared <= 1:
+            return numpy.unique(ids).tolist()
+        unique, counts = numpy.unique(ids, return_counts=True)
+        return unique[counts >= min_shared].tolist()
+
+    def __merge_recent(self):
+        """
+        Merges the ids added one at a time into the sorted arrays.
+        """
+        buckets = [bucket for bucket, ids in self.__recent.items() for _ in ids]
+        ids = [id for bucket_ids in self.__recent.values() for id in bucket_ids]
+        self.__recent = {}
+        self.__recent_count = 0
+        self.__merge(numpy.array(ids, dtype=numpy.uint32), numpy.array(buckets, dtype=numpy.uint32))
+
+    def __merge(self, ids: numpy.ndarray, buckets: numpy.ndarray):
+        """
+        Merges pairs of bucket and id into the sorted arrays.
+        """
+        order = numpy.argsort(buckets, kind="stable")
+        buckets = buckets[order].astype(numpy.uint32)
+        positions = numpy.searchsorted(self.__buckets, buckets, side="right")
+        self.__buckets = numpy.insert(self.__buckets, positions, buckets)
+        self.__ids = numpy.insert(self.__ids, positions, ids[order].astype(numpy.uint32))
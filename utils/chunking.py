@@ -0,0 +1,105 @@
+from typing import Iterable, Iterator, List, NamedTuple, Sized, Tuple
+
+from spacy.language import Language
+
+from environment import EnvironmentVariables as Ev
+from utils.doc_cache import pipe_docs
+
+Ev()
+
+# Boundaries texts are split on, from most to least preferred
+PARAGRAPH_BOUNDARIES = ["\n"]
+SENTENCE_BOUNDARIES = [". ", "! ", "? ", ".\n"]
+WORD_BOUNDARIES = [" ", "\t"]
+
+
+class Entity(NamedTuple):
+    """
+    An entity found in a text, with character offsets into the whole text.
+    """
+    start_char: int
+    end_char: int
+    label: str
+    text: str
+
+
+def max_chunk_length() -> int:
+    """
+    :return: The maximum number of characters parsed as one Doc, set by NLP_MAX_CHUNK_CHARS
+    """
+    return Ev.instance.get_int(Ev.instance.NLP_MAX_CHUNK_CHARS, 100000)
+
+
+def split_text(text: str, max_length: int) -> List[Tuple[int, str]]:
+    """
+    Splits a text into chunks of at most max_length characters. Chunks end at a paragraph boundary if there is one in
+    the second half of the chunk, else at a sentence boundary, else between words. Text without any such boundary is
+    cut at max_length.
+
+    :param text: The text to split
+    :param max_length: The maximum number of characters of a chunk
+    :return: The chunks, paired with the offset of their first character in the text. Joined they are the text
+    """
+    chunks = []
+    start = 0
+    while len(text) - start > max_length:
+        end = start + max_length
+        cut = end
+        for boundaries in [PARAGRAPH_BOUNDARIES, SENTENCE_BOUNDARIES, WORD_BOUNDARIES]:
+            found = -1
+            for boundary in boundaries:
+                position = text.rfind(boundary, start + max_length // 2, end)
+                if position >= 0:
+                    # The chunk keeps the boundary itself
+                    found = max(found, min(position + len(boundary), end))
+            if found > start:
+                cut = found
+                break
+        chunks.append((start, text[start:cut]))
+        start = cut
+    chunks.append((start, text[start:]))
+    return chunks
+
+
+def pipe_entities(nlp: Language, texts: Iterable[str], max_length: int = None, profile: str = "full", **pipe_kwargs) \
+        -> Iterator[List[Entity]]:
+    """
+    Finds the entities of each text with nlp.pipe. Texts longer than max_length are split into chunks with
+    split_text, which are parsed as separate Docs, so the memory used by the pipeline does not grow with the length
+    of the texts. The entities of the chunks are remapped onto the whole text. Chunks parsed before are taken from the
+    Doc cache if DOC_CACHE_PATH is set.
+
+    With n_process above 1, nlp.pipe starts a pool of processes on every call and stops it again once the texts are
+    parsed, so the pool only pays off for many texts, e.g. a very large issue of a publication. If texts is a
+    collection with fewer texts than one batch per process, they are parsed in this process instead.
+
+    :param nlp: The spaCy model
+    :param texts: The texts to find entities in
+    :param max_length: The maximum number of characters parsed as one Doc. Defaults to NLP_MAX_CHUNK_CHARS
+    :param profile: The pipeline profile to parse the texts with, see utils.load_model.PROFILES
+    :param pipe_kwargs: Keyword arguments for nlp.pipe, e.g. batch_size or n_process
+    :return: An iterator over the entities of each text, in the order of the texts
+    """
+    if max_length is None:
+        max_length = max_chunk_length()
+    n_process = pipe_kwargs.get("n_process", 1)
+    if n_process > 1 and isinstance(texts, Sized) and len(texts) < n_process * pipe_kwargs.get("batch_size",
+                                                                                            nlp.batch_size):
+        pipe_kwargs["n_process"] = 1
+
+    def chunks():
+        for index, text in enumerate(texts):
+            for offset, chunk in split_text(text, max_length):
+                yield chunk, (index, offset)
+
+    current_index, entities = None, []
+    for doc, (index, offset) in pipe_docs(nlp, chunks(), profile, as_tuples=True, **pipe_kwargs):
+        # Every text has at least one chunk, so the first chunk of the next text ends the current one
+        if index != current_index:
+            if current_index is not None:
+                yield entities
+            current_index, entities = index, []
+        entities.extend(Entity(offset + entity.start_char, offset + entity.end_char, entity.label_, entity.text)
+                        for entity in doc.ents)
+    if current_index is not None:
+        yield entities
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+from spacy.language import Language
+from spacy.tokens import Doc, DocBin
+
+from environment import EnvironmentVariables as Ev
+from utils.load_model import profile_disable
+
+Ev()
+
+
+class DocCache:
+    """
+    An on-disk cache of parsed spaCy Docs, so texts parsed before are not run through the pipeline again, e.g. when
+    the archive is re-extracted after a change to the triple rules.
+
+    A Doc is keyed by the name and version of the model, the pipeline profile it was parsed with and a hash of its
+    text. Components added to the model after loading, like the gazetteer, are part of the key by name, and by their
+    cache_stamp attribute if they have one. The Docs are stored as DocBin bytes in SQLite. When the cache grows past
+    its size cap, the least recently used Docs are evicted.
+
+    Example of usage:
+        cache = DocCache("docs.sqlite", 1024 ** 3)
+        docs = list(cache.pipe(nlp, texts, "ner-only"))
+    """
+
+    instance = None
+    __instance_lock = threading.Lock()
+
+    # Evicting down to a fraction of the cap leaves room for a batch of Docs before the next eviction
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, path: str, max_bytes: int):
+        """
+
+        :param path: Path of the SQLite file backing the cache
+        :param max_bytes: The maximum total size of the stored Docs in bytes
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        self.__prefixes = {}
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS docs (
+                key BLOB PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID""")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS docs_last_used ON docs (last_used)")
+        self.__size = self.__connection.execute("SELECT COALESCE(SUM(size), 0) FROM docs").fetchone()[0]
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the cache configured by DOC_CACHE_PATH and DOC_CACHE_MAX_BYTES. The same instance is returned on every
+        call.
+
+        :return: The cache, or None if DOC_CACHE_PATH is not set
+        """
+        path = Ev.instance.get_value(Ev.instance.DOC_CACHE_PATH)
+        if path is None:
+            return None
+        with cls.__instance_lock:
+            if cls.instance is None:
+                cls.instance = DocCache(path, Ev.instance.get_int(Ev.instance.DOC_CACHE_MAX_BYTES, 1024 ** 3))
+        return cls.instance
+
+    def key_prefix(self, nlp: Language, profile: str) -> bytes:
+        """
+        :param nlp: The model the Docs are parsed with
+        :param profile: The pipeline profile the Docs are parsed with
+        :return: The part of the key shared by every Doc parsed by the model with the profile
+        """
+        lookup = (id(nlp), tuple(nlp.pipe_names), profile)
+        prefix = self.__prefixes.get(lookup)
+        if prefix is None:
+            disabled = profile_disable(nlp, profile)
+            components = [[name, getattr(component, "cache_stamp", None)]
+                          for name, component in nlp.pipeline if name not in disabled]
+            prefix = json.dumps([nlp.lang, nlp.meta.get("name"), nlp.meta.get("version"), profile, components],
+                                sort_keys=True, default=str).encode("utf-8")
+            self.__prefixes[lookup] = prefix
+        return prefix
+
+    @staticmethod
+    def key(prefix: bytes, text: str) -> bytes:
+        """
+        :param prefix: The key prefix of the model and profile, see key_prefix
+        :param text: The text of the Doc
+        :return: The key of the Doc
+        """
+        digest = hashlib.sha256(prefix)
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def contains(self, key: bytes) -> bool:
+        """
+        :param key: The key of a Doc
+        :return: Whether the Doc is in the cache
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT 1 FROM docs WHERE key = ?", (key,)).fetchone() is not None
+
+    def touch(self, key: bytes) -> bool:
+        """
+        Marks a Doc as recently used, so it is not evicted before Docs stored after it.
+
+        :param key: The key of the Doc
+        :return: Whether the Doc is in the cache
+        """
+        with self.__lock:
+            return self.__connection.execute("UPDATE docs SET last_used = ? WHERE key = ?",
+                                             (time.time(), key)).rowcount == 1
+
+    def get(self, key: bytes, nlp: Language) -> Optional[Doc]:
+        """
+        Looks up a Doc and marks it as recently used.
+
+        :param key: The key of the Doc
+        :param nlp: The model the Doc was parsed with, whose vocabulary the Doc is restored into
+        :return: The Doc, or None if it is not in the cache
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT data FROM docs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.__connection.execute("UPDATE docs SET last_used = ? WHERE key = ?", (time.time(), key))
+        return next(DocBin().from_bytes(bytes(row[0])).get_docs(nlp.vocab))
+
+    def put(self, key: bytes, doc: Doc):
+        """
+        Stores a Doc, evicting the least recently used Docs if the cache grows past its size cap.
+
+        :param key: The key of the Doc
+        :param doc: The parsed Doc
+        """
+        doc_bin = DocBin()
+        doc_bin.add(doc)
+        data = doc_bin.to_bytes()
+        with self.__lock:
+            row = self.__connection.execute("SELECT size FROM docs WHERE key = ?", (key,)).fetchone()
+            self.__connection.execute("INSERT OR REPLACE INTO docs (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+                                      (key, data, len(data), time.time()))
+            self.__size += len(data) - (row[0] if row is not None else 0)
+            if self.__size > self.max_bytes:
+                self.__evict()
+
+    def size(self) -> int:
+        """
+        :return: The total size of the stored Docs in bytes
+        """
+        with self.__lock:
+            return self.__size
+
+    def pipe(self, nlp: Language, texts: Iterable, profile: str = "full", as_tuples: bool = False, **pipe_kwargs) \
+            -> Iterator:
+        """
+        Parses texts like nlp.pipe, taking the Docs found in the cache from there. Only the texts not in the cache are
+        passed to nlp.pipe, in a single call, and their Docs are stored.
+
+        :param nlp: The model to parse the texts with
+        :param texts: The texts to parse, or (text, context) tuples if as_tuples is set
+        :param profile: The pipeline profile to parse the texts with, see utils.load_model.PROFILES
+        :param as_tuples: Whether the texts are (text, context) tuples, like for nlp.pipe
+        :param pipe_kwargs: Keyword arguments for nlp.pipe, e.g. batch_size or n_process
+        :return: An iterator over the Docs, or (Doc, context) tuples, in the order of the texts
+        """
+        prefix = self.key_prefix(nlp, profile)
+        disable = profile_disable(nlp, profile)
+        # Only the keys and texts of cached texts are held until their turn, so a long run of cached texts does not
+        # hold Docs
+        cached = deque()
+
+        def uncached():
+            for sequence, item in enumerate(texts):
+                text, context = item if as_tuples else (item, None)
+                key = self.key(prefix, text)
+                # Marked as used, so the Docs stored while it waits do not evict it first
+                if self.touch(key):
+                    cached.append((sequence, key, text, context))
+                else:
+                    yield text, (sequence, key, context)
+
+        def restore(key, text, context):
+            doc = self.get(key, nlp)
+            if doc is None:
+                # Evicted while waiting anyway, e.g. by a cap smaller than the Docs parsed meanwhile
+                doc = nlp(text, disable=disable)
+                self.put(key, doc)
+            return (doc, context) if as_tuples else doc
+
+        for doc, (sequence, key, context) in nlp.pipe(uncached(), as_tuples=True, disable=disable, **pipe_kwargs):
+            # nlp.pipe reads ahead, so every cached text before this one has been seen
+            while cached and cached[0][0] < sequence:
+                yield restore(*cached.popleft()[1:])
+            with self.__lock:
+                self.misses += 1
+            self.put(key, doc)
+            yield (doc, context) if as_tuples else doc
+        while cached:
+            yield restore(*cached.popleft()[1:])
+
+    def __evict(self):
+        """
+        Deletes the least recently used Docs until the cache is below its eviction target. The lock must be held.
+        """
+        target = self.max_bytes * self.EVICTION_TARGET
+        self.__connection.execute("BEGIN")
+        try:
+            cursor = self.__connection.execute("SELECT key, size FROM docs ORDER BY last_used")
+            evicted = []
+            for key, size in cursor:
+                if self.__size <= target:
+                    break
+                evicted.append((key,))
+                self.__size -= size
+            cursor.close()
+            self.__connection.executemany("DELETE FROM docs WHERE key = ?", evicted)
+            self.__connection.execute("COMMIT")
+        except Exception:
+            self.__connection.execute("ROLLBACK")
+            self.__size = self.__connection.execute("SELECT COALESCE(SUM(size), 0) FROM docs").fetchone()[0]
+            raise
+
+
+def pipe_docs(nlp: Language, texts: Iterable, profile: str = "full", as_tuples: bool = False, **pipe_kwargs) \
+        -> Iterator:
+    """
+    Parses texts with nlp.pipe and a pipeline profile, through the Doc cache if DOC_CACHE_PATH is set.
+
+    :param nlp: The model to parse the texts with
+    :param texts: The texts to parse, or (text, context) tuples if as_tuples is set
+    :param profile: The pipeline profile to parse the texts with, see utils.load_model.PROFILES
+    :param as_tuples: Whether the texts are (text, context) tuples, like for nlp.pipe
+    :param pipe_kwargs: Keyword arguments for nlp.pipe, e.g. batch_size or n_process
+    :return: An iterator over the Docs, or (Doc, context) tuples, in the order of the texts
+    """
+    cache = DocCache.get_instance()
+    if cache is None:
+        return nlp.pipe(texts, as_tuples=as_tuples, disable=profile_disable(nlp, profile), **pipe_kwargs)
+    return cache.pipe(nlp, texts, profile, as_tuples=as_tuples, **pipe_kwargs)
+
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from environment import EnvironmentVariables as Ev
+from .logging import LogF
+
+Ev()
+
+# Status codes where the request may succeed if it is sent again
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
+_session: requests.Session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the Session shared by all uploads to the database layer. Connections are kept alive and pooled, so
+    consecutive and parallel requests to the same host do not pay the connection setup each time.
+
+    :return: The shared requests Session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def iter_gzip(pieces: Iterable[bytes], level: int = 5) -> Iterator[bytes]:
+    """
+    Gzip compresses a streamed request body piece by piece. The request must be sent with the header
+    "Content-Encoding: gzip".
+
+    :param pieces: The uncompressed pieces of the body
+    :param level: The gzip compression level
+    :return: An iterator over the compressed pieces
+    """
+    # wbits 31 selects the gzip container format
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def idempotency_key(body: Union[bytes, Iterable[bytes]]) -> str:
+    """
+    Derives a key from the content of a request body. The same body always produces the same key, which lets the
+    receiver recognise a request that is sent again after a retry.
+
+    :param body: The uncompressed request body, either as bytes or as the pieces of a streamed body
+    :return: The key as a hex string
+    """
+    digest = hashlib.sha256()
+    for piece in [body] if isinstance(body, bytes) else body:
+        digest.update(piece)
+    return digest.hexdigest()
+
+
+def post_with_retry(url: str, body: Callable[[], Union[bytes, Iterable[bytes]]], headers: Dict[str, str] = None,
+                    timeout: float = None, retries: int = None, backoff: float = None) -> requests.Response:
+    """
+    POSTs to the given url using the shared Session, retrying on connection errors, timeouts and retryable status
+    codes with exponential backoff. Any other error status is raised immediately.
+
+    :param url: The endpoint to POST to
+    :param body: A function returning the request body. It is called again for each attempt, so streamed bodies
+        can be recreated
+    :param headers: The headers of the request
+    :param timeout: Seconds to wait for the server, defaults to HTTP_TIMEOUT
+    :param retries: The number of retries after the first attempt, defaults to HTTP_RETRIES
+    :param backoff: Seconds to wait before the first retry, doubled for each retry, defaults to HTTP_RETRY_BACKOFF
+    :return: The successful response
+    """
+    timeout = timeout if timeout is not None else Ev.instance.get_float(Ev.instance.HTTP_TIMEOUT, 60.0)
+    retries = retries if retries is not None else Ev.instance.get_int(Ev.instance.HTTP_RETRIES, 3)
+    backoff = backoff if backoff is not None else Ev.instance.get_float(Ev.instance.HTTP_RETRY_BACKOFF, 1.0)
+
+    for attempt in range(retries + 1):
+        try:
+            response = get_session().post(url, data=body(), headers=headers, timeout=timeout)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                response.raise_for_status()
+                return response
+            LogF.log(f"Received status {response.status_code} from {url}, retrying")
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+            if attempt == retries:
+                raise error
+            LogF.log(f"Unable to reach {url}, retrying: {error}")
+        time.sleep(backoff * (2 ** attempt))
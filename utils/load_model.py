@@ -1,16 +1,129 @@
+import hashlib
 import os
+import tempfile
+import threading
+from typing import List
 
+import numpy
 import spacy
+from spacy.language import Language
 
+from environment import EnvironmentVariables as Ev
 
-def load_model(model: str, *args, **kwargs):
+Ev()
+
+# Models already loaded, keyed by the arguments they were loaded with
+__models = {}
+__models_lock = threading.Lock()
+
+# Pipeline profiles: the components a task needs. Components these listen to, like a shared tok2vec, are kept too
+PROFILES = {
+    "full": None,
+    "pos-only": ["tagger", "morphologizer", "attribute_ruler"],
+    "ner-only": ["ner", "entity_ruler", "gazetteer"],
+}
+# The components disabled by each profile, keyed by the model instance and profile
+__profiles = {}
+
+
+def load_model(model: str, *args, shared: bool = True, **kwargs):
     """
-    Loads the specified spaCy model.
+    Loads the specified spaCy model. A shared model is only loaded once; later calls with the same arguments return
+    the same instance. A model used on a thread of its own, or whose pipeline is changed after loading, must not be
+    shared, as a Language object is not safe to use from several threads at once. The word vectors of the model are
+    memory-mapped, see share_vectors, so instances that are not shared still share them.
 
-    :param model: The name/path of the model to load
+    :param model: The name/path of the model to load. Paths are relative to the repository root. If no such path
+        exists, the model is loaded as an installed package, e.g. "da_core_news_lg"
     :param args: Arguments for the model to load
-    :param kwargs: ???
+    :param shared: Whether to return the instance cached for the whole process, shared with every other caller
+        loading the model with the same arguments, rather than a new instance of its own
+    :param kwargs: Keyword arguments for spacy.load, e.g. disable
     :return: The loaded model
     """
-    path = os.path.join(os.path.dirname(__file__), "..", model)
-    return spacy.load(path, *args, **kwargs)
+    key = (model, repr(args), repr(sorted(kwargs.items())))
+    with __models_lock:
+        nlp = __models.get(key) if shared else None
+        if nlp is None:
+            path = os.path.join(os.path.dirname(__file__), "..", model)
+            nlp = spacy.load(path if os.path.exists(path) else model, *args, **kwargs)
+            share_vectors(nlp)
+            if shared:
+                __models[key] = nlp
+    return nlp
+
+
+def share_vectors(nlp: Language, directory: str = None) -> bool:
+    """
+    Replaces the word vector table of a model with a read-only memory-mapped copy, stored in a directory the first
+    time a model is seen. Every process mapping the same file shares its physical pages through the page cache, so
+    the vectors are held in memory once per node instead of once per process, and the pages are only read in as the
+    vectors are used. Processes forked after loading, like the workers of nlp.pipe with n_process, share them too.
+
+    :param nlp: A loaded model
+    :param directory: The directory of the memory-mapped files. Defaults to VECTORS_MMAP_DIR, or knox-vectors in the
+        temporary directory if it is not set. An empty VECTORS_MMAP_DIR turns the memory-mapping off
+    :return: True if the vectors of the model are memory-mapped, False if the model has no vector table that can be,
+        or the memory-mapping is turned off
+    """
+    directory = directory if directory is not None else Ev.instance.get_value(
+        Ev.instance.VECTORS_MMAP_DIR, os.path.join(tempfile.gettempdir(), "knox-vectors"))
+    vectors = nlp.vocab.vectors
+    if isinstance(vectors.data, numpy.memmap):
+        return True
+    # Floret vectors are hashed n-gram tables, and data on a GPU is not a NumPy array
+    if not directory or vectors.mode != "default" or vectors.shape[0] == 0 \
+            or not isinstance(vectors.data, numpy.ndarray):
+        return False
+
+    data = vectors.data
+    # The name identifies the table, without hashing hundreds of MB each time a model is loaded
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(numpy.ascontiguousarray(data[::max(1, len(data) // 1024)]).tobytes())
+    digest.update(numpy.ascontiguousarray(data[-16:]).tobytes())
+    name = "-".join([nlp.lang, str(nlp.meta.get("name")), str(nlp.meta.get("version")),
+                     "x".join(str(size) for size in data.shape), str(data.dtype), digest.hexdigest()]) + ".npy"
+    path = os.path.join(directory, name)
+
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        # Written under a temporary name, so other processes never map a partly written file
+        temporary_path = path + "." + str(os.getpid()) + ".tmp"
+        with open(temporary_path, "wb") as vectors_file:
+            numpy.save(vectors_file, data)
+        os.replace(temporary_path, path)
+
+    mapped = numpy.load(path, mmap_mode="r")
+    if mapped.shape != data.shape or mapped.dtype != data.dtype:
+        return False
+    vectors.data = mapped
+    return True
+
+
+def profile_disable(nlp: Language, profile: str) -> List[str]:
+    """
+    Returns the components to disable to run a model with a profile, for use as the disable argument of a call to
+    the model or its pipe method, e.g. nlp(text, disable=profile_disable(nlp, "ner-only")). Unlike select_pipes,
+    this does not change the model, so it is safe to use from several threads sharing the model.
+
+    :param nlp: A model loaded by load_model
+    :param profile: The name of a profile in PROFILES
+    :return: The names of the components the profile does not need
+    """
+    if profile not in PROFILES:
+        raise Exception("Unknown pipeline profile: " + profile + ". Known profiles are: " + ", ".join(PROFILES))
+
+    # Components can be added after loading, so the key includes them
+    key = (id(nlp), tuple(nlp.pipe_names), profile)
+    disabled = __profiles.get(key)
+    if disabled is None:
+        if PROFILES[profile] is None:
+            disabled = []
+        else:
+            needed = set(PROFILES[profile])
+            for name, component in nlp.pipeline:
+                if needed.intersection(getattr(component, "listening_components", [])):
+                    needed.add(name)
+            disabled = [name for name in nlp.pipe_names if name not in needed]
+        __profiles[key] = disabled
+    return disabled
@@ -0,0 +1,67 @@
+from typing import Generic, Hashable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+
+class OrderedSet(Generic[T]):
+    """
+    A set that remembers insertion order. Items that are already in the set are dropped when added again, so the set
+    can be used in place of a list that should not hold duplicates, with constant time membership checks.
+    """
+
+    def __init__(self, items: Iterable[T] = ()):
+        """
+
+        :param items: The initial items of the set
+        """
+        # dicts keep insertion order, the values are unused
+        self.__items = dict.fromkeys(items)
+
+    def append(self, item: T) -> bool:
+        """
+        Adds an item to the end of the set, unless it is already in it.
+
+        :param item: The item to add
+        :return: True if the item was added, False if it was already in the set
+        """
+        if item in self.__items:
+            return False
+        self.__items[item] = None
+        return True
+
+    def extend(self, items: Iterable[T]):
+        """
+        Adds each of the items to the end of the set, unless it is already in it.
+
+        :param items: The items to add
+        """
+        for item in items:
+            self.append(item)
+
+    def drain(self) -> Iterator[T]:
+        """
+        Empties the set, returning an iterator over the items it held.
+
+        :return: An iterator over the removed items, in insertion order
+        """
+        items = self.__items
+        self.__items = {}
+        return iter(items)
+
+    def clear(self):
+        """
+        Removes all items from the set.
+        """
+        self.__items.clear()
+
+    def __contains__(self, item) -> bool:
+        return item in self.__items
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.__items)
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __repr__(self) -> str:
+        return "OrderedSet(" + repr(list(self.__items)) + ")"